@@ -1,8 +1,27 @@
 from .app import (__version__, __author__, get_cid_by_inchi, get_cids_by_formula, get_cid_by_name,
                   get_cids_by_name, get_image_by_cid, get_image_by_name, compound, get_structure_by_cid,
-                  get_structure_by_name, get_similar_structures_cids_by_compound_id, get_image_by_inchi)
+                  get_structure_by_name, get_similar_structures_cids_by_compound_id, get_image_by_inchi,
+                  configure_session, set_rate_limit, resolve_identifiers,
+                  iter_cids_by_formula, enable_cache, disable_cache,
+                  configure_memo, get_memo_stats, clear_memo, enable_negative_cache,
+                  disable_negative_cache, set_offline, warmup_cache,
+                  get_compound_table, build_similarity_index, build_key_index, enable_key_index,
+                  disable_key_index, build_synonym_index, enable_synonym_index,
+                  disable_synonym_index, build_formula_index, enable_formula_index,
+                  disable_formula_index, enable_property_store, disable_property_store,
+                  query_properties)
+from .docs import OfflineCacheMissError
+from . import aio
 
 __all__ = ['__version__', '__author__', 'get_cid_by_inchi', 'get_cids_by_formula', 'get_cid_by_name',
            'get_cids_by_name', 'get_image_by_cid', 'get_image_by_name', 'compound',
            'get_structure_by_cid', 'get_structure_by_name', 'get_similar_structures_cids_by_compound_id',
-           'get_image_by_inchi']
+           'get_image_by_inchi', 'configure_session', 'set_rate_limit', 'resolve_identifiers', 'iter_cids_by_formula', 'enable_cache', 'disable_cache',
+           'configure_memo', 'get_memo_stats', 'clear_memo',
+           'enable_negative_cache', 'disable_negative_cache',
+           'set_offline', 'OfflineCacheMissError', 'warmup_cache',
+           'get_compound_table', 'build_similarity_index', 'build_key_index', 'enable_key_index',
+           'disable_key_index', 'build_synonym_index', 'enable_synonym_index',
+           'disable_synonym_index', 'build_formula_index', 'enable_formula_index',
+           'disable_formula_index', 'enable_property_store', 'disable_property_store',
+           'query_properties', 'aio']
@@ -0,0 +1,83 @@
+# COMMAND LINE
+# -------------
+
+# import packages/modules
+import sys
+import argparse
+# local
+from .docs import CacheWarmer, ResponseCache, RateLimiter, __version__
+
+
+def main(argv=None):
+    '''
+    pubchemquery command line
+
+    python -m pubchemquery warmup compounds.txt --groups properties image --workers 4
+    '''
+    parser = argparse.ArgumentParser(
+        prog='pubchemquery', description='PubChemQuery command line')
+    parser.add_argument('--version', action='version',
+                        version=f'PubChemQuery {__version__}')
+    subparsers = parser.add_subparsers(dest='command')
+
+    # warmup
+    warmup = subparsers.add_parser(
+        'warmup', help='fill the response cache from a file of cids/names (one per line)')
+    warmup.add_argument('file', help='file of cids/names, one per line')
+    warmup.add_argument('--groups', nargs='+', default=list(CacheWarmer.groups),
+                        choices=list(CacheWarmer.groups), help='requests per cid (default: all)')
+    warmup.add_argument('--record-types', nargs='+', default=['2d', '3d'],
+                        choices=['2d', '3d'], help='sdf record types (default: 2d 3d)')
+    warmup.add_argument('--image-format', default='2d',
+                        choices=['2d', '3d'], help='image format (default: 2d)')
+    warmup.add_argument('--image-size', default='large',
+                        help='image size (default: large)')
+    warmup.add_argument('--similarity-type', default='fastsimilarity_2d',
+                        choices=['fastsimilarity_2d', 'fastsimilarity_3d'],
+                        help='similarity type (default: fastsimilarity_2d)')
+    warmup.add_argument('--workers', type=int, default=4,
+                        help='max number of requests in flight (default: 4)')
+    warmup.add_argument('--rate', type=float, default=None,
+                        help='requests per second (default: 5)')
+    warmup.add_argument('--cache', default=None,
+                        help='cache file path (default: ~/.pubchemquery/cache.sqlite)')
+    warmup.add_argument('--quiet', action='store_true',
+                        help='do not print progress')
+
+    args = parser.parse_args(argv)
+
+    # check
+    if args.command is None:
+        parser.print_help()
+        return 0
+
+    if args.command == 'warmup':
+        # cache
+        if args.cache is not None:
+            ResponseCache.enable(args.cache)
+        else:
+            ResponseCache.enable()
+        # rate limit
+        if args.rate is not None:
+            RateLimiter.configure(args.rate, max(int(args.rate), 1))
+
+        def _progress(done, total):
+            if not args.quiet:
+                print(f"\r{done}/{total}", end='', file=sys.stderr, flush=True)
+
+        stats = CacheWarmer.warmup(args.file, groups=args.groups, record_types=args.record_types,
+                                   image_format=args.image_format, image_size=args.image_size,
+                                   similarity_type=args.similarity_type, max_workers=args.workers,
+                                   progress=_progress)
+        if not args.quiet:
+            print(file=sys.stderr)
+        print(f"identifiers: {stats['identifiers']}, cids: {stats['cids']}, "
+              f"requests: {stats['requests']}, failed: {stats['failed']}, "
+              f"elapsed: {stats['elapsed']:.1f} s")
+        if len(stats['not_found']) > 0:
+            print(f"not found: {', '.join(stats['not_found'])}")
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,357 @@
+# ASYNC APP
+# ----------
+
+# import packages/modules
+import re
+import asyncio
+# local
+from .docs import PubChemAPI, AsyncPubChemAPI, AsyncSessionManager, OfflineCacheMissError, PROPERTY_NAMES
+
+
+async def close():
+    '''
+    Close the async http session of the running event loop
+    '''
+    await AsyncSessionManager.close()
+
+
+async def get_cid_by_inchi(inchi: str) -> str:
+    '''
+    Get a cid (only one) by inchi
+
+    Parameters
+    ----------
+    inchi : str
+        e.g. InChI=1S/C3H8/c1-3-2/h3H2,1-2H3
+
+    Returns
+    -------
+    str
+        component cid
+    '''
+    try:
+        resp = await AsyncPubChemAPI.get_cids_by_inchi(inchi)
+        if len(resp) == 0:
+            return "Not Found!"
+        elif len(resp) == 1:
+            return str(resp[0])
+        else:
+            return "There are multiple cids!, check get_cids_by_inchi() to get all cids."
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_cids_by_formula(formula: str):
+    '''
+    Get all cids by formula
+    for instance, CH4
+
+    Parameters
+    ----------
+    formula : str
+        compound formula (https://pubchem.ncbi.nlm.nih.gov/)
+
+    Returns
+    -------
+    list
+        cid list
+    '''
+    try:
+        res = await AsyncPubChemAPI.get_cids_by_formula(formula)
+        if len(res) == 0:
+            return "Not Found!"
+
+        return res
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_cid_by_name(name) -> str:
+    '''
+    Get a cid (only one) by name
+    for instance, benzene cid
+
+    Parameters
+    ----------
+    name : str
+        compound name (https://pubchem.ncbi.nlm.nih.gov/)
+
+    Returns
+    -------
+    str
+        cid
+    '''
+    try:
+        res = await AsyncPubChemAPI.get_cid_by_name(name, name_type='complete')
+        res = res[0] if len(res) == 1 else "Not Found!"
+        return res
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_cids_by_name(name) -> list[str]:
+    '''
+    Get a cid list by name (if available)
+    for instance, all cids have a hydroxyl functional group
+
+    Parameters
+    ----------
+    name : str
+        compound name (https://pubchem.ncbi.nlm.nih.gov/)
+
+    Returns
+    -------
+    list[str]
+        cid list
+    '''
+    try:
+        res = await AsyncPubChemAPI.get_cid_by_name(name, name_type='word')
+        # log
+        if len(res) == 0:
+            print("Not Found!")
+        return res
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_structure_by_cid(cid, file_format='SDF', record_type='3d', save_file=False, file_dir=''):
+    '''
+    Get a compound structure by cid
+
+    Parameters
+    ----------
+    cid : int or str
+        compound id
+    file_format : str
+        SDF, JSON
+    record_type : str
+        3d, 2d
+    save_file : bool
+        the sdf file is saved
+    file_dir : str
+        directory path, if it is empty, the current directory is selected.
+
+    Returns
+    -------
+    str
+        sdf string
+    '''
+    try:
+        return await AsyncPubChemAPI.get_sdf_by_cid(cid, file_format=file_format, record_type=record_type, save=save_file, location=file_dir)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_structure_by_name(name, file_format='SDF', record_type='3d', save_file=False, file_dir=''):
+    '''
+    Get a compound structure by name
+
+    Parameters
+    ----------
+    name : str
+        compound name
+    file_format : str
+        SDF, JSON
+    record_type : str
+        3d, 2d
+    save_file : bool
+        the sdf file is saved
+    file_dir : str
+        directory path, if it is empty, the current directory is selected.
+
+    Returns
+    -------
+    str
+        sdf string
+    '''
+    try:
+        return await AsyncPubChemAPI.get_sdf_by_name(name, file_format=file_format, record_type=record_type, save=save_file, location=file_dir)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_similar_structures_cids_by_compound_id(val, compound_id='cid', similarity_type='fastsimilarity_2d') -> list:
+    '''
+    Get similar structures by cid
+
+    Parameters
+    ----------
+    val : int or str
+        compound id e.g. 297, 'C1=CC=CC=C1', 'InChI=1S/C6H6/c1-2-4-6-5-3-1/h1-6H'
+    compound_id : str
+        cid, SMILES, InChI (default: cid)
+    similarity_type : str
+        fastsimilarity_2d, fastsimilarity_3d (default: fastsimilarity_2d)
+
+    Returns
+    -------
+    list[str]
+        cid list
+    '''
+    try:
+        return await AsyncPubChemAPI.get_similar_cids_by_compound_id(
+            str(val), compound_id=compound_id, similarity_type=similarity_type)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_image_by_cid(cid, image_format='2d', image_size='large'):
+    '''
+    Get compound structure image
+
+    Parameters
+    ----------
+    cid : str,int
+        compound id
+    image_format : str
+        3d, 2d (default: 2d)
+    image_size : str
+        small, large, 250x250
+
+    Returns
+    -------
+    PIL.Image
+        cid image
+    '''
+    try:
+        return await AsyncPubChemAPI.get_structure_image(cid=int(cid), image_format=image_format, image_size=image_size)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_image_by_name(name, image_format='2d', image_size='large'):
+    '''
+    Get compound structure image
+
+    Parameters
+    ----------
+    name : str
+        compound name (IUPAC Name)
+    image_format : str
+        3d, 2d (default: 2d)
+    image_size : str
+        small, large, 250x250
+
+    Returns
+    -------
+    PIL.Image
+        cid image
+    '''
+    try:
+        return await AsyncPubChemAPI.get_structure_image(name=name, image_format=image_format, image_size=image_size)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def get_image_by_inchi(inchi: str, image_format='2d', image_size='large'):
+    '''
+    Get compound structure image by inchi
+
+    Parameters
+    ----------
+    inchi : str
+        compound inchi
+    image_format : str
+        3d, 2d (default: 2d)
+    image_size : str
+        small, large, 250x250
+
+    Returns
+    -------
+    PIL.Image
+        cid image
+    '''
+    try:
+        # get cid
+        cids = await AsyncPubChemAPI.get_cids_by_inchi(inchi)
+        # check
+        if len(cids) == 0:
+            return None
+        # get image
+        return await AsyncPubChemAPI.get_structure_image(cid=int(cids[0]), image_format=image_format, image_size=image_size)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+async def compound(id: str, image_format='2d', image_size='large', similarity_type='fastsimilarity_2d'):
+    '''
+    make a compound by cid, then get its information,
+    properties, image and similar cids are requested concurrently,
+    a group that failed and sdf are requested on first access.
+
+    Parameters
+    ----------
+    id: str or int
+        compound cid or name (https://pubchem.ncbi.nlm.nih.gov/)
+    image_format : str
+        3d, 2d (default: 2d)
+    image_size : str
+        small, large, 250x250
+    similarity_type : str
+        fastsimilarity_2d, fastsimilarity_3d (default: fastsimilarity_2d)
+
+    Returns
+    -------
+    object
+        compound object with all properties
+    '''
+    try:
+        # set
+        id = str(id).strip()
+        name = ''
+
+        # check id is number
+        pattern = re.compile(r'^\d+$')
+        if bool(pattern.match(id)):
+            cid = id
+        elif id != '':
+            name = id
+            # get cid
+            _cid = await AsyncPubChemAPI.get_cid_by_name(name, name_type='complete')
+            # check
+            if len(_cid) != 1:
+                raise Exception(f"compound {name} not found!")
+            cid = str(_cid[0]).strip()
+        else:
+            raise Exception(f"{id} format is not valid!")
+
+        # compound obj (groups not filled here are requested on access)
+        compound_obj = PubChemAPI(cid, name, lazy=True, image_format=image_format,
+                                  image_size=image_size, similarity_type=similarity_type)
+
+        # requests
+        properties, img, similar_cids = await asyncio.gather(
+            AsyncPubChemAPI.get_properties_by_cid(
+                cid, properties=list(PROPERTY_NAMES)),
+            AsyncPubChemAPI.get_structure_image(
+                cid=int(cid), image_format=image_format, image_size=image_size),
+            AsyncPubChemAPI.get_similar_cids_by_compound_id(
+                cid, similarity_type=similarity_type),
+            return_exceptions=True
+        )
+        for item in (properties, img, similar_cids):
+            if isinstance(item, Exception):
+                OfflineCacheMissError.reraise(item)
+
+        # update (only filled groups are marked as loaded)
+        if isinstance(properties, dict):
+            compound_obj.set_properties(properties['PropertyTable']['Properties'][0])
+        if img is not None and not isinstance(img, Exception):
+            compound_obj.image = img
+        if isinstance(similar_cids, list):
+            compound_obj.similar_structure_cids = similar_cids
+        # return
+        return compound_obj
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
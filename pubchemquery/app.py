@@ -3,16 +3,269 @@
 
 # import packages/modules
 import re
-import time
 from typing import List, Union, Dict, Optional, Literal
 # local
-from .docs import PubChemAPI, __version__, __author__
+from .docs import (PubChemAPI, SessionManager, RateLimiter, IdentifierResolver, ResponseCache,
+                   Memo, NegativeCache, OfflineCacheMissError, CacheWarmer, CompoundTable, SimilarityIndex, InChIKeyIndex,
+                   SynonymIndex, FormulaIndex, PropertyStore,
+                   __version__, __author__)
 
 
 def main():
     print(f'PubChemQuery {__version__}')
 
 
+def configure_session(pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                      max_retries: Optional[int] = None, timeout: Optional[Union[float, tuple]] = None,
+                      coalesce: Optional[bool] = None) -> Dict:
+    '''
+    Configure the shared http session used by all PubChem requests
+
+    Parameters
+    ----------
+    pool_connections : int
+        number of connection pools to cache (default: 10)
+    pool_maxsize : int
+        max number of connections kept alive in a pool (default: 20)
+    max_retries : int
+        number of retries on connection errors (default: 3)
+    timeout : float or tuple
+        default request timeout in seconds, (connect, read) (default: (10, 60))
+    coalesce : bool
+        concurrent identical requests share one in-flight request (default: True)
+
+    Returns
+    -------
+    dict
+        current session settings
+    '''
+    try:
+        return SessionManager.configure(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                        max_retries=max_retries, timeout=timeout, coalesce=coalesce)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def set_rate_limit(rate: Optional[float], capacity: Optional[int] = None, family: str = 'global') -> Dict:
+    '''
+    Set the request rate limit (token bucket) of an endpoint family
+
+    Parameters
+    ----------
+    rate : float
+        requests per second, None removes the limit of the family
+    capacity : int
+        burst size (default: rate)
+    family : str
+        global (all requests), property, image, search, structure, identifier, listkey, default
+
+    Returns
+    -------
+    dict
+        current limits
+    '''
+    try:
+        return RateLimiter.configure(rate=rate, capacity=capacity, family=family)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def enable_cache(path: Optional[str] = None, ttl: Optional[Union[int, Dict[str, int]]] = None,
+                 max_size: Optional[int] = None) -> Dict:
+    '''
+    Enable the persistent response cache (sqlite) for all PubChem requests
+
+    Parameters
+    ----------
+    path : str
+        cache file path (default: ~/.pubchemquery/cache.sqlite)
+    ttl : int or dict
+        time to live in seconds, for all endpoint families or per family
+        e.g. {'property': 86400, 'search': 3600}
+    max_size : int
+        max size of cached responses in bytes (default: 1 GB)
+
+    Returns
+    -------
+    dict
+        cache statistics
+    '''
+    try:
+        # set
+        kwargs = {'ttl': ttl}
+        if path is not None:
+            kwargs['path'] = path
+        if max_size is not None:
+            kwargs['max_size'] = max_size
+
+        return ResponseCache.enable(**kwargs).stats()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def disable_cache():
+    '''
+    Disable the response cache (cached responses are kept on disk)
+    '''
+    try:
+        ResponseCache.disable()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def warmup_cache(identifiers: Union[str, List[str]], groups: List[str] = ['properties', 'sdf', 'image', 'similar'],
+                 max_workers: int = 4, background: bool = False, **kwargs):
+    '''
+    Fill the response cache ahead of time from cids/names, the requests made by
+    compound() (properties, sdf 2d/3d, png, similar cids) are then answered from the cache
+
+    Parameters
+    ----------
+    identifiers : str or list
+        cids/names or a file path (one identifier per line)
+    groups : list
+        properties, sdf, image, similar (default: all)
+    max_workers : int
+        max number of requests in flight (default: 4), requests share the rate limit
+    background : bool
+        run in a background thread (default: False)
+    kwargs : dict
+        record_types, image_format, image_size, similarity_type, progress, callback (background)
+
+    Returns
+    -------
+    dict or threading.Thread
+        warm up statistics, or the running thread if background is True
+    '''
+    try:
+        if background:
+            return CacheWarmer.start(identifiers, groups=groups, max_workers=max_workers, **kwargs)
+        return CacheWarmer.warmup(identifiers, groups=groups, max_workers=max_workers, **kwargs)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+def set_offline(enabled: bool = True):
+    '''
+    Enable/disable offline mode, every request is answered from the response
+    cache (expired responses included) and a request that is not cached
+    raises OfflineCacheMissError instead of touching the network.
+    The environment variable PUBCHEMQUERY_OFFLINE=1 enables it at import.
+
+    ListKey searches (PubChem answers 202 and is polled until the result
+    is ready) are never cached, so they cannot be replayed offline and
+    raise OfflineCacheMissError.
+
+    Parameters
+    ----------
+    enabled : bool
+        offline mode (default: True)
+    '''
+    try:
+        SessionManager.set_offline(enabled)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def enable_negative_cache(path: Optional[str] = None, ttl: Optional[float] = None,
+                          capacity: Optional[int] = None, error_rate: Optional[float] = None) -> Dict:
+    '''
+    Enable the negative cache, identifiers not found on PubChem (404) are
+    remembered in a bloom filter saved across runs and are not requested again
+
+    Parameters
+    ----------
+    path : str
+        file path (default: ~/.pubchemquery/negative.bloom)
+    ttl : float
+        time to live of a not found identifier in seconds (default: 7 days)
+    capacity : int
+        expected number of not found identifiers (default: 100000)
+    error_rate : float
+        false positive rate, a found identifier reported as not found (default: 0.001)
+
+    Returns
+    -------
+    dict
+        negative cache statistics
+    '''
+    try:
+        # set
+        kwargs = {'path': path, 'ttl': ttl,
+                  'capacity': capacity, 'error_rate': error_rate}
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+
+        return NegativeCache.enable(**kwargs).stats()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def disable_negative_cache():
+    '''
+    Disable the negative cache (not found identifiers are kept on disk)
+    '''
+    try:
+        NegativeCache.disable()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def configure_memo(cache: Optional[str] = None, maxsize: Optional[int] = None,
+                   ttl: Optional[float] = -1, enabled: Optional[bool] = None) -> Dict:
+    '''
+    Configure the in-memory lookup memoization (LRU)
+
+    Parameters
+    ----------
+    cache : str
+        identifier (name/inchi/inchikey/smiles/formula -> cids),
+        property (cid -> properties), (default: None, all caches)
+    maxsize : int
+        max number of entries
+    ttl : float
+        time to live in seconds, None disables expiry (default: -1, unchanged)
+    enabled : bool
+        enable/disable memoization
+
+    Returns
+    -------
+    dict
+        memo statistics
+    '''
+    try:
+        # set
+        kwargs = {'maxsize': maxsize, 'enabled': enabled}
+        if ttl is None or ttl >= 0:
+            kwargs['ttl'] = ttl
+
+        return Memo.configure(cache, **kwargs)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def get_memo_stats() -> Dict:
+    '''
+    Get hit/miss/eviction counters of the in-memory lookup memoization
+
+    Returns
+    -------
+    dict
+        {cache: {'size', 'maxsize', 'ttl', 'hits', 'misses', 'evictions', 'expirations', 'hit_rate'}}
+    '''
+    return Memo.stats()
+
+
+def clear_memo(cache: Optional[str] = None):
+    '''
+    Clear the in-memory lookup memoization (all caches or one of them)
+    '''
+    try:
+        Memo.clear(cache)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
 def get_cid_by_inchi(inchi: str, res_message: str = '', res_format: Literal['str', 'json', 'dict'] = 'str'):
     '''
     Get a cid (only one) by inchi
@@ -36,9 +289,9 @@ def get_cid_by_inchi(inchi: str, res_message: str = '', res_format: Literal['str
         else:
             res = "There are multiple cids!, check get_cids_by_inchi() to get all cids."
 
-        # check
-
+        return res
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -63,6 +316,7 @@ def get_cids_by_inchi(inchi: str, res_message: str = ''):
         res = str(res[0]) if len(res) == 1 else res
         return res
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -89,6 +343,7 @@ def get_cid_by_formula(formula: str) -> str:
             res) == 1 else 'There are multiple cids!, check get_cids_by_formula() to get all cids.'
         return res
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -114,6 +369,36 @@ def get_cids_by_formula(formula: str):
 
         return res
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+def iter_cids_by_formula(formula: str, page_size: int = 10000, poll_interval: float = 1, timeout: float = 300):
+    '''
+    Iterate over all cids of a formula page by page (constant memory)
+    for instance, C6H6
+
+    Parameters
+    ----------
+    formula : str
+        compound formula (https://pubchem.ncbi.nlm.nih.gov/)
+    page_size : int
+        number of cids per request (default: 10000)
+    poll_interval : float
+        seconds between status requests of a long-running search (default: 1)
+    timeout : float
+        seconds to wait for a long-running search (default: 300)
+
+    Yields
+    ------
+    str
+        cid
+    '''
+    try:
+        yield from PubChemAPI.iter_cids_by_formula(
+            formula, page_size=page_size, poll_interval=poll_interval, timeout=timeout)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -134,9 +419,13 @@ def get_cid_by_name(name) -> str:
     '''
     try:
         res = PubChemAPI.get_cid_by_name(name, name_type='complete')
+        # check
+        if res is None:
+            raise Exception('request is refused, try again.')
         res = res[0] if len(res) == 1 else "Not Found!"
         return res
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -157,11 +446,373 @@ def get_cids_by_name(name) -> list[str]:
     '''
     try:
         res = PubChemAPI.get_cid_by_name(name, name_type='word')
-        res = res if len(res) != 0 else []
+        # check
+        if res is None:
+            raise Exception('request is refused, try again.')
         # log
         if len(res) == 0:
             print("Not Found!")
         return res
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+def resolve_identifiers(identifiers: List[str], identifier_type: str = 'auto', max_workers: int = 4) -> Dict[str, Dict]:
+    '''
+    Resolve many identifiers (names, InChI, InChIKey, SMILES, formulas) to cids,
+    duplicates are requested only once.
+
+    Parameters
+    ----------
+    identifiers : list
+        identifiers, an item can be a (identifier, identifier_type) tuple
+    identifier_type : str
+        auto, name, inchi, inchikey, smiles, formula (default: auto)
+    max_workers : int
+        max number of requests in flight (default: 4)
+
+    Returns
+    -------
+    dict
+        {identifier: {'type': str, 'query': str, 'status': str, 'cids': list}},
+        status is found, ambiguous (multiple cids), not_found or error
+    '''
+    try:
+        return IdentifierResolver.resolve(identifiers, identifier_type=identifier_type, max_workers=max_workers)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+def get_compound_table(cids: List[Union[int, str]], properties: List[str] = [], chunk_size: int = 200,
+                       max_workers: int = 1):
+    '''
+    Get properties of many compounds as a columnar table (typed numpy columns),
+    cids are requested in chunks
+
+    Parameters
+    ----------
+    cids : list
+        compound ids
+    properties : list
+        properties (default: all)
+    chunk_size : int
+        number of cids per request (default: 200)
+    max_workers : int
+        max number of requests in flight (default: 1)
+
+    Returns
+    -------
+    CompoundTable
+        table, to_pandas() makes a DataFrame without copying
+    '''
+    try:
+        return CompoundTable.from_cids(cids, properties=properties, chunk_size=chunk_size,
+                                       max_workers=max_workers)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+def build_similarity_index(cids: Optional[List[Union[int, str]]] = None, chunk_size: int = 200,
+                           max_workers: int = 1):
+    '''
+    Build a local 2d similarity index from PubChem substructure fingerprints,
+    similarity searches on the index need no network
+
+    Parameters
+    ----------
+    cids : list
+        compound ids, their Fingerprint2D are requested in chunks
+        (default: None, fingerprints found in the response cache)
+    chunk_size : int
+        number of cids per request (default: 200)
+    max_workers : int
+        max number of requests in flight (default: 1)
+
+    Returns
+    -------
+    SimilarityIndex
+        index, e.g. index.get_cids_by_2d_similarity(2244, threshold=90), index.top_k(2244, 10)
+    '''
+    try:
+        if cids is None:
+            return SimilarityIndex.from_cache()
+        table = CompoundTable.from_cids(cids, properties=['Fingerprint2D'], chunk_size=chunk_size,
+                                        max_workers=max_workers)
+        return SimilarityIndex.from_table(table)
+    except Exception as e:
+        OfflineCacheMissError.reraise(e)
+        raise Exception(f"Error: {e}")
+
+
+def build_key_index(source: str, path: str, kind: str = 'inchikey', enable: bool = True) -> Dict:
+    '''
+    Build a local memory-mapped InChIKey (or InChI) -> cid index from a
+    tab-separated bulk file, e.g. PubChem CID-InChI-Key.gz
+
+    Parameters
+    ----------
+    source : str
+        bulk file path (.gz supported), one cid per line with its InChI/InChIKey
+    path : str
+        index file path
+    kind : str
+        inchikey, inchi (default: inchikey)
+    enable : bool
+        use the index for lookups (default: True)
+
+    Returns
+    -------
+    dict
+        index kind, path and number of keys
+    '''
+    try:
+        index = InChIKeyIndex.build(source, path, kind=kind)
+        res = {'kind': index.kind, 'path': index.path, 'count': len(index)}
+        index.close()
+        # check
+        if enable:
+            enable_key_index(path)
+        return res
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def enable_key_index(path: str) -> Dict:
+    '''
+    Use a local InChIKey/InChI index (built by build_key_index), get_cids_by_inchikey
+    and get_cids_by_inchi check it before requesting PubChem
+
+    Parameters
+    ----------
+    path : str
+        index file path
+
+    Returns
+    -------
+    dict
+        index kind, path and number of keys
+    '''
+    try:
+        index = InChIKeyIndex.enable(path)
+        return {'kind': index.kind, 'path': index.path, 'count': len(index)}
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def disable_key_index(kind: Optional[str] = None):
+    '''
+    Stop using local InChIKey/InChI indexes (all or of a kind)
+    '''
+    try:
+        InChIKeyIndex.disable(kind)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def build_synonym_index(source: str, path: str, enable: bool = True) -> Dict:
+    '''
+    Build a local name/synonym -> cid index from a tab-separated bulk file,
+    e.g. PubChem CID-Synonym-filtered.gz
+
+    Parameters
+    ----------
+    source : str
+        bulk file path (.gz supported), one cid and synonym per line
+    path : str
+        index directory
+    enable : bool
+        use the index for lookups (default: True)
+
+    Returns
+    -------
+    dict
+        index path, number of names and words
+    '''
+    try:
+        index = SynonymIndex.build(source, path)
+        # check
+        if enable:
+            return enable_synonym_index(path)
+        return {'path': index.path, 'names': len(index.name_hashes), 'words': len(index.token_hashes)}
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def enable_synonym_index(path: str) -> Dict:
+    '''
+    Use a local synonym index (built by build_synonym_index), get_cid_by_name
+    and get_cids_by_name check it before requesting PubChem
+
+    Parameters
+    ----------
+    path : str
+        index directory
+
+    Returns
+    -------
+    dict
+        index path, number of names and words
+    '''
+    try:
+        index = SynonymIndex.enable(path)
+        return {'path': index.path, 'names': len(index.name_hashes), 'words': len(index.token_hashes)}
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def disable_synonym_index():
+    '''
+    Stop using the local synonym index
+    '''
+    try:
+        SynonymIndex.disable()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def build_formula_index(source: Optional[str] = None, path: Optional[str] = None, enable: bool = True):
+    '''
+    Build a local molecular formula -> cid index from a tab-separated bulk
+    file (cid and formula columns, e.g. PubChem CID-Mass.gz) or from the
+    cached property responses. Only an index built from a bulk file holds
+    all compounds, so only it is used by get_cids_by_formula, an index
+    built from the cache is returned for local searches (index.search).
+
+    Parameters
+    ----------
+    source : str
+        bulk file path (.gz supported), None uses the response cache (default: None)
+    path : str
+        index file path (.npz) to save the index (default: None, not saved)
+    enable : bool
+        use the index for formula searches (default: True), bulk file only
+
+    Returns
+    -------
+    FormulaIndex
+        formula index
+    '''
+    try:
+        # check
+        if source is None:
+            index = FormulaIndex.from_cache()
+        else:
+            index = FormulaIndex.from_file(source)
+        # save
+        if path is not None:
+            index.save(path)
+        # check
+        if enable and index.complete:
+            FormulaIndex.enable(index)
+        return index
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def enable_formula_index(path: str):
+    '''
+    Use a saved formula index (built by build_formula_index from a bulk file),
+    get_cids_by_formula checks it before requesting PubChem
+
+    Parameters
+    ----------
+    path : str
+        index file path (.npz)
+
+    Returns
+    -------
+    FormulaIndex
+        formula index
+    '''
+    try:
+        return FormulaIndex.enable(path)
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def disable_formula_index():
+    '''
+    Stop using the local formula index
+    '''
+    try:
+        FormulaIndex.disable()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def enable_property_store(path: Optional[str] = None) -> Dict:
+    '''
+    Enable the local property store (sqlite), properties fetched from PubChem
+    are upserted into it and can be filtered locally with query_properties
+
+    Parameters
+    ----------
+    path : str
+        store file path (default: ~/.pubchemquery/properties.sqlite)
+
+    Returns
+    -------
+    dict
+        store path and number of compounds
+    '''
+    try:
+        store = PropertyStore.enable(path) if path is not None else PropertyStore.enable()
+        return {'path': store.path, 'count': len(store)}
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def disable_property_store():
+    '''
+    Disable the property store (stored properties are kept on disk)
+    '''
+    try:
+        PropertyStore.disable()
+    except Exception as e:
+        raise Exception(f"Error: {e}")
+
+
+def query_properties(filters: Optional[Dict] = None, columns: Optional[List[str]] = None,
+                     order_by: Optional[Union[str, List[str]]] = None, limit: Optional[int] = None,
+                     as_table: bool = False, **kwargs):
+    '''
+    Query the property store (no network), for instance
+    query_properties(MolecularWeight=(100, 200), HBondDonorCount=(None, 2))
+
+    Parameters
+    ----------
+    filters : dict
+        {property: (min, max) | [values] | value}, a range is inclusive and None is open
+    columns : list
+        properties to return (default: None, all)
+    order_by : str or list
+        sort columns, a leading - sorts descending e.g. -XLogP (default: CID)
+    limit : int
+        max number of compounds (default: None, all)
+    as_table : bool
+        return a CompoundTable (default: False, list of records)
+    kwargs : dict
+        filters as keyword arguments
+
+    Returns
+    -------
+    list or CompoundTable
+        property records e.g. [{'CID': 2244, 'MolecularWeight': 180.16, ...}, ...]
+    '''
+    try:
+        store = PropertyStore.current()
+        # check
+        if store is None:
+            raise Exception("property store is not enabled, call enable_property_store() first!")
+        res = store.query(filters, columns=columns,
+                          order_by=order_by, limit=limit, **kwargs)
+        # check
+        if as_table:
+            return CompoundTable.from_records(res, properties=[name for name in columns if name != 'CID'] if columns else None)
+        return res
     except Exception as e:
         raise Exception(f"Error: {e}")
 
@@ -191,6 +842,7 @@ def get_structure_by_cid(cid, file_format='SDF', record_type='3d', save_file=Fal
     try:
         return PubChemAPI.get_sdf_by_cid(cid, file_format=file_format, record_type=record_type, save=save_file, location=file_dir)
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -218,6 +870,7 @@ def get_similar_structures_cids_by_compound_id(val, compound_id='cid', similarit
         res = res if len(res) != 0 else []
         return res
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -246,6 +899,7 @@ def get_structure_by_name(name, file_format='SDF', record_type='3d', save_file=F
     try:
         return PubChemAPI.get_sdf_by_name(name, file_format=file_format, record_type=record_type, save=save_file, location=file_dir)
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -270,6 +924,7 @@ def get_image_by_cid(cid, image_format='2d', image_size='large'):
     try:
         return PubChemAPI.get_structure_image(cid=int(cid), image_format=image_format, image_size=image_size)
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -292,8 +947,14 @@ def get_image_by_name(name, image_format='2d', image_size='large'):
         cid image
     '''
     try:
+        # cid of a name resolved before (no request)
+        cids = PubChemAPI.get_cid_by_name.cached(name, name_type='complete')
+        # check
+        if cids is not None and len(cids) == 1:
+            return PubChemAPI.get_structure_image(cid=int(cids[0]), image_format=image_format, image_size=image_size)
         return PubChemAPI.get_structure_image(name=name, image_format=image_format, image_size=image_size)
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
@@ -318,8 +979,6 @@ def get_image_by_inchi(inchi: str, image_format='2d', image_size='large'):
     try:
         # get cid
         cid = get_cid_by_inchi(inchi)
-        # sleep
-        time.sleep(0.5)
         # check
         if isinstance(cid, list):
             cid = cid[0]
@@ -330,12 +989,17 @@ def get_image_by_inchi(inchi: str, image_format='2d', image_size='large'):
         # get image
         return PubChemAPI.get_structure_image(cid=int(cid), image_format=image_format, image_size=image_size)
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
-def compound(id: str, image_format='2d', image_size='large', similarity_type='fastsimilarity_2d'):
+def compound(id: str, image_format='2d', image_size='large', similarity_type='fastsimilarity_2d',
+             lazy: bool = True, prefetch: Optional[List[str]] = None):
     '''
-    make a compound by cid, then get its information
+    make a compound by cid, then get its information.
+    properties, image, similar cids and sdf are requested on first access (lazy),
+    or up front with prefetch (or lazy=False). A failed group is not requested
+    again, its error is raised on access (see compound.errors).
 
     Parameters
     ----------
@@ -347,6 +1011,11 @@ def compound(id: str, image_format='2d', image_size='large', similarity_type='fa
         small, large, 250x250
     similarity_type : str
         fastsimilarity_2d, fastsimilarity_3d (default: fastsimilarity_2d)
+    lazy : bool
+        request each group on first access (default: True), if False,
+        properties, image and similar cids are requested up front
+    prefetch : list
+        groups requested up front, properties, image, similar, sdf (default: None)
 
     Returns
     -------
@@ -366,69 +1035,32 @@ def compound(id: str, image_format='2d', image_size='large', similarity_type='fa
         if pattern_res is False:
             name = str(id).strip()
         else:
-            cid = str(id)
+            cid = str(id).strip()
 
-        # compound obj
-        if cid != 0:
-            # check
-            cid = str(cid).strip()
-            # check compound name
-            compound_obj = PubChemAPI(cid, '')
-            # update properties
-            compound_obj.update_properties()
-            # sleep
-            time.sleep(0.5)
-            # update img
-            img = PubChemAPI.get_structure_image(
-                cid=int(cid), image_format=image_format, image_size=image_size)
-            # update img prop
-            compound_obj.image = img
-            time.sleep(0.5)
-            # search for similarities
-            similar_cids = PubChemAPI.get_similar_cids_by_compound_id(
-                cid, similarity_type=similarity_type)
-            # update
-            compound_obj.similar_structure_cids = similar_cids
-            # return
-            return compound_obj
-        elif name != '':
-            # check
-            name = str(name).strip()
+        # check
+        if cid == 0:
+            if name == '':
+                raise Exception(f"{cid}/{name} format is not valid!")
             # get cid
             _cid = PubChemAPI.get_cid_by_name(name, name_type='complete')
             # check
-            if len(_cid) == 1:
-                # update
-                cid = str(_cid[0]).strip()
-                # check compound name
-                compound_obj = PubChemAPI(cid, name)
-                # sleep
-                time.sleep(0.5)
-                # check
-                if compound_obj:
-                    # update properties
-                    compound_obj.update_properties()
-                # sleep
-                time.sleep(0.5)
-                # image
-                img = PubChemAPI.get_structure_image(
-                    name=name, image_format=image_format, image_size=image_size)
-                # update img
-                compound_obj.image = img
-                # sleep
-                time.sleep(0.5)
-                # search for similarities
-                similar_cids = PubChemAPI.get_similar_cids_by_compound_id(
-                    cid, similarity_type=similarity_type)
-                # update
-                compound_obj.similar_structure_cids = similar_cids
-                # return
-                return compound_obj
-            else:
+            if _cid is None or len(_cid) != 1:
                 raise Exception(f"compound {name} not found!")
-        else:
-            raise Exception(f"{cid}/{name} format is not valid!")
+            cid = str(_cid[0]).strip()
+
+        # compound obj
+        compound_obj = PubChemAPI(cid, name, lazy=True, image_format=image_format,
+                                  image_size=image_size, similarity_type=similarity_type)
+
+        # prefetch
+        if prefetch:
+            compound_obj.prefetch(*prefetch)
+        elif not lazy:
+            compound_obj.prefetch('properties', 'image', 'similar')
+
+        return compound_obj
     except Exception as e:
+        OfflineCacheMissError.reraise(e)
         raise Exception(f"Error: {e}")
 
 
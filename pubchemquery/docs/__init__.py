@@ -1,2 +1,22 @@
 from .api import PubChemAPI
-from .config import __version__, __author__
+from .session import SessionManager
+from .async_api import AsyncPubChemAPI, AsyncSessionManager
+from .ratelimit import RateLimiter, TokenBucket
+from .resolver import IdentifierResolver
+from .listkey import ListKeyPoller
+from .cache import ResponseCache, OfflineCacheMissError
+from .memo import Memo, LRUCache
+from .negative import NegativeCache, BloomFilter
+from .singleflight import SingleFlight, AsyncSingleFlight
+from .warmup import CacheWarmer
+from .record import CompoundRecord, PropertyView
+from .table import CompoundTable
+from .fingerprint import Fingerprint
+from .similarity import SimilarityIndex
+from .keyindex import InChIKeyIndex
+from .synonym import SynonymIndex
+from .formula import Formula, FormulaIndex
+from .store import PropertyStore
+from .sdfstore import SDFStore
+from .util import HttpResponse
+from .config import __version__, __author__, PROPERTY_NAMES
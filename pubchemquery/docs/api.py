@@ -2,17 +2,31 @@
 # ----
 
 # import packages/modules
-import requests
 import os
+from typing import Iterator
 import pandas as pd
 import io
 import time
+import threading
 from PIL import Image
 
 # local
-from .config import CID_FILE_PREFIX
+from .config import CID_FILE_PREFIX, CID_CHUNK_SIZE, URL_MAX_LENGTH, LISTKEY_POLL_INTERVAL, LISTKEY_TIMEOUT, \
+    LISTKEY_PAGE_SIZE, PROPERTY_NAMES
 from .util import UtilityAPI
 from .util import CoreUtility
+from .cache import OfflineCacheMissError
+from .session import SessionManager
+from .listkey import ListKeyPoller
+from .memo import Memo
+from .record import CompoundRecord, PropertyView
+from .fingerprint import Fingerprint
+from .negative import NegativeCache
+from .keyindex import InChIKeyIndex
+from .synonym import SynonymIndex
+from .formula import FormulaIndex
+from .store import PropertyStore
+from .sdfstore import SDFStore
 
 
 class PubChemAPI:
@@ -20,63 +34,147 @@ class PubChemAPI:
     load data from https://pubchem.ncbi.nlm.nih.gov/
     based on PUG REST
     '''
-    # compound id
-    _compound_cid = 0
-    _compound_name = ''
-
-    # compound properties
-    prop = {
-        "MolecularFormula": None,
-        "MolecularWeight": None,
-        "CanonicalSMILES": None,
-        "IsomericSMILES": None,
-        "InChI": None,
-        "InChIKey": None,
-        "IUPACName": None,
-        "Title": None,
-        "XLogP": None,
-        "ExactMass": None,
-        "MonoisotopicMass": None,
-        "TPSA": None,
-        "Complexity": None,
-        "Charge": None,
-        "HBondDonorCount": None,
-        "HBondAcceptorCount": None,
-        "RotatableBondCount": None,
-        "HeavyAtomCount": None,
-        "IsotopeAtomCount": None,
-        "AtomStereoCount": None,
-        "DefinedAtomStereoCount": None,
-        "UndefinedAtomStereoCount": None,
-        "BondStereoCount": None,
-        "DefinedBondStereoCount": None,
-        "UndefinedBondStereoCount": None,
-        "CovalentUnitCount": None,
-        "Volume3D": None,
-        "XStericQuadrupole3D": None,
-        "YStericQuadrupole3D": None,
-        "ZStericQuadrupole3D": None,
-        "FeatureCount3D": None,
-        "FeatureAcceptorCount3D": None,
-        "FeatureDonorCount3D": None,
-        "FeatureAnionCount3D": None,
-        "FeatureCationCount3D": None,
-        "FeatureRingCount3D": None,
-        "FeatureHydrophobeCount3D": None,
-        "ConformerModelRMSD3D": None,
-        "EffectiveRotorCount3D": None,
-        "ConformerCount3D": None,
-        "Fingerprint2D": None
-    }
+    # per-instance state
+    __slots__ = ('_record', '_loaded', '_options', '_errors', '_locks')
 
-    # image
-    _image = None
-    # similarity
-    _similar_structure_cids = []
+    # lazy loaded groups
+    groups = ('properties', 'image', 'similar', 'sdf')
 
-    def __init__(self, compound_cid, compound_name):
-        self._compound_cid = compound_cid
-        self._compound_name = compound_name
+    def __init__(self, compound_cid, compound_name, lazy=False, image_format='2d', image_size='large',
+                 similarity_type='fastsimilarity_2d', record_type='3d'):
+        '''
+        Parameters
+        ----------
+        compound_cid : str or int
+            compound id
+        compound_name : str
+            compound name
+        lazy : bool
+            each group (properties, image, similar, sdf) is requested on first access,
+            otherwise properties, image and similar are requested now and sdf on first
+            access (default: False)
+        image_format : str
+            3d, 2d (default: 2d)
+        image_size : str
+            small, large, 250x250 (default: large)
+        similarity_type : str
+            fastsimilarity_2d, fastsimilarity_3d (default: fastsimilarity_2d)
+        record_type : str
+            sdf record type 3d, 2d (default: 3d)
+        '''
+        self._record = CompoundRecord(compound_cid, compound_name)
+        # loaded groups (set when a group is requested or filled)
+        self._loaded = set()
+        self._options = (image_format, image_size, similarity_type, record_type)
+        # failed groups (group -> error) and one lock per group
+        self._errors = {}
+        self._locks = {group: threading.Lock() for group in self.groups}
+
+        # eager object, errors are raised on access
+        if not lazy:
+            CoreUtility.map_concurrent(
+                lambda i, group: self._fill(group), ['properties', 'image', 'similar'], max_workers=3)
+
+    def _ensure(self, group: str):
+        '''
+        Request a group on first access, a failed request is recorded, its
+        error is raised and the group is requested again on the next access
+        '''
+        # check
+        if group not in self._locks:
+            raise Exception(f"group {group} is not valid!")
+        self._fill(group)
+        # check
+        if group in self._errors:
+            raise Exception(f"Error: {self._errors[group]}")
+
+    def _fill(self, group: str):
+        '''
+        Request a group once at a time (per group lock) if it is not loaded
+        '''
+        if group not in self._loaded:
+            with self._locks[group]:
+                if group not in self._loaded:
+                    self._load(group)
+
+    def _load(self, group: str):
+        '''
+        Request a group, it is marked as loaded on success, otherwise its
+        error is recorded (the api functions print errors and return None)
+        '''
+        image_format, image_size, similarity_type, record_type = self._options
+        _cid = str(self._record.cid).strip()
+
+        try:
+            if group == 'properties':
+                # check
+                if self.update_properties() is not True:
+                    raise Exception(f"properties of compound {_cid} could not be loaded!")
+            elif group == 'image':
+                img = PubChemAPI.get_structure_image(
+                    cid=int(_cid), image_format=image_format, image_size=image_size)
+                # check
+                if img is None:
+                    raise Exception(f"image of compound {_cid} could not be loaded!")
+                self._record.image = img
+            elif group == 'similar':
+                similar_cids = PubChemAPI.get_similar_cids_by_compound_id(
+                    _cid, similarity_type=similarity_type)
+                # check
+                if similar_cids is None:
+                    raise Exception(f"similar cids of compound {_cid} could not be loaded!")
+                self._record.similar_structure_cids = [*similar_cids]
+            elif group == 'sdf':
+                sdf = PubChemAPI.get_sdf_by_cid(_cid, record_type=record_type)
+                # check
+                if sdf is None:
+                    raise Exception(f"sdf of compound {_cid} could not be loaded!")
+                # no record of this type
+                self._record.sdf = sdf if sdf != "Not Found!" else None
+        except Exception as e:
+            # a cache miss is not recorded, the group is requested again (e.g. back online)
+            OfflineCacheMissError.reraise(e)
+            self._errors[group] = e
+            return
+        self._errors.pop(group, None)
+        self._loaded.add(group)
+
+    def prefetch(self, *groups, max_workers=4):
+        '''
+        Request groups up front (concurrently)
+
+        Parameters
+        ----------
+        groups : str
+            properties, image, similar, sdf (default: properties, image, similar)
+        max_workers : int
+            max number of requests in flight (default: 4)
+
+        Returns
+        -------
+        PubChemAPI
+            compound object
+        '''
+        # set
+        _groups = list(groups) if len(groups) > 0 else [
+            'properties', 'image', 'similar']
+        for group in _groups:
+            if group not in self.groups:
+                raise Exception(f"group {group} is not valid!")
+        _groups = [group for group in _groups if group not in self._loaded]
+
+        CoreUtility.map_concurrent(
+            lambda i, group: self._ensure(group), _groups, max_workers=max_workers)
+        return self
+
+    @property
+    def loaded(self) -> tuple:
+        return tuple(group for group in self.groups if group in self._loaded)
+
+    @property
+    def errors(self) -> dict:
+        # failed groups (group -> error)
+        return dict(self._errors)
 
     identity_mode = {
         0: 'same_connectivity',
@@ -89,204 +187,279 @@ class PubChemAPI:
     }
 
     # property
+    @property
+    def record(self) -> CompoundRecord:
+        return self._record
+
+    @property
+    def prop(self) -> PropertyView:
+        # live view of the properties, writes go to the record (prop.copy() for a dict)
+        self._ensure('properties')
+        return PropertyView(self._record)
+
     @property
     def compound_cid(self):
-        return self._compound_cid
+        return self._record.cid
 
     @compound_cid.setter
     def compound_cid(self, value):
-        self._compound_cid = value
+        self._record.cid = value
 
     @property
     def compound_name(self):
-        return self._compound_name
+        # the name is replaced by IUPACName once properties are loaded (no request)
+        return self._record.name
 
     @compound_name.setter
     def compound_name(self, value):
-        self._compound_name = value
+        self._record.name = value
 
     @property
     def MolecularFormula(self):
-        return self.prop["MolecularFormula"]
+        self._ensure('properties')
+        return self._record.MolecularFormula
 
     @property
     def MolecularWeight(self):
-        return self.prop["MolecularWeight"]
+        self._ensure('properties')
+        return self._record.MolecularWeight
 
     @property
     def CanonicalSMILES(self):
-        return self.prop["CanonicalSMILES"]
+        self._ensure('properties')
+        return self._record.CanonicalSMILES
 
     @property
     def IsomericSMILES(self):
-        return self.prop["IsomericSMILES"]
+        self._ensure('properties')
+        return self._record.IsomericSMILES
 
     @property
     def InChI(self):
-        return self.prop["InChI"]
+        self._ensure('properties')
+        return self._record.InChI
 
     @property
     def InChIKey(self):
-        return self.prop["InChIKey"]
+        self._ensure('properties')
+        return self._record.InChIKey
 
     @property
     def IUPACName(self):
-        return self.prop["IUPACName"]
+        self._ensure('properties')
+        return self._record.IUPACName
 
     @property
     def Title(self):
-        return self.prop["Title"]
+        self._ensure('properties')
+        return self._record.Title
 
     @property
     def XLogP(self):
-        return self.prop["XLogP"]
+        self._ensure('properties')
+        return self._record.XLogP
 
     @property
     def ExactMass(self):
-        return self.prop["ExactMass"]
+        self._ensure('properties')
+        return self._record.ExactMass
 
     @property
     def MonoisotopicMass(self):
-        return self.prop["MonoisotopicMass"]
+        self._ensure('properties')
+        return self._record.MonoisotopicMass
 
     @property
     def TPSA(self):
-        return self.prop["TPSA"]
+        self._ensure('properties')
+        return self._record.TPSA
 
     @property
     def Complexity(self):
-        return self.prop["Complexity"]
+        self._ensure('properties')
+        return self._record.Complexity
 
     @property
     def Charge(self):
-        return self.prop["Charge"]
+        self._ensure('properties')
+        return self._record.Charge
 
     @property
     def HBondDonorCount(self):
-        return self.prop["HBondDonorCount"]
+        self._ensure('properties')
+        return self._record.HBondDonorCount
 
     @property
     def HBondAcceptorCount(self):
-        return self.prop["HBondAcceptorCount"]
+        self._ensure('properties')
+        return self._record.HBondAcceptorCount
 
     @property
     def RotatableBondCount(self):
-        return self.prop["RotatableBondCount"]
+        self._ensure('properties')
+        return self._record.RotatableBondCount
 
     @property
     def HeavyAtomCount(self):
-        return self.prop["HeavyAtomCount"]
+        self._ensure('properties')
+        return self._record.HeavyAtomCount
 
     @property
     def IsotopeAtomCount(self):
-        return self.prop["IsotopeAtomCount"]
+        self._ensure('properties')
+        return self._record.IsotopeAtomCount
 
     @property
     def AtomStereoCount(self):
-        return self.prop["AtomStereoCount"]
+        self._ensure('properties')
+        return self._record.AtomStereoCount
 
     @property
     def DefinedAtomStereoCount(self):
-        return self.prop["DefinedAtomStereoCount"]
+        self._ensure('properties')
+        return self._record.DefinedAtomStereoCount
 
     @property
     def UndefinedAtomStereoCount(self):
-        return self.prop["UndefinedAtomStereoCount"]
+        self._ensure('properties')
+        return self._record.UndefinedAtomStereoCount
 
     @property
     def BondStereoCount(self):
-        return self.prop["BondStereoCount"]
+        self._ensure('properties')
+        return self._record.BondStereoCount
 
     @property
     def DefinedBondStereoCount(self):
-        return self.prop["DefinedBondStereoCount"]
+        self._ensure('properties')
+        return self._record.DefinedBondStereoCount
 
     @property
     def UndefinedBondStereoCount(self):
-        return self.prop["UndefinedBondStereoCount"]
+        self._ensure('properties')
+        return self._record.UndefinedBondStereoCount
 
     @property
     def CovalentUnitCount(self):
-        return self.prop["CovalentUnitCount"]
+        self._ensure('properties')
+        return self._record.CovalentUnitCount
 
     @property
     def Volume3D(self):
-        return self.prop["Volume3D"]
+        self._ensure('properties')
+        return self._record.Volume3D
 
     @property
     def XStericQuadrupole3D(self):
-        return self.prop["XStericQuadrupole3D"]
+        self._ensure('properties')
+        return self._record.XStericQuadrupole3D
 
     @property
     def YStericQuadrupole3D(self):
-        return self.prop["YStericQuadrupole3D"]
+        self._ensure('properties')
+        return self._record.YStericQuadrupole3D
 
     @property
     def ZStericQuadrupole3D(self):
-        return self.prop["ZStericQuadrupole3D"]
+        self._ensure('properties')
+        return self._record.ZStericQuadrupole3D
 
     @property
     def FeatureCount3D(self):
-        return self.prop["FeatureCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureCount3D
 
     @property
     def FeatureAcceptorCount3D(self):
-        return self.prop["FeatureAcceptorCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureAcceptorCount3D
 
     @property
     def FeatureDonorCount3D(self):
-        return self.prop["FeatureDonorCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureDonorCount3D
 
     @property
     def FeatureAnionCount3D(self):
-        return self.prop["FeatureAnionCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureAnionCount3D
 
     @property
     def FeatureCationCount3D(self):
-        return self.prop["FeatureCationCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureCationCount3D
 
     @property
     def FeatureRingCount3D(self):
-        return self.prop["FeatureRingCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureRingCount3D
 
     @property
     def FeatureHydrophobeCount3D(self):
-        return self.prop["FeatureHydrophobeCount3D"]
+        self._ensure('properties')
+        return self._record.FeatureHydrophobeCount3D
 
     @property
     def ConformerModelRMSD3D(self):
-        return self.prop["ConformerModelRMSD3D"]
+        self._ensure('properties')
+        return self._record.ConformerModelRMSD3D
 
     @property
     def EffectiveRotorCount3D(self):
-        return self.prop["EffectiveRotorCount3D"]
+        self._ensure('properties')
+        return self._record.EffectiveRotorCount3D
 
     @property
     def ConformerCount3D(self):
-        return self.prop["ConformerCount3D"]
+        self._ensure('properties')
+        return self._record.ConformerCount3D
 
     @property
     def Fingerprint2D(self):
-        return self.prop["Fingerprint2D"]
+        self._ensure('properties')
+        return self._record.Fingerprint2D
+
+    @property
+    def fingerprint(self):
+        # packed Fingerprint2D bits, uint8 (111,)
+        fp = self.Fingerprint2D
+        return Fingerprint.decode(fp) if fp is not None else None
 
     # image property
     @property
     def image(self):
-        return self._image
+        self._ensure('image')
+        return self._record.image
 
     @image.setter
     def image(self, value):
-        self._image = value
+        self._record.image = value
+        self._loaded.add('image')
+        self._errors.pop('image', None)
 
     # similar structure property
     @property
     def similar_structure_cids(self):
-        return self._similar_structure_cids
+        self._ensure('similar')
+        return self._record.similar_structure_cids
 
     @similar_structure_cids.setter
     def similar_structure_cids(self, value):
-        self._similar_structure_cids = []
-        self._similar_structure_cids = [*value]
+        self._record.similar_structure_cids = [*value] if value is not None else []
+        self._loaded.add('similar')
+        self._errors.pop('similar', None)
+
+    # sdf property
+    @property
+    def sdf(self):
+        self._ensure('sdf')
+        return self._record.sdf
+
+    @sdf.setter
+    def sdf(self, value):
+        self._record.sdf = value
+        self._loaded.add('sdf')
+        self._errors.pop('sdf', None)
 
     def prop_df(self) -> pd.DataFrame:
         '''
@@ -336,7 +509,7 @@ class PubChemAPI:
                 _properties = 'IUPACName'
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/property/{_properties}/{_format_type}'
 
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # check
@@ -353,8 +526,25 @@ class PubChemAPI:
                     print('request is refused, try again.')
                     return _compound_name
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
+    def set_properties(self, data: dict):
+        '''
+        Set compound properties from a PropertyTable record
+
+        Parameters
+        ----------
+        data : dict
+            property record e.g. {'CID': 2244, 'MolecularWeight': '180.16', ...}
+        '''
+        self._record.update(data)
+        self._loaded.add('properties')
+        self._errors.pop('properties', None)
+        # IUPACName
+        if 'IUPACName' in data:
+            self.compound_name = data['IUPACName']
+
     def update_properties(self, properties=[], format_type="json"):
         '''
         Display compound structure as an image
@@ -417,39 +607,26 @@ class PubChemAPI:
         try:
             # check
             if len(properties) == 0:
-                properties = [item for item in self.prop.keys()]
+                properties = list(PROPERTY_NAMES)
             # cid
             _cid = str(self.compound_cid).strip()
-            # format type
-            _format_type = str(format_type).strip().upper()
             # check
             if len(_cid) > 0:
-                _properties = ",".join(properties)
-                _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/property/{_properties}/{_format_type}'
-
-                res = requests.get(_url)
-                # check
-                reqResponse = res.status_code
+                # memoized
+                resContent = PubChemAPI.get_properties_by_cid(
+                    _cid, properties=properties, format_type=format_type)
                 # check
-                if reqResponse == 200:
-                    resContent = res.json()
-                    # resContent = resContent.splitlines()
-
+                if resContent is not None:
                     dataContent = resContent['PropertyTable']['Properties'][0]
 
                     # Update prop
-                    for key, value in dataContent.items():
-                        if key in self.prop:
-                            self.prop[key] = value
-                            # IUPACName
-                            if key == 'IUPACName':
-                                self.compound_name = value
+                    self.set_properties(dataContent)
 
                     return True
                 else:
-                    print('request is refused, try again.')
                     return False
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @staticmethod
@@ -493,7 +670,7 @@ class PubChemAPI:
             _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/{_file_format}?record_type={record_type}'
 
             if len(str(cid)) > 0:
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # print(reqResponse)
@@ -526,10 +703,11 @@ class PubChemAPI:
                     raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @staticmethod
-    def get_mat_by_cids(cids, file_format='JSON', record_type='3d', read=False, save=False, location=''):
+    def get_mat_by_cids(cids, file_format='JSON', record_type='3d', read=False, save=False, location='', max_workers=1):
         '''
         Query request by PUBCHEM_COMPOUND_CID
 
@@ -548,6 +726,9 @@ class PubChemAPI:
             the sdf file is saved
         location : str
             directory path, if it is empty, the current directory is selected.
+        max_workers : int
+            max number of requests in flight (default: 1, sequential),
+            requests still pass through the rate limiter
 
         Returns
         -------
@@ -571,10 +752,6 @@ class PubChemAPI:
 
             if len(cids) == 0:
                 raise Exception('cid list is empty.')
-            # size
-            cidsSize = len(cids)
-            # file list
-            fileList = []
             # mat list
             matList = []
             # location
@@ -584,18 +761,14 @@ class PubChemAPI:
             if not isLocationExist:
                 raise Exception("file location does not exist.")
 
-            for i in range(cidsSize):
-
-                # manage request time
-                time.sleep(0.5)
-
-                _cid = str(cids[i]).strip()
+            def _fetch(i, cid):
+                _cid = str(cid).strip()
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/{_file_format}?record_type={record_type}'
 
                 print(f"cid no. {i}: {_cid} at: {time.time()}")
 
                 if len(_cid) > 0:
-                    res = requests.get(_url)
+                    res = SessionManager.get(_url)
                     # check
                     reqResponse = res.status_code
                     # print(reqResponse)
@@ -622,10 +795,14 @@ class PubChemAPI:
                                 raise Exception('error in saving the file')
 
                         # res
-                        fileList.append(fileContent)
+                        return fileContent
                     else:
                         raise Exception(
-                            'request for {_cid} is refused, try again.')
+                            f'request for {_cid} is refused, try again.')
+
+            # fetch (files are saved as results arrive)
+            fileList = [item for item in CoreUtility.map_concurrent(
+                _fetch, cids, max_workers=max_workers) if item is not None]
 
             # set time
             t2 = time.time()
@@ -638,6 +815,7 @@ class PubChemAPI:
                 return fileList
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @staticmethod
@@ -679,7 +857,7 @@ class PubChemAPI:
             _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/{file_format}?record_type={record_type}'
 
             if len(str(cid)) > 0:
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # print(reqResponse)
@@ -711,10 +889,11 @@ class PubChemAPI:
                     raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @staticmethod
-    def get_sdf_by_cids(cids, record_type='3d', read=False, save=False, location=''):
+    def get_sdf_by_cids(cids, record_type='3d', read=False, save=False, location='', max_workers=1, chunk_size=None, store=None):
         '''
         Query request by PUBCHEM_COMPOUND_CID
 
@@ -730,65 +909,151 @@ class PubChemAPI:
         save : bool
             the sdf file is saved
         location : str
+        max_workers : int
+            max number of requests in flight (default: 1, sequential),
+            requests still pass through the rate limiter
+        chunk_size : int
+            if set, cids are requested in chunks as multi-record SDF files which
+            are split into records, cids missing from a chunk response (e.g. no
+            3d conformer) are requested one by one (default: None, one request per cid)
+        store : str or SDFStore
+            sdf store (or its file path) of one record type, stored records are
+            read from it and fetched records are appended to it (default: None)
 
         Returns
         -------
         bool
             file content
         '''
+        # sdf store opened here
+        _store = None
         try:
             # set time
             t1 = time.time()
 
             if len(cids) == 0:
                 raise Exception('cid list is empty.')
-            # size
-            cidsSize = len(cids)
-            # sdf list
-            sdfList = []
             # mat list
             matList = []
             # location
             _location = location.strip()
             isLocationExist = os.path.exists(_location)
-            # check
-            if not isLocationExist:
+            # check (files are only written when save is True)
+            if save is True and not isLocationExist:
                 raise Exception("file location does not exist.")
+            # sdf store
+            _store = SDFStore(store) if isinstance(store, str) else store
 
-            for i in range(cidsSize):
-                # manage request time
-                time.sleep(0.5)
+            def _save(_cid, sdfContent):
+                # save a string file
+                fileName = 'cid_'+str(_cid)+'.sdf'
+                fileLoc = os.path.join(_location, fileName)
 
-                _cid = str(cids[i]).strip()
+                file = open(fileLoc, 'w')
+                file.write(sdfContent)
+                file.close()
+                print(
+                    f"SDF file is successfully created and saved in `{fileLoc}`")
+
+            def _fetch(i, cid, missing_ok=False):
+                _cid = str(cid).strip()
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/SDF?record_type={record_type}'
 
                 print(f"cid no. {i}: {_cid} at: {time.time()}")
 
                 if len(_cid) > 0:
-                    res = requests.get(_url)
+                    # stored record
+                    if _store is not None and _cid in _store:
+                        sdfContent = _store.get_text(_cid)
+                        if save is True:
+                            _save(_cid, sdfContent)
+                        return sdfContent
+
+                    res = SessionManager.get(_url)
                     # check
                     reqResponse = res.status_code
                     # print(reqResponse)
                     if reqResponse == 200:
                         # content
                         sdfContent = res.text
-                        # save a string file
-                        fileName = 'cid_'+str(_cid)+'.sdf'
-                        fileLoc = os.path.join(_location, fileName)
-
+                        # store
+                        if _store is not None:
+                            _store.append(_cid, sdfContent)
                         # check
                         if save is True:
-
-                            file = open(fileLoc, 'w')
-                            file.write(sdfContent)
-                            file.close()
-                            print(
-                                f"SDF file is successfully created and saved in `{fileLoc}`")
+                            _save(_cid, sdfContent)
                         # res
-                        sdfList.append(sdfContent)
+                        return sdfContent
+                    elif reqResponse == 404 and missing_ok:
+                        print(
+                            f"SDF file of compound id `{_cid}` is not found.")
+                        return None
                     else:
                         raise Exception(
-                            'request for {_cid} is refused, try again.')
+                            f'request for {_cid} is refused, try again.')
+
+            def _fetch_chunk(i, chunk):
+                # stored records
+                stored = set()
+                if _store is not None:
+                    stored = {item for item in chunk if item in _store}
+                    if len(stored) == len(chunk):
+                        return [_fetch(j, item) for j, item in enumerate(chunk)]
+                _cid = ",".join(item for item in chunk if item not in stored)
+                _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/SDF?record_type={record_type}'
+
+                print(f"chunk no. {i}: {len(chunk)} cids at: {time.time()}")
+
+                # check url length
+                if len(_url) <= URL_MAX_LENGTH:
+                    res = SessionManager.get(_url)
+                else:
+                    _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/SDF?record_type={record_type}'
+                    res = SessionManager.post(_url, data={'cid': _cid})
+                # check
+                reqResponse = res.status_code
+                if reqResponse == 200:
+                    records = UtilityAPI.split_sdf_records(res.text)
+                elif reqResponse == 404:
+                    records = {}
+                else:
+                    raise Exception(
+                        f'request for chunk {i} is refused, try again.')
+
+                # records (missing ones are requested one by one)
+                sdfContents = []
+                for j, item in enumerate(chunk):
+                    if item in stored:
+                        sdfContent = _fetch(j, item)
+                    elif item in records:
+                        sdfContent = records[item]
+                        # store
+                        if _store is not None:
+                            _store.append(item, sdfContent)
+                        # check
+                        if save is True:
+                            _save(item, sdfContent)
+                    else:
+                        sdfContent = _fetch(j, item, missing_ok=True)
+                    sdfContents.append(sdfContent)
+
+                return sdfContents
+
+            # fetch (files are saved as results arrive)
+            if chunk_size is None:
+                sdfList = [item for item in CoreUtility.map_concurrent(
+                    _fetch, cids, max_workers=max_workers) if item is not None]
+            else:
+                # chunks
+                _cids = [str(cid).strip()
+                         for cid in cids if len(str(cid).strip()) > 0]
+                _chunk_size = max(1, int(chunk_size))
+                chunks = [_cids[i:i+_chunk_size]
+                          for i in range(0, len(_cids), _chunk_size)]
+                results = CoreUtility.map_concurrent(
+                    _fetch_chunk, chunks, max_workers=max_workers)
+                sdfList = [item for chunk in results for item in chunk
+                           if item is not None]
 
             # set time
             t2 = time.time()
@@ -801,7 +1066,12 @@ class PubChemAPI:
                 return sdfList
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
+        finally:
+            # close a sdf store opened from its path
+            if isinstance(store, str) and _store is not None:
+                _store.close()
 
     @staticmethod
     def get_sdf_by_name(name, file_format='SDF', record_type='3d', save=False, location=''):
@@ -837,7 +1107,7 @@ class PubChemAPI:
 
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{_name}/{file_format}?record_type={record_type}'
 
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # print(reqResponse)
@@ -867,9 +1137,11 @@ class PubChemAPI:
                     raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
+    @Memo.memoize('identifier', lambda name, name_type='word': (' '.join(str(name).split()).casefold(), str(name_type)))
     def get_cid_by_name(name, name_type='word') -> list[str]:
         '''
         Get cid by searching name
@@ -890,7 +1162,23 @@ class PubChemAPI:
             _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{name}/cids/TXT?name_type={name_type}'
 
             if len(str(name)) > 0:
-                res = requests.get(_url)
+                # local index
+                index = SynonymIndex.current()
+                if index is not None:
+                    _cids = index.lookup(name, name_type=name_type)
+                    # an ambiguous complete name is ranked by PubChem
+                    if len(_cids) == 1 or (len(_cids) > 1 and name_type == 'word'):
+                        return _cids
+
+                # known not found
+                negative = NegativeCache.current()
+                if negative is not None:
+                    _key = NegativeCache.make_key(
+                        'name', name_type, ' '.join(str(name).split()).casefold())
+                    if negative.contains(_key):
+                        return []
+
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # print(reqResponse)
@@ -903,12 +1191,16 @@ class PubChemAPI:
 
                     return resContent
                 elif reqResponse == 404:
+                    if negative is not None:
+                        negative.add(_key)
                     return []
                 else:
+                    # not memoized
                     print('request is refused, try again.')
-                    return []
+                    return None
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -930,7 +1222,7 @@ class PubChemAPI:
             _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{name}/sids/TXT'
 
             if len(str(name)) > 0:
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # print(reqResponse)
@@ -943,6 +1235,7 @@ class PubChemAPI:
                     raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -980,7 +1273,7 @@ class PubChemAPI:
                 _cid = cid.strip()
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/PNG?record_type={_record_type}'
 
-            res = requests.get(_url)
+            res = SessionManager.get(_url)
             # check
             reqResponse = res.status_code
             # print(reqResponse)
@@ -994,6 +1287,7 @@ class PubChemAPI:
                 raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -1031,7 +1325,7 @@ class PubChemAPI:
                 _cid = str(cid).strip()
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/PNG?record_type={_image_format}&image_size={image_size}'
 
-            res = requests.get(_url)
+            res = SessionManager.get(_url)
             # check
             reqResponse = res.status_code
             # print(reqResponse)
@@ -1045,9 +1339,11 @@ class PubChemAPI:
             else:
                 raise Exception('request is refused, try again.')
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
+    @Memo.memoize('property', lambda cid, properties=[], format_type='json': (str(cid).strip(), tuple(properties), str(format_type).strip().upper()))
     def get_properties_by_cid(cid, properties=[], format_type="json"):
         '''
         Display compound structure as an image
@@ -1117,7 +1413,7 @@ class PubChemAPI:
                 _properties = ",".join(properties)
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/property/{_properties}/{_format_type}'
 
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 # check
@@ -1125,14 +1421,94 @@ class PubChemAPI:
                     resContent = res.json()
                     # resContent = resContent.splitlines()
 
+                    # property store
+                    if _format_type == 'JSON':
+                        PropertyStore.save_fetched(resContent)
+
                     return resContent
                 else:
                     raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @staticmethod
+    def get_properties_by_cids(cids, properties=[], chunk_size=CID_CHUNK_SIZE, format_type="json", max_workers=1):
+        '''
+        Get properties of many compounds, cids are sent in chunks
+        (comma-separated in the url, or as a POST body when the url is too long)
+
+        Parameters
+        ----------
+        cids : list
+            list of compound id
+        properties : list
+            list of properties to retrieve (see get_properties_by_cid),
+            if it is empty, all properties are retrieved.
+        chunk_size : int
+            number of cids per request (default: 200)
+        format_type : str
+            json
+        max_workers : int
+            max number of requests in flight (default: 1, sequential)
+
+        Returns
+        -------
+        dict
+            merged json format properties {'PropertyTable': {'Properties': [...]}}
+        '''
+        try:
+            # check
+            if len(properties) == 0:
+                properties = list(PROPERTY_NAMES)
+            # cids
+            _cids = [str(cid).strip() for cid in cids if len(str(cid).strip()) > 0]
+            if len(_cids) == 0:
+                raise Exception('cid list is empty.')
+            # format type
+            _format_type = str(format_type).strip().upper()
+            _properties = ",".join(properties)
+            # chunks
+            _chunk_size = max(1, int(chunk_size))
+            chunks = [_cids[i:i+_chunk_size]
+                      for i in range(0, len(_cids), _chunk_size)]
+
+            def _fetch(i, chunk):
+                _cid = ",".join(chunk)
+                _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/property/{_properties}/{_format_type}'
+                # check url length
+                if len(_url) <= URL_MAX_LENGTH:
+                    res = SessionManager.get(_url)
+                else:
+                    _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/property/{_properties}/{_format_type}'
+                    res = SessionManager.post(_url, data={'cid': _cid})
+                # check
+                reqResponse = res.status_code
+                if reqResponse == 200:
+                    return res.json()['PropertyTable']['Properties']
+                elif reqResponse == 404:
+                    return []
+                else:
+                    raise Exception(
+                        f'request for chunk {i} is refused, try again.')
+
+            # merge
+            results = CoreUtility.map_concurrent(
+                _fetch, chunks, max_workers=max_workers)
+            dataContent = [item for chunk in results for item in chunk]
+
+            # property store
+            PropertyStore.save_fetched(dataContent)
+
+            return {'PropertyTable': {'Properties': dataContent}}
+
+        except Exception as e:
+            OfflineCacheMissError.reraise(e)
+            print(e)
+
+    @staticmethod
+    @Memo.memoize('identifier', lambda formula: str(formula).strip())
     def get_cids_by_formula(formula) -> list:
         '''
         Search for cids according to a formula
@@ -1151,9 +1527,16 @@ class PubChemAPI:
 
             _formula = formula.strip()
             if len(_formula) > 0:
+                # local index
+                index = FormulaIndex.current()
+                if index is not None:
+                    _cids = index.search(_formula)
+                    if len(_cids) > 0:
+                        return _cids
+
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/{formula}/cids/TXT'
 
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1174,9 +1557,11 @@ class PubChemAPI:
                 return []
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @staticmethod
+    @Memo.memoize('identifier', lambda inchi: ''.join(str(inchi).split()))
     def get_cids_by_inchi(inchi: str) -> list:
         '''
         Search for cids according to a formula
@@ -1195,11 +1580,25 @@ class PubChemAPI:
 
             _inchi = str(inchi).strip()
             if len(_inchi) > 0:
+                # local index
+                index = InChIKeyIndex.current('inchi')
+                if index is not None:
+                    _cids = index.lookup(_inchi)
+                    if len(_cids) > 0:
+                        return _cids
+
                 # set url
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/inchi/cids/TXT'
-                # post
 
-                res = requests.post(_url, data={'inchi': _inchi})
+                # known not found
+                negative = NegativeCache.current()
+                if negative is not None:
+                    _key = NegativeCache.make_key('inchi', ''.join(_inchi.split()))
+                    if negative.contains(_key):
+                        return []
+
+                # post
+                res = SessionManager.post(_url, data={'inchi': _inchi})
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1212,6 +1611,8 @@ class PubChemAPI:
                     return []
                 elif reqResponse == 404:
                     print("Bad request!")
+                    if negative is not None:
+                        negative.add(_key)
                     return []
                 else:
                     raise Exception('request is refused, try again.')
@@ -1220,6 +1621,104 @@ class PubChemAPI:
                 return []
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
+            raise Exception(e)
+
+    @staticmethod
+    @Memo.memoize('identifier', lambda inchikey: str(inchikey).strip().upper())
+    def get_cids_by_inchikey(inchikey: str) -> list:
+        '''
+        Search for cids according to an inchikey
+
+        Parameters
+        ----------
+        inchikey : str
+            e.g. ATUOYWHBWRKTHZ-UHFFFAOYSA-N
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        try:
+
+            _inchikey = str(inchikey).strip().upper()
+            if len(_inchikey) > 0:
+                # local index
+                index = InChIKeyIndex.current('inchikey')
+                if index is not None:
+                    _cids = index.lookup(_inchikey)
+                    if len(_cids) > 0:
+                        return _cids
+
+                # set url
+                _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/inchikey/{_inchikey}/cids/TXT'
+                # get
+                res = SessionManager.get(_url)
+                # check
+                reqResponse = res.status_code
+                if reqResponse == 200:
+                    resContent = res.text
+                    resContent = str(resContent).splitlines()
+
+                    return resContent
+                elif reqResponse in [400, 404]:
+                    print(f"Compound inchikey '{_inchikey}' was not found!")
+                    return []
+                else:
+                    raise Exception('request is refused, try again.')
+            else:
+                print(f"{_inchikey} format is not valid!")
+                return []
+
+        except Exception as e:
+            OfflineCacheMissError.reraise(e)
+            raise Exception(e)
+
+    @staticmethod
+    @Memo.memoize('identifier', lambda smiles: str(smiles).strip())
+    def get_cids_by_smiles(smiles: str) -> list:
+        '''
+        Search for cids according to a smiles
+
+        Parameters
+        ----------
+        smiles : str
+            e.g. CCC
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        try:
+
+            _smiles = str(smiles).strip()
+            if len(_smiles) > 0:
+                # set url
+                _url = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/smiles/cids/TXT'
+                # post
+                res = SessionManager.post(_url, data={'smiles': _smiles})
+                # check
+                reqResponse = res.status_code
+                if reqResponse == 200:
+                    resContent = res.text
+                    # cid 0 means the structure is not in pubchem
+                    resContent = [item for item in str(resContent).splitlines()
+                                  if item.strip() not in ['', '0']]
+
+                    return resContent
+                elif reqResponse in [400, 404]:
+                    print(f"Compound smiles '{_smiles}' was not found!")
+                    return []
+                else:
+                    raise Exception('request is refused, try again.')
+            else:
+                print(f"{_smiles} format is not valid!")
+                return []
+
+        except Exception as e:
+            OfflineCacheMissError.reraise(e)
             raise Exception(e)
 
     @staticmethod
@@ -1251,18 +1750,25 @@ class PubChemAPI:
             # check cid
             _val = str(val).strip()
             if len(_val) > 0:
+                # known not found
+                negative = NegativeCache.current()
+                if negative is not None:
+                    _key = NegativeCache.make_key(
+                        'similar', similarity_type, _compound_id, _val)
+                    if negative.contains(_key):
+                        return []
 
                 # check
                 if _compound_id == 'smiles' or _compound_id == 'cid':
                     # url
                     _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{similarity_type}/{_compound_id}/{_val}/cids/TXT'
                     # get
-                    res = requests.get(_url)
+                    res = SessionManager.get(_url)
                 elif _compound_id == 'inchi':
                     # url
                     _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{similarity_type}/{_compound_id}/cids/TXT'
                     # post
-                    res = requests.post(_url, data={'inchi': _val})
+                    res = SessionManager.post(_url, data={'inchi': _val})
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1272,11 +1778,13 @@ class PubChemAPI:
                     return resContent
                 elif reqResponse == 404:
                     print(f"Similar cids for {_val} was not found!")
+                    if negative is not None:
+                        negative.add(_key)
                     return []
                 else:
-                    print('request is refused, try again.')
-                    return []
+                    raise Exception('request is refused, try again.')
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -1299,7 +1807,7 @@ class PubChemAPI:
             if len(_cid) > 0:
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastsimilarity_3d/cid/{_cid}/cids/TXT'
 
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1314,6 +1822,7 @@ class PubChemAPI:
                     print('request is refused, try again.')
                     return []
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -1358,7 +1867,7 @@ class PubChemAPI:
             if len(_cid) > -1:
                 _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastidentity/cid/{_cid}/cids/TXT?identity_type={_mode}'
                 # api
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1369,10 +1878,11 @@ class PubChemAPI:
                 else:
                     raise Exception('request is refused, try again.')
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
-    def get_cids_by_2d_similarity(cid,  max_records="all", threshold=90):
+    def get_cids_by_2d_similarity(cid,  max_records="all", threshold=90, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT):
         '''
         Search for cids according to an 2d similarity
 
@@ -1384,6 +1894,10 @@ class PubChemAPI:
             number of records e.g. 10
         threshold : str
             minimum Tanimoto score for a hit e.g. 90
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
 
         Returns
         -------
@@ -1403,7 +1917,10 @@ class PubChemAPI:
                     _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastsimilarity_2d/cid/{_cid}/cids/TXT?Threshold={_threshold}&MaxRecords={_max_records}'
 
                 # url log
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
+                # wait for a long-running search
+                res = ListKeyPoller.wait(
+                    res, poll_interval=poll_interval, timeout=timeout)
 
                 # check
                 reqResponse = res.status_code
@@ -1419,6 +1936,7 @@ class PubChemAPI:
                 raise Exception('cid is empty.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -1452,7 +1970,7 @@ class PubChemAPI:
                 else:
                     _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastsimilarity_3d/cid/{_cid}/cids/TXT?Threshold={_threshold}&MaxRecords={_max_records}'
 
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1464,10 +1982,11 @@ class PubChemAPI:
                     raise Exception('request is refused, try again.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
-    def get_cids_by_structure_type(cid, structure_type=1, max_records='all'):
+    def get_cids_by_structure_type(cid, structure_type=1, max_records='all', poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT):
         '''
         Search for cids according to an cid [Substructure / Superstructure]
 
@@ -1480,6 +1999,10 @@ class PubChemAPI:
             2: superstructure
         max_records : str
             number of records e.g. 10
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
 
         Returns
         -------
@@ -1505,7 +2028,10 @@ class PubChemAPI:
                 else:
                     _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{_structure_type}/cid/{_cid}/cids/TXT?MaxRecords={_max_records}'
                 # send req
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
+                # wait for a long-running search
+                res = ListKeyPoller.wait(
+                    res, poll_interval=poll_interval, timeout=timeout)
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1516,6 +2042,7 @@ class PubChemAPI:
                 else:
                     raise Exception('request is refused, try again.')
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
@@ -1546,7 +2073,7 @@ class PubChemAPI:
                 else:
                     _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastsubstructure/smiles/{_smiles}/cids/TXT?MaxRecords={_max_records}'
                 # send req
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
                 # check
                 reqResponse = res.status_code
                 if reqResponse == 200:
@@ -1557,10 +2084,11 @@ class PubChemAPI:
                 else:
                     raise Exception('request is refused, try again.')
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
 
     @ staticmethod
-    def get_cids_by_molecular_formula(molecular_formula, max_records="all", allow_other_elements=True):
+    def get_cids_by_molecular_formula(molecular_formula, max_records="all", allow_other_elements=True, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT):
         '''
         Search for cids according to a molecular formula
 
@@ -1573,6 +2101,10 @@ class PubChemAPI:
         allow_other_elements : bool
             True: allow other elements
             False: not allow other elements
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
 
         Returns
         -------
@@ -1585,6 +2117,14 @@ class PubChemAPI:
             _max_records = str(max_records).strip()
             _allow_other_elements = bool(allow_other_elements)
             if len(_name) > -1:
+                # local index
+                index = FormulaIndex.current()
+                if index is not None:
+                    _cids = index.search(_name, allow_other_elements=_allow_other_elements,
+                                         max_records=None if _max_records == 'all' else int(_max_records))
+                    if len(_cids) > 0:
+                        return _cids
+
                 # check
                 if _max_records == 'all':
                     _url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/{molecular_formula}/cids/TXT?AllowOtherElements={_allow_other_elements}"
@@ -1592,7 +2132,10 @@ class PubChemAPI:
                     _url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/{molecular_formula}/cids/TXT?AllowOtherElements={_allow_other_elements}&MaxRecords={_max_records}"
 
                 # url log
-                res = requests.get(_url)
+                res = SessionManager.get(_url)
+                # wait for a long-running search
+                res = ListKeyPoller.wait(
+                    res, poll_interval=poll_interval, timeout=timeout)
 
                 # check
                 reqResponse = res.status_code
@@ -1608,4 +2151,169 @@ class PubChemAPI:
                 raise Exception('cid is empty.')
 
         except Exception as e:
+            OfflineCacheMissError.reraise(e)
             print(e)
+
+    @staticmethod
+    def iter_cids(search, params=None, page_size=LISTKEY_PAGE_SIZE, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> Iterator[str]:
+        '''
+        Iterate over the cids of a search page by page, the search result is
+        kept on the server (ListKey) and only one page is held in memory.
+
+        Parameters
+        ----------
+        search : str
+            search path, e.g. fastformula/C6H6, fastsimilarity_2d/cid/297
+        params : dict
+            search options, e.g. {'Threshold': 90} (default: None)
+        page_size : int
+            number of cids per request (default: 10000)
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Yields
+        ------
+        str
+            cid
+        '''
+        # search
+        _search = str(search).strip().strip('/')
+        _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{_search}/cids/JSON'
+        _params = {**(params or {}), 'list_return': 'listkey'}
+
+        res = SessionManager.get(_url, params=_params)
+        # wait for a long-running search
+        res = ListKeyPoller.wait(res, operation='cids/JSON?list_return=listkey',
+                                 poll_interval=poll_interval, timeout=timeout)
+
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 404:
+            return
+        elif reqResponse != 200:
+            raise Exception('request is refused, try again.')
+
+        # identifier list
+        resContent = res.json().get('IdentifierList', {})
+        listkey = resContent.get('ListKey')
+
+        # cids returned directly
+        if listkey is None:
+            for cid in resContent.get('CID', []):
+                yield str(cid)
+            return
+
+        # pages
+        size = int(resContent.get('Size', 0))
+        _page_size = max(1, int(page_size))
+        _page_url = ListKeyPoller.poll_url(listkey, 'cids/TXT')
+
+        for start in range(0, size, _page_size):
+            res = SessionManager.get(_page_url, params={
+                'listkey_start': start, 'listkey_count': _page_size})
+            # check
+            if res.status_code != 200:
+                raise Exception(
+                    f'request for page {start} of listkey {listkey} is refused, try again.')
+            # cids
+            for line in res.text.splitlines():
+                if len(line.strip()) > 0:
+                    yield line.strip()
+
+    @staticmethod
+    def iter_cids_by_formula(formula, allow_other_elements=False, page_size=LISTKEY_PAGE_SIZE, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> Iterator[str]:
+        '''
+        Iterate over the cids of a formula search page by page
+
+        Parameters
+        ----------
+        formula : str
+            e.g. C6H6
+        allow_other_elements : bool
+            allow other elements (default: False)
+        page_size : int
+            number of cids per request (default: 10000)
+
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Yields
+        ------
+        str
+            cid
+        '''
+        _formula = str(formula).strip()
+        return PubChemAPI.iter_cids(f'fastformula/{_formula}',
+                                    params={'AllowOtherElements': bool(
+                                        allow_other_elements)},
+                                    page_size=page_size, poll_interval=poll_interval, timeout=timeout)
+
+    @staticmethod
+    def iter_cids_by_2d_similarity(cid, threshold=90, page_size=LISTKEY_PAGE_SIZE, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> Iterator[str]:
+        '''
+        Iterate over the cids of a 2d similarity search page by page
+
+        Parameters
+        ----------
+        cid : str
+            e.g. 297
+        threshold : int
+            minimum Tanimoto score for a hit e.g. 90
+        page_size : int
+            number of cids per request (default: 10000)
+
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Yields
+        ------
+        str
+            cid
+        '''
+        _cid = str(cid).strip()
+        return PubChemAPI.iter_cids(f'fastsimilarity_2d/cid/{_cid}',
+                                    params={'Threshold': threshold},
+                                    page_size=page_size, poll_interval=poll_interval, timeout=timeout)
+
+    @staticmethod
+    def iter_cids_by_structure_type(cid, structure_type=1, page_size=LISTKEY_PAGE_SIZE, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> Iterator[str]:
+        '''
+        Iterate over the cids of a substructure/superstructure search page by page
+
+        Parameters
+        ----------
+        cid : str
+            e.g. 297
+        structure_type : int
+            1: substructure
+            2: superstructure
+        page_size : int
+            number of cids per request (default: 10000)
+
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Yields
+        ------
+        str
+            cid
+        '''
+        _cid = str(cid).strip()
+        # check structure_type
+        if structure_type == 1:
+            _structure_type = 'fastsubstructure'
+        elif structure_type == 2:
+            _structure_type = 'fastsuperstructure'
+        else:
+            raise Exception('structure_type is not correctly set.')
+
+        return PubChemAPI.iter_cids(f'{_structure_type}/cid/{_cid}', page_size=page_size,
+                                    poll_interval=poll_interval, timeout=timeout)
@@ -0,0 +1,721 @@
+# ASYNC API
+# ----------
+
+# import packages/modules
+import asyncio
+import io
+import os
+import weakref
+from PIL import Image
+
+# optional
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# local
+from .config import LISTKEY_POLL_INTERVAL, LISTKEY_TIMEOUT, PROPERTY_NAMES
+from .listkey import ListKeyPoller
+from .ratelimit import RateLimiter
+from .cache import ResponseCache
+from .negative import NegativeCache
+from .keyindex import InChIKeyIndex
+from .synonym import SynonymIndex
+from .formula import FormulaIndex
+from .store import PropertyStore
+from .session import SessionManager
+from .util import UtilityAPI, HttpResponse
+from .singleflight import AsyncSingleFlight
+
+
+class AsyncSessionManager():
+    '''
+    shared aiohttp session for async PUG REST requests
+
+    One session is kept per event loop, requests share the rate limit
+    budget of the sync api (RateLimiter).
+    '''
+    # sessions (event loop -> session)
+    _sessions = weakref.WeakKeyDictionary()
+    # in-flight requests
+    _flight = AsyncSingleFlight()
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _check():
+        if aiohttp is None:
+            raise Exception(
+                "aiohttp is required for the async api, install it with `pip install PubChemQuery[async]`.")
+
+    @classmethod
+    def get_session(cls):
+        '''
+        Get the session of the running event loop (created on first use)
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            shared session
+        '''
+        cls._check()
+        # loop
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.get(loop)
+        # check
+        if session is None or session.closed:
+            # settings
+            _settings = SessionManager.settings()
+            _timeout = _settings['timeout']
+            if isinstance(_timeout, (tuple, list)):
+                timeout = aiohttp.ClientTimeout(
+                    sock_connect=_timeout[0], sock_read=_timeout[1])
+            else:
+                timeout = aiohttp.ClientTimeout(total=_timeout)
+            # connector
+            connector = aiohttp.TCPConnector(limit=_settings['pool_maxsize'])
+            session = aiohttp.ClientSession(
+                connector=connector, timeout=timeout)
+            cls._sessions[loop] = session
+
+        return session
+
+    @classmethod
+    async def request(cls, method, url, **kwargs) -> HttpResponse:
+        '''
+        Send a request, waits (without blocking the loop) for the rate limit,
+        concurrent identical requests share one in-flight request
+
+        Parameters
+        ----------
+        method : str
+            GET, POST
+        url : str
+            request url
+        kwargs : dict
+            aiohttp keyword arguments (data, params, ...)
+
+        Returns
+        -------
+        HttpResponse
+            response
+        '''
+        # offline
+        if SessionManager.is_offline():
+            return SessionManager.replay(method, url, **kwargs)
+
+        # endpoint family
+        family = UtilityAPI.get_endpoint_family(url)
+        # key
+        key = ResponseCache.make_key(
+            method, url, kwargs.get('params'), kwargs.get('data'))
+
+        # cache
+        cache = ResponseCache.current()
+        if cache is not None and cache.is_cacheable(url, family, kwargs.get('params')):
+            res = cache.get(key, family)
+            if res is not None:
+                return res
+        else:
+            cache = None
+
+        # coalesce
+        if SessionManager.settings().get('coalesce', True):
+            return await cls._flight.do(key, cls._send, method, url, family, key, cache, **kwargs)
+        return await cls._send(method, url, family, key, cache, **kwargs)
+
+    @classmethod
+    async def _send(cls, method, url, family, key, cache, **kwargs) -> HttpResponse:
+        '''
+        Send a request after the rate limit and cache the response
+        '''
+        session = cls.get_session()
+        # rate limit
+        delay = RateLimiter.reserve(family)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = RateLimiter.reserve(family)
+        # send
+        async with session.request(method, url, **kwargs) as _res:
+            content = await _res.read()
+            res = HttpResponse(_res.status, content, _res.headers, str(_res.url),
+                               _res.get_encoding() if content else 'utf-8')
+
+        # cache
+        if cache is not None:
+            cache.set(key, url, family, res)
+
+        return res
+
+    @classmethod
+    async def get(cls, url, **kwargs) -> HttpResponse:
+        return await cls.request('GET', url, **kwargs)
+
+    @classmethod
+    async def post(cls, url, data=None, **kwargs) -> HttpResponse:
+        return await cls.request('POST', url, data=data, **kwargs)
+
+    @classmethod
+    async def close(cls):
+        '''
+        Close the session of the running event loop
+        '''
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+
+class AsyncPubChemAPI:
+    '''
+    async counterpart of PubChemAPI static methods
+    '''
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    async def get_cid_by_name(name, name_type='word') -> list[str]:
+        '''
+        Get cid by searching name
+
+        Parameters
+        ----------
+        name : str
+            compound name (https://pubchem.ncbi.nlm.nih.gov/)
+        name_type : str
+            word (small part of molecule), complete (exact molecule)
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        _name = str(name).strip()
+        if len(_name) == 0:
+            return []
+
+        # local index
+        index = SynonymIndex.current()
+        if index is not None:
+            _cids = index.lookup(_name, name_type=name_type)
+            # an ambiguous complete name is ranked by PubChem
+            if len(_cids) == 1 or (len(_cids) > 1 and name_type == 'word'):
+                return _cids
+
+        # known not found
+        negative = NegativeCache.current()
+        if negative is not None:
+            _key = NegativeCache.make_key(
+                'name', name_type, ' '.join(_name.split()).casefold())
+            if negative.contains(_key):
+                return []
+
+        _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{_name}/cids/TXT?name_type={name_type}'
+        res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            return str(res.text).splitlines()
+        elif reqResponse == 404:
+            if negative is not None:
+                negative.add(_key)
+            return []
+        else:
+            print('request is refused, try again.')
+            return []
+
+    @staticmethod
+    async def get_cids_by_inchi(inchi: str) -> list:
+        '''
+        Search for cids according to an inchi
+
+        Parameters
+        ----------
+        inchi : str
+            e.g. InChI=1S/C3H8/c1-3-2/h3H2,1-2H3
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        _inchi = str(inchi).strip()
+        if len(_inchi) == 0:
+            print(f"{_inchi} format is not valid!")
+            return []
+
+        # local index
+        index = InChIKeyIndex.current('inchi')
+        if index is not None:
+            _cids = index.lookup(_inchi)
+            if len(_cids) > 0:
+                return _cids
+
+        # known not found
+        negative = NegativeCache.current()
+        if negative is not None:
+            _key = NegativeCache.make_key('inchi', ''.join(_inchi.split()))
+            if negative.contains(_key):
+                return []
+
+        _url = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/inchi/cids/TXT'
+        res = await AsyncSessionManager.post(_url, data={'inchi': _inchi})
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            return str(res.text).splitlines()
+        elif reqResponse in [400, 404]:
+            if reqResponse == 404 and negative is not None:
+                negative.add(_key)
+            return []
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_cids_by_formula(formula) -> list:
+        '''
+        Search for cids according to a formula
+
+        Parameters
+        ----------
+        formula : str
+            e.g. CH4
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        _formula = str(formula).strip()
+        if len(_formula) == 0:
+            print(f"{formula} format is not valid!")
+            return []
+
+        # local index
+        index = FormulaIndex.current()
+        if index is not None:
+            _cids = index.search(_formula)
+            if len(_cids) > 0:
+                return _cids
+
+        _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/{_formula}/cids/TXT'
+        res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            return str(res.text).splitlines()
+        elif reqResponse in [400, 404]:
+            print(f"Compound formula '{_formula}' was not found!")
+            return []
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_properties_by_cid(cid, properties=[], format_type="json"):
+        '''
+        Get compound properties by cid
+
+        Parameters
+        ----------
+        cid : str
+            compound id
+        properties : list
+            list of properties (see PubChemAPI.get_properties_by_cid),
+            if it is empty, all properties are retrieved.
+        format_type : str
+            json
+
+        Returns
+        -------
+        dict
+            json format properties, None if the compound is not found
+        '''
+        # check
+        if len(properties) == 0:
+            properties = list(PROPERTY_NAMES)
+        _cid = str(cid).strip()
+        _format_type = str(format_type).strip().upper()
+        _properties = ",".join(properties)
+        _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/property/{_properties}/{_format_type}'
+
+        res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            resContent = res.json()
+            # property store
+            if _format_type == 'JSON':
+                PropertyStore.save_fetched(resContent)
+            return resContent
+        elif reqResponse == 404:
+            print(f"properties of compound id `{_cid}` are not found.")
+            return None
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_sdf_by_cid(cid, file_format='SDF', record_type='3d', save=False, location=''):
+        '''
+        Query request by PUBCHEM_COMPOUND_CID
+
+        Parameters
+        ----------
+        cid : int
+            compound id (https://pubchem.ncbi.nlm.nih.gov/)
+        file_format : str
+            SDF, JSON
+        record_type : str
+            3d, 2d
+        save : bool
+            the sdf file is saved
+        location : str
+            directory path, if it is empty, the current directory is selected.
+
+        Returns
+        -------
+        str
+            sdf string
+        '''
+        _cid = str(cid).strip()
+        _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/{file_format}?record_type={record_type}'
+
+        res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            sdfContent = res.text
+            # check
+            if save is True:
+                fileName = f'cid - {_cid}.sdf'
+                if location == '':
+                    location = os.getcwd()
+                fileLoc = os.path.join(location, fileName)
+                with open(fileLoc, 'w') as file:
+                    file.write(sdfContent)
+                print(
+                    f"{file_format} file {fileName} is successfully saved in `{fileLoc}`")
+            return sdfContent
+        elif reqResponse == 404:
+            print(f"{file_format} file of compound id `{_cid}` is not found.")
+            return "Not Found!"
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_sdf_by_name(name, file_format='SDF', record_type='3d', save=False, location=''):
+        '''
+        Query request by name
+
+        Parameters
+        ----------
+        name : str
+            compound name
+        file_format : str
+            SDF, JSON
+        record_type : str
+            3d, 2d
+        save : bool
+            the sdf file is saved
+        location : str
+            directory path, if it is empty, the current directory is selected.
+
+        Returns
+        -------
+        str
+            sdf string
+        '''
+        _name = str(name).strip()
+        _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{_name}/{file_format}?record_type={record_type}'
+
+        res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            sdfContent = res.text
+            # check
+            if save is True:
+                _fname = str(_name)+" - "+record_type+'.sdf'
+                if len(location) == 0:
+                    location = os.getcwd()
+                fileLoc = os.path.join(location, _fname)
+                with open(fileLoc, 'w') as file:
+                    file.write(sdfContent)
+                print(
+                    f"{file_format} file {_fname} is successfully saved in `{fileLoc}`")
+            return sdfContent
+        elif reqResponse == 404:
+            print(f"{file_format} file of compound id `{_name}` is not found.")
+            return "Not Found!"
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_structure_image(name='', cid=0, image_format='2d', image_size=''):
+        '''
+        Get compound structure image
+
+        Parameters
+        ----------
+        name : str
+            compound name
+        cid : str
+            compound id
+        image_format : str
+            3d, 2d (default: 2d)
+        image_size : str
+            small, large, 250x250
+
+        Returns
+        -------
+        Image
+            image
+        '''
+        # check image format
+        _image_format = str(image_format).strip()
+        if _image_format not in ["2d", "3d"]:
+            raise Exception("image format is not valid!")
+
+        # check
+        if len(name) > 0:
+            _name = name.strip()
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{_name}/PNG?record_type={_image_format}&image_size={image_size}'
+        elif cid != 0:
+            _cid = str(cid).strip()
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/{_cid}/PNG?record_type={_image_format}&image_size={image_size}'
+        else:
+            raise Exception("name or cid should be set.")
+
+        res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            return Image.open(io.BytesIO(res.content))
+        elif reqResponse == 404:
+            return None
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_similar_cids_by_compound_id(val: str, compound_id='cid', similarity_type='fastsimilarity_2d') -> list:
+        '''
+        Retrieves cids by similarity search
+
+        Parameters
+        ----------
+        val : str
+            e.g. 297, 'C1=CC=CC=C1', 'InChI=1S/C6H6/c1-2-4-6-5-3-1/h1-6H'
+        compound_id : str
+            cid, SMILES, InChI (default: cid)
+        similarity_type : str
+            fastsimilarity_2d, fastsimilarity_3d (default: fastsimilarity_2d)
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        # compound id
+        if compound_id in ['cid', 'SMILES', 'InChI']:
+            _compound_id = str(compound_id).lower()
+        else:
+            _compound_id = 'cid'
+
+        _val = str(val).strip()
+        if len(_val) == 0:
+            return []
+
+        # known not found
+        negative = NegativeCache.current()
+        if negative is not None:
+            _key = NegativeCache.make_key(
+                'similar', similarity_type, _compound_id, _val)
+            if negative.contains(_key):
+                return []
+
+        # check
+        if _compound_id == 'inchi':
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{similarity_type}/{_compound_id}/cids/TXT'
+            res = await AsyncSessionManager.post(_url, data={'inchi': _val})
+        else:
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{similarity_type}/{_compound_id}/{_val}/cids/TXT'
+            res = await AsyncSessionManager.get(_url)
+        # check
+        reqResponse = res.status_code
+        if reqResponse == 200:
+            return str(res.text).splitlines()
+        elif reqResponse == 404:
+            print(f"Similar cids for {_val} was not found!")
+            if negative is not None:
+                negative.add(_key)
+            return []
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def wait_for_listkey(res, operation='cids/TXT', poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT):
+        '''
+        Wait for a long-running search without blocking the event loop,
+        the response is returned as is if it is not a waiting response
+
+        Parameters
+        ----------
+        res : HttpResponse
+            pug rest response
+        operation : str
+            output of the search (default: cids/TXT)
+        poll_interval : float
+            seconds between status requests (default: 1)
+        timeout : float
+            seconds to wait before giving up (default: 300)
+
+        Returns
+        -------
+        HttpResponse
+            final response
+        '''
+        poller = ListKeyPoller(res, operation, poll_interval, timeout)
+        while poller.waiting:
+            await asyncio.sleep(poller.next_delay())
+            # poll
+            poller.update(await AsyncSessionManager.get(poller.url))
+
+        return poller.res
+
+    @staticmethod
+    async def _search_cids(_url, poll_interval, timeout) -> list:
+        '''
+        Send a search request and wait for its cids
+        '''
+        res = await AsyncSessionManager.get(_url)
+        # wait for a long-running search
+        res = await AsyncPubChemAPI.wait_for_listkey(
+            res, poll_interval=poll_interval, timeout=timeout)
+        # check
+        if res.status_code == 200:
+            return str(res.text).splitlines()
+        elif res.status_code == 404:
+            return []
+        else:
+            raise Exception('request is refused, try again.')
+
+    @staticmethod
+    async def get_cids_by_2d_similarity(cid, max_records="all", threshold=90, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> list:
+        '''
+        Search for cids according to an 2d similarity
+
+        Parameters
+        ----------
+        cid : str
+            e.g. 297
+        max_records : str
+            number of records e.g. 10
+        threshold : str
+            minimum Tanimoto score for a hit e.g. 90
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        _cid = str(cid).strip()
+        _threshold = str(threshold).strip()
+        _max_records = str(max_records).strip()
+
+        # check
+        if _max_records == 'all':
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastsimilarity_2d/cid/{_cid}/cids/TXT?Threshold={_threshold}'
+        else:
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastsimilarity_2d/cid/{_cid}/cids/TXT?Threshold={_threshold}&MaxRecords={_max_records}'
+
+        return await AsyncPubChemAPI._search_cids(_url, poll_interval, timeout)
+
+    @staticmethod
+    async def get_cids_by_structure_type(cid, structure_type=1, max_records='all', poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> list:
+        '''
+        Search for cids according to an cid [Substructure / Superstructure]
+
+        Parameters
+        ----------
+        cid : str
+            e.g. CH4: 297
+        structure_type : str
+            1: substructure
+            2: superstructure
+        max_records : str
+            number of records e.g. 10
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        _cid = str(cid).strip()
+        # check structure_type
+        if structure_type == 1:
+            _structure_type = 'fastsubstructure'
+        elif structure_type == 2:
+            _structure_type = 'fastsuperstructure'
+        else:
+            raise Exception('structure_type is not correctly set.')
+
+        if max_records == 'all':
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{_structure_type}/cid/{_cid}/cids/TXT'
+        else:
+            _url = f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/{_structure_type}/cid/{_cid}/cids/TXT?MaxRecords={max_records}'
+
+        return await AsyncPubChemAPI._search_cids(_url, poll_interval, timeout)
+
+    @staticmethod
+    async def get_cids_by_molecular_formula(molecular_formula, max_records="all", allow_other_elements=True, poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT) -> list:
+        '''
+        Search for cids according to a molecular formula
+
+        Parameters
+        ----------
+        molecular_formula : str
+            e.g. CH4
+        max_records : str
+            number of records e.g. 10 (default: all)
+        allow_other_elements : bool
+            True: allow other elements
+            False: not allow other elements
+        poll_interval : float
+            seconds between status requests of a long-running search (default: 1)
+        timeout : float
+            seconds to wait for a long-running search (default: 300)
+
+        Returns
+        -------
+        list
+            cid list
+        '''
+        _name = str(molecular_formula).strip()
+        _max_records = str(max_records).strip()
+        _allow_other_elements = bool(allow_other_elements)
+
+        # local index
+        index = FormulaIndex.current()
+        if index is not None:
+            _cids = index.search(_name, allow_other_elements=_allow_other_elements,
+                                 max_records=None if _max_records == 'all' else int(_max_records))
+            if len(_cids) > 0:
+                return _cids
+
+        # check
+        if _max_records == 'all':
+            _url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/{_name}/cids/TXT?AllowOtherElements={_allow_other_elements}"
+        else:
+            _url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/{_name}/cids/TXT?AllowOtherElements={_allow_other_elements}&MaxRecords={_max_records}"
+
+        return await AsyncPubChemAPI._search_cids(_url, poll_interval, timeout)
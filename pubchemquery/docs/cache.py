@@ -0,0 +1,399 @@
+# CACHE
+# ------
+
+# import packages/modules
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional, Dict, Union
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# local
+from .config import CACHE_PATH, CACHE_MAX_SIZE, CACHE_STATUS_CODES, CACHE_TTL
+from .util import HttpResponse
+
+
+class OfflineCacheMissError(Exception):
+    '''
+    a request is not found in the response cache in offline mode
+    '''
+
+    def __init__(self, method: str, url: str):
+        self.method = str(method).upper()
+        self.url = url
+        super().__init__(
+            f"offline mode: {self.method} {url} is not found in the response cache!")
+
+    @staticmethod
+    def reraise(error: Exception):
+        '''
+        Raise an error again if it is an OfflineCacheMissError, generic
+        handlers call it first so a cache miss is not wrapped or swallowed
+        '''
+        if isinstance(error, OfflineCacheMissError):
+            raise error
+
+
+class ResponseCache():
+    '''
+    persistent PUG REST response cache (sqlite)
+
+    Responses are keyed by method, normalized url (query parameters sorted)
+    and POST body. Each endpoint family has its own time to live, the least
+    recently used responses are evicted when the total size exceeds max_size.
+    '''
+    # active cache
+    _instance = None
+
+    def __init__(self, path: str = CACHE_PATH, ttl: Optional[Union[int, Dict[str, int]]] = None,
+                 max_size: int = CACHE_MAX_SIZE, status_codes=CACHE_STATUS_CODES):
+        '''
+        Parameters
+        ----------
+        path : str
+            sqlite file path (default: ~/.pubchemquery/cache.sqlite)
+        ttl : int or dict
+            time to live in seconds, for all families or per family
+            e.g. {'property': 86400} (default: CACHE_TTL)
+        max_size : int
+            max size of cached bodies in bytes (default: 1 GB)
+        status_codes : tuple
+            status codes to cache (default: 200, 404)
+        '''
+        # ttl
+        self.ttl = dict(CACHE_TTL)
+        if isinstance(ttl, dict):
+            self.ttl.update(ttl)
+        elif ttl is not None:
+            self.ttl = {family: (int(ttl) if value else 0)
+                        for family, value in self.ttl.items()}
+        self.max_size = int(max_size)
+        self.status_codes = tuple(status_codes)
+        self.path = path
+
+        # database
+        _dir = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(_dir):
+            os.makedirs(_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                family TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                encoding TEXT,
+                body BLOB,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)')
+        # total size
+        self._size = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    # active cache
+    @classmethod
+    def enable(cls, path: str = CACHE_PATH, ttl=None, max_size: int = CACHE_MAX_SIZE,
+               status_codes=CACHE_STATUS_CODES) -> 'ResponseCache':
+        '''
+        Enable the cache for all requests
+        '''
+        cache = cls(path, ttl=ttl, max_size=max_size,
+                    status_codes=status_codes)
+        # replace
+        if cls._instance is not None:
+            cls._instance.close()
+        cls._instance = cache
+        return cache
+
+    @classmethod
+    def disable(cls):
+        '''
+        Disable the cache (cached responses are kept on disk)
+        '''
+        if cls._instance is not None:
+            cls._instance.close()
+        cls._instance = None
+
+    @classmethod
+    def current(cls) -> Optional['ResponseCache']:
+        '''
+        Get the active cache, None if it is disabled
+        '''
+        return cls._instance
+
+    # keys
+    @staticmethod
+    def normalize_url(url: str, params: Optional[Dict] = None) -> str:
+        '''
+        Normalize a url, scheme and host are lower-cased and query
+        parameters (including params) are sorted
+
+        Parameters
+        ----------
+        url : str
+            request url
+        params : dict
+            query parameters
+
+        Returns
+        -------
+        str
+            normalized url
+        '''
+        parts = urlsplit(str(url).strip())
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        if params:
+            query += [(str(k), str(v)) for k, v in params.items()]
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path,
+                           urlencode(sorted(query)), ''))
+
+    @staticmethod
+    def make_key(method: str, url: str, params: Optional[Dict] = None, data=None) -> str:
+        '''
+        Make a cache key
+
+        Parameters
+        ----------
+        method : str
+            GET, POST
+        url : str
+            request url
+        params : dict
+            query parameters
+        data : dict or str
+            POST body
+
+        Returns
+        -------
+        str
+            key
+        '''
+        # body
+        if isinstance(data, dict):
+            body = urlencode(sorted((str(k), str(v)) for k, v in data.items()))
+        elif isinstance(data, bytes):
+            body = data.decode('utf-8', errors='replace')
+        else:
+            body = '' if data is None else str(data)
+        # key
+        _key = '\n'.join([str(method).upper(),
+                         ResponseCache.normalize_url(url, params), body])
+        return hashlib.sha256(_key.encode('utf-8')).hexdigest()
+
+    def is_cacheable(self, url: str, family: str, params: Optional[Dict] = None) -> bool:
+        '''
+        Check a request can be cached (listkeys are short-lived on the server)
+
+        Parameters
+        ----------
+        url : str
+            request url
+        family : str
+            endpoint family
+        params : dict
+            query parameters
+        '''
+        if 'list_return=listkey' in ResponseCache.normalize_url(url, params).lower():
+            return False
+        return self.ttl.get(family, self.ttl['default']) > 0
+
+    # read/write
+    def get(self, key: str, family: str = 'default', ignore_ttl: bool = False) -> Optional[HttpResponse]:
+        '''
+        Get a cached response
+
+        Parameters
+        ----------
+        key : str
+            cache key
+        family : str
+            endpoint family
+        ignore_ttl : bool
+            return expired responses too
+
+        Returns
+        -------
+        HttpResponse
+            cached response, None if it is not found or expired
+        '''
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, status, content_type, encoding, body, created FROM responses WHERE key = ?',
+                (key,)).fetchone()
+            # check
+            if row is None:
+                return None
+            url, status, content_type, encoding, body, created = row
+            # ttl
+            now = time.time()
+            if not ignore_ttl and now - created > self.ttl.get(family, self.ttl['default']):
+                return None
+            # lru
+            self._conn.execute(
+                'UPDATE responses SET accessed = ? WHERE key = ?', (now, key))
+
+        headers = {'Content-Type': content_type} if content_type else {}
+        return HttpResponse(status, bytes(body or b''), headers, url, encoding)
+
+    def set(self, key: str, url: str, family: str, res) -> bool:
+        '''
+        Cache a response
+
+        Parameters
+        ----------
+        key : str
+            cache key
+        url : str
+            request url
+        family : str
+            endpoint family
+        res : Response
+            response (requests.Response or HttpResponse)
+
+        Returns
+        -------
+        bool
+            True if the response is cached
+        '''
+        # check
+        if res.status_code not in self.status_codes:
+            return False
+        body = res.content or b''
+        if len(body) > self.max_size:
+            return False
+        # search results kept on the server (listkey) expire
+        if b'ListKey' in body[:1024]:
+            return False
+        # set
+        now = time.time()
+        content_type = res.headers.get('Content-Type')
+        encoding = getattr(res, 'encoding', None) or 'utf-8'
+
+        with self._lock:
+            # replaced response
+            row = self._conn.execute(
+                'SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, family, res.status_code, content_type, encoding,
+                 sqlite3.Binary(body), len(body), now, now))
+            self._size += len(body) - (row[0] if row else 0)
+            # check
+            if self._size > self.max_size:
+                self._evict()
+
+        return True
+
+    def _evict(self):
+        '''
+        Evict least recently used responses above max_size (lock held)
+        '''
+        # other processes may share the file
+        total = self._conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        self._size = total
+        # check
+        if total <= self.max_size:
+            return
+        # keep 90% of max size
+        target = total - int(self.max_size*0.9)
+        removed = 0
+        rows = self._conn.execute(
+            'SELECT key, size FROM responses ORDER BY accessed ASC').fetchall()
+        keys = []
+        for key, size in rows:
+            if removed >= target:
+                break
+            keys.append((key,))
+            removed += size
+        self._conn.executemany('DELETE FROM responses WHERE key = ?', keys)
+        self._size = total - removed
+
+    def iter_responses(self, family: Optional[str] = None, status: int = 200):
+        '''
+        Iterate over cached responses (all or of an endpoint family)
+
+        Parameters
+        ----------
+        family : str
+            endpoint family e.g. property (default: None, all)
+        status : int
+            status code (default: 200)
+
+        Yields
+        ------
+        HttpResponse
+            cached response
+        '''
+        # read keys first, the connection is shared with other threads
+        with self._lock:
+            if family is None:
+                keys = self._conn.execute(
+                    'SELECT key FROM responses WHERE status = ?', (status,)).fetchall()
+            else:
+                keys = self._conn.execute(
+                    'SELECT key FROM responses WHERE status = ? AND family = ?', (status, family)).fetchall()
+
+        for (key,) in keys:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT url, status, content_type, encoding, body FROM responses WHERE key = ?',
+                    (key,)).fetchone()
+            # check
+            if row is None:
+                continue
+            url, _status, content_type, encoding, body = row
+            headers = {'Content-Type': content_type} if content_type else {}
+            yield HttpResponse(_status, bytes(body or b''), headers, url, encoding)
+
+    def clear(self, family: Optional[str] = None):
+        '''
+        Remove cached responses (all or of an endpoint family)
+        '''
+        with self._lock:
+            if family is None:
+                self._conn.execute('DELETE FROM responses')
+            else:
+                self._conn.execute(
+                    'DELETE FROM responses WHERE family = ?', (family,))
+            self._conn.execute('VACUUM')
+            self._size = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def stats(self) -> Dict:
+        '''
+        Get cache statistics
+
+        Returns
+        -------
+        dict
+            path, number of responses and size per family
+        '''
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT family, COUNT(*), COALESCE(SUM(size), 0) FROM responses GROUP BY family').fetchall()
+        return {
+            'path': self.path,
+            'max_size': self.max_size,
+            'count': sum(row[1] for row in rows),
+            'size': sum(row[2] for row in rows),
+            'families': {row[0]: {'count': row[1], 'size': row[2]} for row in rows}
+        }
+
+    def close(self):
+        '''
+        Close the database connection
+        '''
+        with self._lock:
+            self._conn.close()
@@ -1,9 +1,156 @@
 # API CONFIG
 # -----------
 
+# import packages/modules
+import os
+
 # app version
 __version__ = "1.6.0"
 __author__ = "Sina Gilassi"
 
 # file prefix
 CID_FILE_PREFIX = str('cid_')
+
+# pug rest base url
+PUG_REST_URL = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug'
+
+# http session
+SESSION_SETTINGS = {
+    # number of connection pools (one per host)
+    'pool_connections': 10,
+    # max connections kept alive in each pool
+    'pool_maxsize': 20,
+    # retries on connection errors
+    'max_retries': 3,
+    # (connect, read) timeout in seconds
+    'timeout': (10, 60),
+    # concurrent identical requests share one in-flight request
+    'coalesce': True,
+}
+
+# rate limits (token bucket), rate: requests per second, capacity: burst size
+# the global bucket is shared by every request (pubchem policy: max 5 requests per second)
+# endpoint families can be limited further (e.g. RATE_LIMITS['search'] = {'rate': 1, 'capacity': 2})
+RATE_LIMITS = {
+    'global': {'rate': 5, 'capacity': 5},
+}
+
+# endpoint families (url pattern, family), matched case-insensitively, the first match is selected
+ENDPOINT_FAMILIES = [
+    ('/listkey/', 'listkey'),
+    ('/property/', 'property'),
+    ('/png', 'image'),
+    ('/fastsimilarity_', 'search'),
+    ('/fastsubstructure/', 'search'),
+    ('/fastsuperstructure/', 'search'),
+    ('/fastformula/', 'search'),
+    ('/fastidentity/', 'search'),
+    ('/sdf', 'structure'),
+    ('/json?record_type', 'structure'),
+    ('/cids/', 'identifier'),
+    ('/sids/', 'identifier'),
+]
+
+# batch requests
+# number of cids per request
+CID_CHUNK_SIZE = 200
+# longer urls are sent as POST
+URL_MAX_LENGTH = 2000
+
+# element symbols
+ELEMENTS = (
+    'H', 'He', 'Li', 'Be', 'B', 'C', 'N', 'O', 'F', 'Ne', 'Na', 'Mg', 'Al', 'Si', 'P', 'S', 'Cl', 'Ar',
+    'K', 'Ca', 'Sc', 'Ti', 'V', 'Cr', 'Mn', 'Fe', 'Co', 'Ni', 'Cu', 'Zn', 'Ga', 'Ge', 'As', 'Se', 'Br',
+    'Kr', 'Rb', 'Sr', 'Y', 'Zr', 'Nb', 'Mo', 'Tc', 'Ru', 'Rh', 'Pd', 'Ag', 'Cd', 'In', 'Sn', 'Sb', 'Te',
+    'I', 'Xe', 'Cs', 'Ba', 'La', 'Ce', 'Pr', 'Nd', 'Pm', 'Sm', 'Eu', 'Gd', 'Tb', 'Dy', 'Ho', 'Er', 'Tm',
+    'Yb', 'Lu', 'Hf', 'Ta', 'W', 'Re', 'Os', 'Ir', 'Pt', 'Au', 'Hg', 'Tl', 'Pb', 'Bi', 'Po', 'At', 'Rn',
+    'Fr', 'Ra', 'Ac', 'Th', 'Pa', 'U', 'Np', 'Pu', 'Am', 'Cm', 'Bk', 'Cf', 'Es', 'Fm', 'Md', 'No', 'Lr',
+    'Rf', 'Db', 'Sg', 'Bh', 'Hs', 'Mt', 'Ds', 'Rg', 'Cn', 'Nh', 'Fl', 'Mc', 'Lv', 'Ts', 'Og', 'D', 'T'
+)
+
+# listkey (asynchronous pug rest searches)
+# seconds between status requests
+LISTKEY_POLL_INTERVAL = 1.0
+# seconds to wait for a search before giving up
+LISTKEY_TIMEOUT = 300
+# number of cids per listkey page
+LISTKEY_PAGE_SIZE = 10000
+
+# local data directory
+DATA_DIR = os.path.join(os.path.expanduser('~'), '.pubchemquery')
+
+# response cache (opt-in)
+CACHE_PATH = os.path.join(DATA_DIR, 'cache.sqlite')
+# offline mode, all requests are answered from the response cache
+OFFLINE = os.environ.get('PUBCHEMQUERY_OFFLINE', '').strip().lower() in ('1', 'true', 'yes', 'on')
+# max size of cached response bodies in bytes
+CACHE_MAX_SIZE = 1024*1024*1024
+# cached status codes
+CACHE_STATUS_CODES = (200, 404)
+# time to live of responses in seconds per endpoint family (0: not cached)
+CACHE_TTL = {
+    'default': 30*24*3600,
+    'property': 30*24*3600,
+    'structure': 90*24*3600,
+    'image': 90*24*3600,
+    'identifier': 7*24*3600,
+    'search': 24*3600,
+    'listkey': 0,
+}
+
+# in-memory lookup memoization (max number of entries, time to live in seconds)
+MEMO_SETTINGS = {
+    # name/inchi/inchikey/smiles/formula -> cids
+    'identifier': {'maxsize': 10000, 'ttl': 3600},
+    # cid -> properties
+    'property': {'maxsize': 10000, 'ttl': 3600},
+}
+
+# negative cache of identifiers not found on pubchem (opt-in, bloom filter)
+NEGATIVE_CACHE_PATH = os.path.join(DATA_DIR, 'negative.bloom')
+# time to live of a not found identifier in seconds
+NEGATIVE_CACHE_TTL = 7*24*3600
+# expected number of not found identifiers per generation
+NEGATIVE_CACHE_CAPACITY = 100000
+# false positive rate (a found identifier reported as not found)
+NEGATIVE_CACHE_ERROR_RATE = 0.001
+
+# compound properties (pug rest property table)
+PROPERTY_NAMES = (
+    'MolecularFormula', 'MolecularWeight', 'CanonicalSMILES', 'IsomericSMILES', 'InChI',
+    'InChIKey', 'IUPACName', 'Title', 'XLogP', 'ExactMass', 'MonoisotopicMass', 'TPSA',
+    'Complexity', 'Charge', 'HBondDonorCount', 'HBondAcceptorCount', 'RotatableBondCount',
+    'HeavyAtomCount', 'IsotopeAtomCount', 'AtomStereoCount', 'DefinedAtomStereoCount',
+    'UndefinedAtomStereoCount', 'BondStereoCount', 'DefinedBondStereoCount',
+    'UndefinedBondStereoCount', 'CovalentUnitCount', 'Volume3D', 'XStericQuadrupole3D',
+    'YStericQuadrupole3D', 'ZStericQuadrupole3D', 'FeatureCount3D', 'FeatureAcceptorCount3D',
+    'FeatureDonorCount3D', 'FeatureAnionCount3D', 'FeatureCationCount3D', 'FeatureRingCount3D',
+    'FeatureHydrophobeCount3D', 'ConformerModelRMSD3D', 'EffectiveRotorCount3D',
+    'ConformerCount3D', 'Fingerprint2D',
+)
+
+# property column types (CompoundTable), float: float64, int: int32, str: object
+PROPERTY_TYPES = {
+    'MolecularFormula': 'str', 'MolecularWeight': 'float', 'CanonicalSMILES': 'str',
+    'IsomericSMILES': 'str', 'InChI': 'str', 'InChIKey': 'str', 'IUPACName': 'str', 'Title': 'str',
+    'XLogP': 'float', 'ExactMass': 'float', 'MonoisotopicMass': 'float', 'TPSA': 'float',
+    'Complexity': 'float', 'Charge': 'int', 'HBondDonorCount': 'int', 'HBondAcceptorCount': 'int',
+    'RotatableBondCount': 'int', 'HeavyAtomCount': 'int', 'IsotopeAtomCount': 'int',
+    'AtomStereoCount': 'int', 'DefinedAtomStereoCount': 'int', 'UndefinedAtomStereoCount': 'int',
+    'BondStereoCount': 'int', 'DefinedBondStereoCount': 'int', 'UndefinedBondStereoCount': 'int',
+    'CovalentUnitCount': 'int', 'Volume3D': 'float', 'XStericQuadrupole3D': 'float',
+    'YStericQuadrupole3D': 'float', 'ZStericQuadrupole3D': 'float', 'FeatureCount3D': 'int',
+    'FeatureAcceptorCount3D': 'int', 'FeatureDonorCount3D': 'int', 'FeatureAnionCount3D': 'int',
+    'FeatureCationCount3D': 'int', 'FeatureRingCount3D': 'int', 'FeatureHydrophobeCount3D': 'int',
+    'ConformerModelRMSD3D': 'float', 'EffectiveRotorCount3D': 'float', 'ConformerCount3D': 'int',
+    'Fingerprint2D': 'str',
+}
+
+# property store (opt-in, sqlite)
+PROPERTY_STORE_PATH = os.path.join(DATA_DIR, 'properties.sqlite')
+# indexed columns (range queries)
+PROPERTY_STORE_INDEXES = (
+    'MolecularFormula', 'MolecularWeight', 'InChIKey', 'XLogP', 'ExactMass', 'TPSA',
+    'Complexity', 'Charge', 'HBondDonorCount', 'HBondAcceptorCount', 'RotatableBondCount',
+    'HeavyAtomCount',
+)
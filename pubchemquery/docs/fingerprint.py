@@ -0,0 +1,242 @@
+# FINGERPRINT
+# ------------
+
+# import packages/modules
+import base64
+import numpy as np
+from typing import Iterable, Optional
+
+
+class Fingerprint():
+    '''
+    PubChem substructure fingerprint (Fingerprint2D property)
+
+    The base64 string decodes to a 4-byte big-endian bit count (881)
+    followed by 111 bytes of bits, the first bit is the most significant
+    bit of the first byte. Fingerprints are kept packed: 111 uint8 bytes,
+    or 14 uint64 words (zero padded to 112 bytes) for popcount arithmetic.
+    '''
+    # number of bits
+    NUM_BITS = 881
+    # packed size
+    NUM_BYTES = 111
+    NUM_WORDS = 14
+
+    # popcount of a byte
+    _popcount_table = np.array([bin(i).count('1')
+                               for i in range(256)], dtype=np.uint8)
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def decode(fingerprint: str) -> np.ndarray:
+        '''
+        Decode a Fingerprint2D string
+
+        Parameters
+        ----------
+        fingerprint : str
+            base64 fingerprint e.g. AAADcYBgAAAAAAAA...
+
+        Returns
+        -------
+        np.ndarray
+            packed bits, uint8 (111,)
+        '''
+        try:
+            data = base64.b64decode(str(fingerprint).strip())
+            # check
+            if len(data) != 4 + Fingerprint.NUM_BYTES:
+                raise Exception(f"fingerprint size {len(data)} is not valid!")
+            num_bits = int.from_bytes(data[:4], 'big')
+            if num_bits != Fingerprint.NUM_BITS:
+                raise Exception(f"fingerprint bit count {num_bits} is not valid!")
+            return np.frombuffer(data, dtype=np.uint8, offset=4).copy()
+        except Exception as e:
+            raise Exception(f"fingerprint decoding error: {e}")
+
+    @staticmethod
+    def decode_many(fingerprints: Iterable[Optional[str]]) -> np.ndarray:
+        '''
+        Decode Fingerprint2D strings, missing or invalid fingerprints are
+        all-zero rows
+
+        Parameters
+        ----------
+        fingerprints : iterable
+            base64 fingerprints
+
+        Returns
+        -------
+        np.ndarray
+            packed bits, uint8 (n, 111)
+        '''
+        _fps = list(fingerprints)
+        res = np.zeros((len(_fps), Fingerprint.NUM_BYTES), dtype=np.uint8)
+        for i, item in enumerate(_fps):
+            if item is None:
+                continue
+            try:
+                data = base64.b64decode(str(item).strip())
+            except Exception:
+                continue
+            if len(data) == 4 + Fingerprint.NUM_BYTES:
+                res[i] = np.frombuffer(data, dtype=np.uint8, offset=4)
+        return res
+
+    @staticmethod
+    def encode(packed: np.ndarray) -> str:
+        '''
+        Encode packed bits (111 bytes) to a Fingerprint2D string
+        '''
+        _packed = np.asarray(packed, dtype=np.uint8).reshape(-1)[:Fingerprint.NUM_BYTES]
+        data = Fingerprint.NUM_BITS.to_bytes(4, 'big') + _packed.tobytes()
+        return base64.b64encode(data).decode('ascii')
+
+    @staticmethod
+    def to_bits(packed: np.ndarray) -> np.ndarray:
+        '''
+        Unpack to 0/1 bits
+
+        Parameters
+        ----------
+        packed : np.ndarray
+            uint8 (111,) or (n, 111)
+
+        Returns
+        -------
+        np.ndarray
+            uint8 (881,) or (n, 881)
+        '''
+        return np.unpackbits(np.asarray(packed, dtype=np.uint8), axis=-1)[..., :Fingerprint.NUM_BITS]
+
+    @staticmethod
+    def on_bits(packed: np.ndarray) -> np.ndarray:
+        '''
+        Get the indices of set bits (PubChem bit positions) of a fingerprint
+        '''
+        return np.flatnonzero(Fingerprint.to_bits(packed))
+
+    @staticmethod
+    def to_words(packed: np.ndarray) -> np.ndarray:
+        '''
+        Convert packed bytes to uint64 words
+
+        Parameters
+        ----------
+        packed : np.ndarray
+            uint8 (111,) or (n, 111)
+
+        Returns
+        -------
+        np.ndarray
+            uint64 (14,) or (n, 14)
+        '''
+        _packed = np.asarray(packed, dtype=np.uint8)
+        single = _packed.ndim == 1
+        _packed = _packed.reshape(-1, _packed.shape[-1])
+        # pad to 112 bytes
+        res = np.zeros((_packed.shape[0], Fingerprint.NUM_WORDS*8), dtype=np.uint8)
+        res[:, :_packed.shape[1]] = _packed
+        res = res.view(np.uint64)
+        return res[0] if single else res
+
+    @staticmethod
+    def popcount(values: np.ndarray) -> np.ndarray:
+        '''
+        Count set bits along the last axis
+
+        Parameters
+        ----------
+        values : np.ndarray
+            unsigned integer array (uint8/uint64)
+
+        Returns
+        -------
+        np.ndarray
+            number of set bits, int64
+        '''
+        _values = np.asarray(values)
+        # numpy >= 2.0
+        if hasattr(np, 'bitwise_count'):
+            return np.bitwise_count(_values).sum(axis=-1, dtype=np.int64)
+        # byte lookup table
+        _bytes = np.ascontiguousarray(_values).view(np.uint8)
+        return Fingerprint._popcount_table[_bytes].sum(axis=-1, dtype=np.int64)
+
+    @staticmethod
+    def tanimoto(query: np.ndarray, fingerprints: np.ndarray) -> np.ndarray:
+        '''
+        Tanimoto similarity of one fingerprint to many
+
+        Parameters
+        ----------
+        query : np.ndarray
+            uint64 words (14,) or packed uint8 bytes (111,)
+        fingerprints : np.ndarray
+            uint64 words (n, 14) or packed uint8 bytes (n, 111)
+
+        Returns
+        -------
+        np.ndarray
+            similarity, float64 (n,), 0 if both fingerprints are empty
+        '''
+        _query = Fingerprint._words(query)
+        _fps = Fingerprint._words(fingerprints).reshape(-1, Fingerprint.NUM_WORDS)
+        # counts
+        common = Fingerprint.popcount(_fps & _query)
+        union = Fingerprint.popcount(_query) + \
+            Fingerprint.popcount(_fps) - common
+        return np.divide(common, union, out=np.zeros(len(_fps), dtype=np.float64),
+                         where=union > 0)
+
+    @staticmethod
+    def tanimoto_matrix(a: np.ndarray, b: Optional[np.ndarray] = None, block_size: int = 1 << 20,
+                        dtype=np.float32) -> np.ndarray:
+        '''
+        Tanimoto similarity matrix, computed in row blocks of a
+
+        Parameters
+        ----------
+        a : np.ndarray
+            uint64 words (n, 14) or packed uint8 bytes (n, 111)
+        b : np.ndarray
+            uint64 words (m, 14) or packed uint8 bytes (m, 111) (default: a)
+        block_size : int
+            max number of fingerprint pairs per block (default: 2^20)
+        dtype : np.dtype
+            result dtype (default: float32)
+
+        Returns
+        -------
+        np.ndarray
+            similarity (n, m)
+        '''
+        _a = Fingerprint._words(a).reshape(-1, Fingerprint.NUM_WORDS)
+        _b = _a if b is None else Fingerprint._words(
+            b).reshape(-1, Fingerprint.NUM_WORDS)
+        # counts
+        count_a = Fingerprint.popcount(_a)
+        count_b = Fingerprint.popcount(_b)
+
+        res = np.zeros((len(_a), len(_b)), dtype=dtype)
+        rows = max(1, int(block_size) // max(len(_b), 1))
+        for start in range(0, len(_a), rows):
+            end = min(start + rows, len(_a))
+            common = Fingerprint.popcount(
+                _a[start:end, None, :] & _b[None, :, :])
+            union = count_a[start:end, None] + count_b[None, :] - common
+            np.divide(common, union, out=res[start:end],
+                      where=union > 0, casting='unsafe')
+        return res
+
+    @staticmethod
+    def _words(values: np.ndarray) -> np.ndarray:
+        '''
+        Get uint64 words from words or packed bytes
+        '''
+        _values = np.asarray(values)
+        if _values.dtype == np.uint64:
+            return _values
+        return Fingerprint.to_words(_values)
@@ -0,0 +1,478 @@
+# FORMULA INDEX
+# --------------
+
+# import packages/modules
+import re
+import gzip
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+# local
+from .config import ELEMENTS
+from .cache import ResponseCache
+
+
+class Formula():
+    '''
+    molecular formula parser (element counts, Hill order)
+    '''
+    # tokens
+    _token_pattern = re.compile(r'([A-Z][a-z]?)|(\d+)|([(\[])|([)\]])')
+    _flat_pattern = re.compile(r'(?:[A-Z][a-z]?\d*)+')
+    _element_pattern = re.compile(r'([A-Z][a-z]?)(\d*)')
+    # charge e.g. C4H12N+, O4S-2
+    _charge_pattern = re.compile(r'[+-]\d*$')
+    # element positions
+    _positions = {symbol: i for i, symbol in enumerate(ELEMENTS)}
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def parse(formula: str) -> Dict[str, int]:
+        '''
+        Parse a molecular formula, groups in parentheses, components
+        separated by dots (with a leading multiplier) are supported and
+        the charge is ignored
+
+        Parameters
+        ----------
+        formula : str
+            e.g. C6H6, C2H3NaO2, Cu(NH3)4, CuO4S.5H2O, C4H12N+
+
+        Returns
+        -------
+        dict
+            element counts e.g. {'C': 6, 'H': 6}
+        '''
+        # set
+        _formula = Formula._charge_pattern.sub('', ''.join(str(formula).split()))
+        # check
+        if len(_formula) == 0:
+            raise Exception(f"formula {formula} is not valid!")
+
+        # flat formula
+        if Formula._flat_pattern.fullmatch(_formula):
+            res = {}
+            for symbol, count in Formula._element_pattern.findall(_formula):
+                if symbol not in Formula._positions:
+                    raise Exception(
+                        f"element {symbol} in formula {formula} is not valid!")
+                res[symbol] = res.get(symbol, 0) + (int(count) if count else 1)
+            return {key: value for key, value in res.items() if value > 0}
+
+        res = {}
+        for component in _formula.split('.'):
+            # multiplier
+            _match = re.match(r'^(\d+)', component)
+            multiplier = int(_match.group(1)) if _match else 1
+            component = component[_match.end():] if _match else component
+
+            # groups
+            stack = [{}]
+            tokens = list(Formula._token_pattern.finditer(component))
+            # check
+            if ''.join(item.group(0) for item in tokens) != component or len(tokens) == 0:
+                raise Exception(f"formula {formula} is not valid!")
+            i = 0
+            while i < len(tokens):
+                symbol, _, _open, _close = tokens[i].groups()
+                # count
+                count = 1
+                if i + 1 < len(tokens) and tokens[i + 1].group(2):
+                    count = int(tokens[i + 1].group(2))
+                    step = 2
+                else:
+                    step = 1
+
+                if symbol:
+                    if symbol not in Formula._positions:
+                        raise Exception(
+                            f"element {symbol} in formula {formula} is not valid!")
+                    stack[-1][symbol] = stack[-1].get(symbol, 0) + count
+                elif _open:
+                    stack.append({})
+                    step = 1
+                elif _close:
+                    if len(stack) == 1:
+                        raise Exception(f"formula {formula} is not valid!")
+                    group = stack.pop()
+                    for key, value in group.items():
+                        stack[-1][key] = stack[-1].get(key, 0) + value*count
+                else:
+                    raise Exception(f"formula {formula} is not valid!")
+                i += step
+
+            # check
+            if len(stack) != 1:
+                raise Exception(f"formula {formula} is not valid!")
+            for key, value in stack[0].items():
+                res[key] = res.get(key, 0) + value*multiplier
+
+        return {key: value for key, value in res.items() if value > 0}
+
+    @staticmethod
+    def to_vector(formula: Union[str, Dict[str, int]]) -> np.ndarray:
+        '''
+        Convert a formula to an element-count vector (ELEMENTS order)
+
+        Returns
+        -------
+        ndarray
+            int32 counts, one per element
+        '''
+        counts = Formula.parse(formula) if isinstance(
+            formula, str) else formula
+        res = np.zeros(len(ELEMENTS), dtype=np.int32)
+        for key, value in counts.items():
+            res[Formula._positions[key]] = value
+        return res
+
+    @staticmethod
+    def canonical(formula: Union[str, Dict[str, int]]) -> str:
+        '''
+        Get the canonical (Hill order) formula, C and H first if the formula
+        has carbon, otherwise all elements alphabetically
+
+        Returns
+        -------
+        str
+            e.g. H2O4S.2Na -> H2Na2O4S
+        '''
+        counts = Formula.parse(formula) if isinstance(
+            formula, str) else formula
+        # order
+        if 'C' in counts:
+            symbols = ['C'] + (['H'] if 'H' in counts else []) + sorted(
+                item for item in counts if item not in ('C', 'H'))
+        else:
+            symbols = sorted(counts)
+        return ''.join(item + (str(counts[item]) if counts[item] != 1 else '') for item in symbols)
+
+
+class FormulaIndex():
+    '''
+    local molecular formula -> cid index
+
+    Compounds are grouped by canonical formula (sorted), each formula has a
+    slice of sorted cids and a column in an element-count matrix (one row
+    per element found in the index). Exact queries binary-search the
+    formulas, queries allowing other elements compare the matrix rows of
+    the query elements with the query counts in one vectorized pass.
+
+    Only an index built from a bulk file (from_file) is complete, so only
+    a complete index answers searches in place of PubChem (enable). An
+    index built from the response cache holds the cached compounds only
+    and is searched directly (search, exact).
+    '''
+    # active index
+    _instance = None
+
+    def __init__(self, cids=None, formulas=None, complete: bool = False):
+        '''
+        Parameters
+        ----------
+        cids : array
+            compound ids
+        formulas : list
+            molecular formulas of the compounds
+        complete : bool
+            the compounds are all PubChem compounds, e.g. a bulk file (default: False)
+        '''
+        self.formulas = np.zeros(0, dtype='<U1')
+        self.elements = ()
+        self.counts = np.zeros((0, 0), dtype=np.uint16)
+        # cids of a formula, cids[offsets[i]:offsets[i + 1]]
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.cids = np.zeros(0, dtype=np.int64)
+        self._rows = None
+        self.complete = bool(complete)
+        # set
+        if cids is not None:
+            self.add(cids, formulas)
+
+    def add(self, cids, formulas):
+        '''
+        Add compounds, a cid already in the index is replaced
+
+        Parameters
+        ----------
+        cids : array
+            compound ids
+        formulas : list
+            molecular formulas
+        '''
+        try:
+            _cids = np.asarray(cids, dtype=np.int64).ravel()
+            _formulas = list(formulas)
+            # check
+            if len(_cids) != len(_formulas):
+                raise Exception("cids and formulas have different lengths!")
+
+            # canonical formulas (parsed once per distinct string)
+            _canonical = {}
+            parsed = {}
+            keep = np.ones(len(_cids), dtype=bool)
+            values = []
+            for i, item in enumerate(_formulas):
+                if item not in _canonical:
+                    try:
+                        counts = Formula.parse(str(item))
+                        _canonical[item] = Formula.canonical(counts)
+                        parsed[_canonical[item]] = counts
+                    except Exception:
+                        _canonical[item] = None
+                if _canonical[item] is None:
+                    keep[i] = False
+                else:
+                    values.append(_canonical[item])
+            _cids = _cids[keep]
+
+            # merge (new compounds replace old ones)
+            if len(self.cids) > 0:
+                old = ~np.isin(self.cids, _cids)
+                _old_formulas = self.formulas[self._cid_rows()[old]]
+                _cids = np.concatenate([self.cids[old], _cids])
+                values = list(_old_formulas) + values
+            self._build(_cids, values, parsed)
+        except Exception as e:
+            raise Exception(f"adding formulas error: {e}")
+
+    def _build(self, cids: np.ndarray, values: List[str], parsed: Optional[Dict[str, Dict[str, int]]] = None):
+        '''
+        Build the arrays from cids and canonical formulas (parsed: element
+        counts of canonical formulas already parsed)
+        '''
+        if len(cids) == 0:
+            self.__init__(complete=self.complete)
+            return
+        formulas, inverse = np.unique(
+            np.asarray(values, dtype=str), return_inverse=True)
+        inverse = inverse.ravel()
+        # sort by formula then cid, a cid is kept once
+        order = np.lexsort((cids, inverse))
+        cids, inverse = cids[order], inverse[order]
+        _, first = np.unique(cids[::-1], return_index=True)
+        keep = np.zeros(len(cids), dtype=bool)
+        keep[len(cids) - 1 - first] = True
+        cids, inverse = cids[keep], inverse[keep]
+
+        # offsets
+        offsets = np.zeros(len(formulas) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(inverse, minlength=len(formulas)),
+                  out=offsets[1:])
+
+        # element counts
+        _parsed = parsed or {}
+        parsed = [_parsed.get(item) or Formula.parse(item)
+                  for item in formulas]
+        elements = sorted({key for item in parsed for key in item},
+                          key=lambda x: Formula._positions[x])
+        positions = {key: i for i, key in enumerate(elements)}
+        counts = np.zeros((len(elements), len(formulas)), dtype=np.uint16)
+        for j, item in enumerate(parsed):
+            for key, value in item.items():
+                counts[positions[key], j] = min(value, 65535)
+
+        # set
+        self.formulas = formulas
+        self.elements = tuple(elements)
+        self.counts = counts
+        self.offsets = offsets
+        self.cids = cids
+        self._rows = None
+
+    def _cid_rows(self) -> np.ndarray:
+        '''
+        Get the formula row of each cid
+        '''
+        if self._rows is None:
+            self._rows = np.repeat(np.arange(len(self.formulas)),
+                                   np.diff(self.offsets))
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self.cids)
+
+    def __repr__(self):
+        return f"FormulaIndex({len(self.cids)} compounds, {len(self.formulas)} formulas)"
+
+    # search
+    def exact(self, formula: str) -> List[str]:
+        '''
+        Get cids of a formula (other elements are not allowed)
+
+        Returns
+        -------
+        list
+            cids (str), empty if the formula is not in the index or not valid
+        '''
+        try:
+            _formula = Formula.canonical(formula)
+        except Exception:
+            return []
+        i = np.searchsorted(self.formulas, _formula)
+        # check
+        if i >= len(self.formulas) or self.formulas[i] != _formula:
+            return []
+        return [str(item) for item in self.cids[self.offsets[i]:self.offsets[i + 1]]]
+
+    def search(self, formula: str, allow_other_elements: bool = False,
+               max_records: Optional[int] = None) -> List[str]:
+        '''
+        Search cids of a formula
+
+        Parameters
+        ----------
+        formula : str
+            e.g. C6H6
+        allow_other_elements : bool
+            compounds with the same counts of the formula elements and any
+            other elements match too (default: False)
+        max_records : int
+            max number of cids (default: None, all)
+
+        Returns
+        -------
+        list
+            cids (str), empty if nothing matches or the formula is not valid
+        '''
+        # check
+        if not allow_other_elements:
+            res = self.exact(formula)
+            return res if max_records is None else res[:int(max_records)]
+
+        try:
+            counts = Formula.parse(formula)
+        except Exception:
+            return []
+        # check
+        if any(item not in self.elements for item in counts):
+            return []
+
+        # formulas with the same counts of the query elements
+        mask = np.ones(len(self.formulas), dtype=bool)
+        for key, value in counts.items():
+            mask &= self.counts[self.elements.index(key)] == value
+        res = np.sort(self.cids[mask[self._cid_rows()]])
+        if max_records is not None:
+            res = res[:int(max_records)]
+        return [str(item) for item in res]
+
+    # active index
+    @classmethod
+    def enable(cls, index: Union[str, 'FormulaIndex']) -> 'FormulaIndex':
+        '''
+        Use a complete index (or a saved index file) in get_cids_by_formula
+        and get_cids_by_molecular_formula, formulas not in the index are
+        requested from PubChem
+        '''
+        _index = index if isinstance(
+            index, FormulaIndex) else cls.load(index)
+        # check
+        if not _index.complete:
+            raise Exception(
+                "formula index is not complete (not built from a bulk file), it cannot replace PubChem searches!")
+        cls._instance = _index
+        return cls._instance
+
+    @classmethod
+    def disable(cls):
+        '''
+        Stop using the index
+        '''
+        cls._instance = None
+
+    @classmethod
+    def current(cls) -> Optional['FormulaIndex']:
+        '''
+        Get the active index, None if it is not enabled
+        '''
+        return cls._instance
+
+    # build
+    @staticmethod
+    def read_pairs(file_path: str) -> Iterable[Tuple[int, str]]:
+        '''
+        Read (cid, formula) pairs from a tab-separated bulk file (optionally
+        .gz), the first two columns are cid and formula e.g. PubChem CID-Mass
+
+        Yields
+        ------
+        tuple
+            (cid, formula)
+        '''
+        opener = gzip.open if str(file_path).endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n\r').split('\t')
+                # check
+                if len(fields) < 2 or not fields[0].strip().isdigit():
+                    continue
+                yield int(fields[0]), fields[1].strip()
+
+    @classmethod
+    def from_file(cls, file_path: str) -> 'FormulaIndex':
+        '''
+        Build a complete index from a tab-separated bulk file (all PubChem
+        compounds, e.g. CID-Mass)
+        '''
+        cids, formulas = [], []
+        for cid, formula in cls.read_pairs(file_path):
+            cids.append(cid)
+            formulas.append(formula)
+        return cls(cids, formulas, complete=True)
+
+    @classmethod
+    def from_cache(cls, cache: Optional[ResponseCache] = None) -> 'FormulaIndex':
+        '''
+        Build an index from MolecularFormula values in cached property
+        responses (the active response cache by default), the index is not
+        complete (cached compounds only)
+        '''
+        _cache = cache if cache is not None else ResponseCache.current()
+        # check
+        if _cache is None:
+            raise Exception("response cache is not enabled!")
+
+        formulas = {}
+        for res in _cache.iter_responses(family='property'):
+            try:
+                records = res.json()['PropertyTable']['Properties']
+            except Exception:
+                continue
+            for item in records:
+                if 'CID' in item and item.get('MolecularFormula'):
+                    formulas[int(item['CID'])] = item['MolecularFormula']
+        return cls(list(formulas.keys()), list(formulas.values()))
+
+    # file
+    def save(self, file_path: str):
+        '''
+        Save the index (numpy .npz)
+        '''
+        try:
+            with open(file_path, 'wb') as f:
+                np.savez(f, formulas=self.formulas, elements=np.asarray(self.elements, dtype=str),
+                         counts=self.counts, offsets=self.offsets, cids=self.cids,
+                         complete=np.asarray(self.complete))
+        except Exception as e:
+            raise Exception(f"saving formula index error: {e}")
+
+    @classmethod
+    def load(cls, file_path: str) -> 'FormulaIndex':
+        '''
+        Load an index saved by save()
+        '''
+        try:
+            index = cls()
+            with np.load(file_path) as data:
+                index.formulas = data['formulas']
+                index.elements = tuple(str(item) for item in data['elements'])
+                index.counts = data['counts']
+                index.offsets = data['offsets']
+                index.cids = data['cids']
+                index.complete = bool(data['complete']) if 'complete' in data.files else False
+            return index
+        except Exception as e:
+            raise Exception(f"loading formula index error: {e}")
@@ -0,0 +1,360 @@
+# KEY INDEX
+# ----------
+
+# import packages/modules
+import os
+import re
+import gzip
+import mmap
+import struct
+import hashlib
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+
+class InChIKeyIndex():
+    '''
+    local InChIKey (or InChI) -> cid index, memory-mapped open-addressed hash table
+
+    The file is a 64-byte header followed by 32-byte slots: the 27-byte key
+    (the InChIKey, or a blake2b digest of the InChI), a used flag and the
+    uint32 cid. Slots are addressed by a blake2b hash with linear probing at
+    a load factor <= 0.5, so a lookup reads one or a few slots of the mapped
+    file (zero-copy, shared by all processes opening the same file).
+    A key with several cids occupies one slot per cid (duplicate rows are
+    dropped). The table is built with numpy in chunks: rows are staged on
+    disk, hashed in bulk and placed by sorting on their home slot.
+    '''
+    # index kinds
+    kinds = ('inchikey', 'inchi')
+
+    # file
+    _magic = b'PCQKEY02'
+    _header = struct.Struct('<8s8sQQ32x')
+    _slot = np.dtype([('key', 'S27'), ('used', 'u1'), ('cid', '<u4')])
+
+    # rows per build chunk
+    _chunk_size = 1 << 20
+
+    # active indexes (kind -> index)
+    _instances = {}
+
+    # patterns
+    _inchikey_pattern = re.compile(r'^[A-Z]{14}-[A-Z]{10}-[A-Z]$')
+
+    def __init__(self, path: str):
+        '''
+        Open an index file
+
+        Parameters
+        ----------
+        path : str
+            index file path (made by InChIKeyIndex.build)
+        '''
+        try:
+            self.path = path
+            self._file = open(path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, kind, num_slots, count = self._header.unpack_from(self._mmap)
+            # check
+            if magic != self._magic:
+                raise Exception("file format is not valid!")
+            self.kind = kind.rstrip(b'\x00').decode('ascii')
+            self.num_slots = int(num_slots)
+            self.count = int(count)
+            self._mask = self.num_slots - 1
+        except Exception as e:
+            raise Exception(f"opening key index {path} error: {e}")
+
+    # keys
+    @staticmethod
+    def make_key(value: str, kind: str = 'inchikey') -> bytes:
+        '''
+        Make a 27-byte slot key
+
+        Parameters
+        ----------
+        value : str
+            InChIKey or InChI
+        kind : str
+            inchikey, inchi
+
+        Returns
+        -------
+        bytes
+            key
+        '''
+        if kind == 'inchikey':
+            return str(value).strip().upper().encode('ascii')[:27]
+        # inchi (whitespace is removed)
+        return hashlib.blake2b(''.join(str(value).split()).encode('utf-8'), digest_size=27).digest()
+
+    @staticmethod
+    def _mix(h: np.ndarray) -> np.ndarray:
+        # 64-bit finalizer (murmur3 fmix64)
+        h = h ^ (h >> np.uint64(33))
+        h = h*np.uint64(0xFF51AFD7ED558CCD)
+        h = h ^ (h >> np.uint64(33))
+        h = h*np.uint64(0xC4CEB9FE1A85EC53)
+        return h ^ (h >> np.uint64(33))
+
+    @staticmethod
+    def _hash_words(words: np.ndarray) -> np.ndarray:
+        '''
+        Hash keys given as uint64 words (n, 4) of the zero-padded 32-byte keys
+        '''
+        h = np.full(len(words), 0x9E3779B97F4A7C15, dtype=np.uint64)
+        for j in range(4):
+            h = InChIKeyIndex._mix(h ^ words[:, j])
+        return h
+
+    @staticmethod
+    def _hash_rows(rows: np.ndarray) -> np.ndarray:
+        '''
+        Hash the keys of slot rows (the used flag and cid bytes are masked)
+        '''
+        words = np.ascontiguousarray(rows).view('<u8').reshape(-1, 4).copy()
+        words[:, 3] &= np.uint64(0xFFFFFF)
+        return InChIKeyIndex._hash_words(words)
+
+    @staticmethod
+    def _hash(key: bytes) -> int:
+        # same as _hash_words for one key (python ints, no array overhead)
+        _mask = 0xFFFFFFFFFFFFFFFF
+        h = 0x9E3779B97F4A7C15
+        data = key.ljust(32, b'\x00')
+        for j in range(4):
+            h ^= int.from_bytes(data[8*j:8*j + 8], 'little')
+            h ^= h >> 33
+            h = (h*0xFF51AFD7ED558CCD) & _mask
+            h ^= h >> 33
+            h = (h*0xC4CEB9FE1A85EC53) & _mask
+            h ^= h >> 33
+        return h
+
+    # lookup
+    def lookup(self, value: str) -> List[str]:
+        '''
+        Get the cids of an InChIKey/InChI
+
+        Parameters
+        ----------
+        value : str
+            InChIKey or InChI (same kind as the index)
+
+        Returns
+        -------
+        list
+            cids (str), empty if the key is not in the index
+        '''
+        key = self.make_key(value, self.kind)
+        i = self._hash(key) & self._mask
+        buffer = self._mmap
+        offset = self._header.size
+        res = []
+        # probe
+        while True:
+            start = offset + 32*i
+            slot = buffer[start:start + 32]
+            # empty slot
+            if slot[27] == 0:
+                break
+            if slot[:27] == key:
+                res.append(str(int.from_bytes(slot[28:32], 'little')))
+            i = (i + 1) & self._mask
+        return res
+
+    def __contains__(self, value: str) -> bool:
+        return len(self.lookup(value)) > 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self):
+        return f"InChIKeyIndex({self.kind}, {self.count} keys, {self.path})"
+
+    def close(self):
+        '''
+        Close the mapped file
+        '''
+        self._mmap.close()
+        self._file.close()
+
+    # active indexes
+    @classmethod
+    def enable(cls, path: str) -> 'InChIKeyIndex':
+        '''
+        Open an index and use it for lookups of its kind (get_cids_by_inchikey
+        or get_cids_by_inchi), keys not in the index are requested from PubChem
+        '''
+        index = cls(path)
+        cls.disable(index.kind)
+        cls._instances[index.kind] = index
+        return index
+
+    @classmethod
+    def disable(cls, kind: Optional[str] = None):
+        '''
+        Stop using indexes (all or of a kind)
+        '''
+        for _kind in list(cls._instances.keys()):
+            if kind is None or kind == _kind:
+                cls._instances.pop(_kind).close()
+
+    @classmethod
+    def current(cls, kind: str) -> Optional['InChIKeyIndex']:
+        '''
+        Get the active index of a kind, None if it is not enabled
+        '''
+        return cls._instances.get(kind)
+
+    # build
+    @staticmethod
+    def read_pairs(file_path: str, kind: str = 'inchikey') -> Iterable[Tuple[int, str]]:
+        '''
+        Read (cid, value) pairs from a tab-separated bulk file (optionally .gz),
+        e.g. CID-InChI-Key (cid, InChI, InChIKey) or cid, InChIKey
+
+        Parameters
+        ----------
+        file_path : str
+            file path
+        kind : str
+            inchikey, inchi
+
+        Yields
+        ------
+        tuple
+            (cid, value)
+        '''
+        opener = gzip.open if str(file_path).endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n\r').split('\t')
+                # check
+                if len(fields) < 2 or not fields[0].strip().isdigit():
+                    continue
+                cid = int(fields[0])
+                for item in fields[1:]:
+                    item = item.strip()
+                    if kind == 'inchi' and item.startswith('InChI='):
+                        yield cid, item
+                        break
+                    if kind == 'inchikey' and InChIKeyIndex._inchikey_pattern.match(item):
+                        yield cid, item
+                        break
+
+    @classmethod
+    def build(cls, source, path: str, kind: str = 'inchikey') -> 'InChIKeyIndex':
+        '''
+        Build an index file
+
+        Parameters
+        ----------
+        source : str or iterable
+            tab-separated bulk file path, or (cid, value) pairs
+        path : str
+            index file path
+        kind : str
+            inchikey, inchi (default: inchikey)
+
+        Returns
+        -------
+        InChIKeyIndex
+            opened index
+        '''
+        # staged rows file
+        _rows = f"{path}.{os.getpid()}.rows"
+        _tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            # check
+            if kind not in cls.kinds:
+                raise Exception(f"index kind {kind} is not valid!")
+            pairs = cls.read_pairs(source, kind) if isinstance(
+                source, str) else source
+
+            _dir = os.path.dirname(os.path.abspath(path))
+            if not os.path.isdir(_dir):
+                os.makedirs(_dir, exist_ok=True)
+
+            # stage rows on disk in chunks (key, used, cid)
+            n = 0
+            with open(_rows, 'wb') as f:
+                for chunk in cls._chunks(pairs):
+                    rows = np.zeros(len(chunk), dtype=cls._slot)
+                    rows['key'] = [cls.make_key(value, kind) for _, value in chunk]
+                    rows['cid'] = [int(cid) for cid, _ in chunk]
+                    rows['used'] = 1
+                    f.write(rows.tobytes())
+                    n += len(chunk)
+            rows = np.memmap(_rows, dtype=cls._slot, mode='r', shape=(n,)) if n > 0 \
+                else np.zeros(0, dtype=cls._slot)
+
+            # hashes
+            hashes = np.empty(n, dtype=np.uint64)
+            for start in range(0, n, cls._chunk_size):
+                end = min(start + cls._chunk_size, n)
+                hashes[start:end] = cls._hash_rows(rows[start:end])
+            cids = np.asarray(rows['cid'], dtype=np.uint32)
+
+            # drop duplicate (key, cid) rows, equal neighbours after sorting by (hash, cid)
+            order = np.lexsort((cids, hashes))
+            if n > 1:
+                k = np.flatnonzero((hashes[order[1:]] == hashes[order[:-1]]) & (
+                    cids[order[1:]] == cids[order[:-1]]))
+                k = k[rows['key'][order[k + 1]] == rows['key'][order[k]]]
+                order = np.delete(order, k + 1)
+            count = len(order)
+
+            # table (load factor <= 0.5)
+            num_slots = 1 << max(4, int(2*max(count, 1) - 1).bit_length())
+            mask = np.uint64(num_slots - 1)
+
+            # linear probing in home slot order: a row takes the first free slot
+            # at or after its home, pos[j] = j + max(home[i] - i, i <= j)
+            homes = (hashes[order] & mask).astype(np.int64)
+            by_home = np.argsort(homes, kind='stable')
+            order, homes = order[by_home], homes[by_home]
+            steps = np.arange(count, dtype=np.int64)
+            positions = np.maximum.accumulate(homes - steps) + steps if count > 0 else steps
+            # rows past the end wrap to the first free slots from 0
+            wrapped = positions >= num_slots
+            if wrapped.any():
+                free = np.ones(num_slots, dtype=bool)
+                free[positions[~wrapped]] = False
+                positions[wrapped] = np.flatnonzero(free)[:int(wrapped.sum())]
+
+            # write (zero-filled file, slots are filled in chunks)
+            with open(_tmp, 'wb') as f:
+                f.write(cls._header.pack(cls._magic, kind.encode('ascii'), num_slots, count))
+                f.truncate(cls._header.size + num_slots*cls._slot.itemsize)
+            slots = np.memmap(_tmp, dtype=cls._slot, mode='r+',
+                              offset=cls._header.size, shape=(num_slots,))
+            for start in range(0, count, cls._chunk_size):
+                end = min(start + cls._chunk_size, count)
+                slots[positions[start:end]] = rows[order[start:end]]
+            slots.flush()
+            del slots, rows
+            os.replace(_tmp, path)
+
+            return cls(path)
+        except Exception as e:
+            raise Exception(f"building key index error: {e}")
+        finally:
+            for item in (_rows, _tmp):
+                if os.path.exists(item):
+                    os.remove(item)
+
+    @classmethod
+    def _chunks(cls, pairs: Iterable[Tuple[int, str]]) -> Iterable[List[Tuple[int, str]]]:
+        '''
+        Split (cid, value) pairs into lists of _chunk_size pairs
+        '''
+        chunk = []
+        for item in pairs:
+            chunk.append(item)
+            if len(chunk) >= cls._chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
@@ -0,0 +1,147 @@
+# LISTKEY
+# --------
+
+# import packages/modules
+import re
+import time
+from typing import Optional
+
+# local
+from .config import LISTKEY_POLL_INTERVAL, LISTKEY_TIMEOUT
+from .session import SessionManager
+
+
+class ListKeyPoller():
+    '''
+    ListKey workflow of asynchronous PUG REST searches
+
+    Broad searches (e.g. fastsimilarity_2d, fastsubstructure, fastformula)
+    may answer with a `Waiting` status and a ListKey instead of results,
+    the ListKey is then polled until the results are ready.
+    '''
+    # listkey pattern (json, xml and txt waiting responses)
+    _listkey_pattern = re.compile(r'ListKey\W*(\d+)')
+
+    def __init__(self, res=None, operation='cids/TXT', poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT):
+        '''
+        Polling state of a search, shared by the sync and async waits
+
+        Parameters
+        ----------
+        res : Response
+            pug rest response (default: None)
+        operation : str
+            output of the search (default: cids/TXT)
+        poll_interval : float
+            seconds between status requests (default: 1)
+        timeout : float
+            seconds to wait before giving up (default: 300)
+        '''
+        # set
+        self.res = res
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.listkey = None if res is None else ListKeyPoller.get_listkey(res)
+        self.url = None if self.listkey is None else ListKeyPoller.poll_url(
+            self.listkey, operation)
+        self.deadline = time.monotonic() + float(timeout)
+        # a waiting (202) response is polled again even if its body has no listkey
+        self.waiting = self.listkey is not None
+
+    def next_delay(self) -> float:
+        '''
+        Get the seconds to sleep before the next poll
+
+        Returns
+        -------
+        float
+            poll interval
+        '''
+        # check
+        if time.monotonic() + self.poll_interval > self.deadline:
+            raise Exception(
+                f'search (listkey {self.listkey}) did not finish within {self.timeout} seconds.')
+        return self.poll_interval
+
+    def update(self, res):
+        '''
+        Set the response of the last poll
+
+        Parameters
+        ----------
+        res : Response
+            pug rest response
+        '''
+        # set
+        self.res = res
+        self.waiting = res.status_code == 202 or ListKeyPoller.get_listkey(
+            res) is not None
+
+    @staticmethod
+    def get_listkey(res) -> Optional[str]:
+        '''
+        Get the ListKey of a waiting response
+
+        Parameters
+        ----------
+        res : Response
+            pug rest response
+
+        Returns
+        -------
+        str
+            listkey, None if the response is not a waiting response
+        '''
+        # check
+        if res.status_code != 202 and 'Waiting' not in res.text[:200]:
+            return None
+        match = ListKeyPoller._listkey_pattern.search(res.text)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def poll_url(listkey: str, operation='cids/TXT') -> str:
+        '''
+        Get the url of a listkey
+
+        Parameters
+        ----------
+        listkey : str
+            listkey
+        operation : str
+            output of the search (default: cids/TXT)
+
+        Returns
+        -------
+        str
+            url
+        '''
+        return f'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/listkey/{listkey}/{operation}'
+
+    @staticmethod
+    def wait(res, operation='cids/TXT', poll_interval=LISTKEY_POLL_INTERVAL, timeout=LISTKEY_TIMEOUT):
+        '''
+        Wait for a search, the response is returned as is if it is not a waiting response
+
+        Parameters
+        ----------
+        res : Response
+            pug rest response
+        operation : str
+            output of the search (default: cids/TXT)
+        poll_interval : float
+            seconds between status requests (default: 1)
+        timeout : float
+            seconds to wait before giving up (default: 300)
+
+        Returns
+        -------
+        Response
+            final response
+        '''
+        poller = ListKeyPoller(res, operation, poll_interval, timeout)
+        while poller.waiting:
+            time.sleep(poller.next_delay())
+            # poll
+            poller.update(SessionManager.get(poller.url))
+
+        return poller.res
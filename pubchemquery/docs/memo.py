@@ -0,0 +1,219 @@
+# MEMO
+# -----
+
+# import packages/modules
+import copy
+import time
+import threading
+import functools
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# local
+from .config import MEMO_SETTINGS
+
+
+class LRUCache():
+    '''
+    thread-safe in-memory LRU cache with time to live and counters
+    '''
+    # missing value
+    MISSING = object()
+
+    def __init__(self, maxsize=1000, ttl=None):
+        '''
+        Parameters
+        ----------
+        maxsize : int
+            max number of entries
+        ttl : float
+            time to live in seconds (default: None, no expiry)
+        '''
+        self.maxsize = int(maxsize)
+        self.ttl = ttl
+        # entries (key -> (timestamp, value))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        '''
+        Get a value, LRUCache.MISSING if it is not found or expired
+        '''
+        with self._lock:
+            item = self._data.get(key, self.MISSING)
+            # check
+            if item is self.MISSING:
+                self.misses += 1
+                return self.MISSING
+            timestamp, value = item
+            # ttl
+            if self.ttl is not None and time.monotonic() - timestamp > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return self.MISSING
+            # lru
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        '''
+        Set a value, the least recently used entries are evicted above maxsize
+        '''
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            # check
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def configure(self, maxsize=None, ttl=MISSING):
+        '''
+        Update maxsize and/or ttl
+        '''
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = int(maxsize)
+            if ttl is not self.MISSING:
+                self.ttl = ttl
+            # check
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        '''
+        Remove all entries and reset counters
+        '''
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self) -> Dict:
+        '''
+        Get counters
+        '''
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits/total if total > 0 else 0.0
+            }
+
+
+class Memo():
+    '''
+    in-memory memoization of lookups (identifier -> cids, cid -> properties)
+    '''
+    # caches
+    _caches = {name: LRUCache(item['maxsize'], item['ttl'])
+               for name, item in MEMO_SETTINGS.items()}
+    # enabled
+    enabled = True
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def configure(cls, name: Optional[str] = None, maxsize: Optional[int] = None, ttl=LRUCache.MISSING,
+                  enabled: Optional[bool] = None) -> Dict:
+        '''
+        Configure memo caches
+
+        Parameters
+        ----------
+        name : str
+            identifier, property (default: None, all caches)
+        maxsize : int
+            max number of entries
+        ttl : float
+            time to live in seconds, None disables expiry
+        enabled : bool
+            enable/disable memoization
+
+        Returns
+        -------
+        dict
+            stats
+        '''
+        # check
+        if enabled is not None:
+            cls.enabled = bool(enabled)
+        names = list(cls._caches.keys()) if name is None else [name]
+        for _name in names:
+            if _name not in cls._caches:
+                raise Exception(f"memo cache {_name} is not valid!")
+            cls._caches[_name].configure(maxsize=maxsize, ttl=ttl)
+        return cls.stats()
+
+    @classmethod
+    def stats(cls) -> Dict:
+        '''
+        Get hit/miss/eviction counters of all caches
+        '''
+        return {name: cache.stats() for name, cache in cls._caches.items()}
+
+    @classmethod
+    def clear(cls, name: Optional[str] = None):
+        '''
+        Clear caches
+        '''
+        for _name, cache in cls._caches.items():
+            if name is None or name == _name:
+                cache.clear()
+
+    @classmethod
+    def memoize(cls, name: str, key_func):
+        '''
+        Memoize a lookup, None results (errors, refused requests) are not
+        stored and copies of stored values are returned. The memoized
+        function gets a `cached(*args, **kwargs)` attribute returning the
+        stored value (None if it is not stored) without calling it.
+
+        Parameters
+        ----------
+        name : str
+            cache name
+        key_func : callable
+            key_func(*args, **kwargs) -> hashable key
+        '''
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                # check
+                if not cls.enabled:
+                    return func(*args, **kwargs)
+                cache = cls._caches[name]
+                key = (func.__name__, key_func(*args, **kwargs))
+                value = cache.get(key)
+                if value is LRUCache.MISSING:
+                    value = func(*args, **kwargs)
+                    if value is None:
+                        return value
+                    cache.set(key, value)
+                return copy.deepcopy(value)
+
+            def cached(*args, **kwargs):
+                # check
+                if not cls.enabled:
+                    return None
+                value = cls._caches[name].get(
+                    (func.__name__, key_func(*args, **kwargs)))
+                return None if value is LRUCache.MISSING else copy.deepcopy(value)
+
+            wrapper.cached = cached
+            return wrapper
+        return decorator
@@ -0,0 +1,424 @@
+# NEGATIVE CACHE
+# ---------------
+
+# import packages/modules
+import os
+import math
+import time
+import struct
+import atexit
+import hashlib
+import threading
+import contextlib
+from typing import Optional, Dict
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# local
+from .config import (NEGATIVE_CACHE_PATH, NEGATIVE_CACHE_TTL, NEGATIVE_CACHE_CAPACITY,
+                     NEGATIVE_CACHE_ERROR_RATE)
+
+
+class BloomFilter():
+    '''
+    compact bloom filter (bit array, double hashing)
+    '''
+
+    def __init__(self, capacity: int = NEGATIVE_CACHE_CAPACITY, error_rate: float = NEGATIVE_CACHE_ERROR_RATE,
+                 num_bits: Optional[int] = None, num_hashes: Optional[int] = None, bits: Optional[bytes] = None):
+        '''
+        Parameters
+        ----------
+        capacity : int
+            expected number of items
+        error_rate : float
+            false positive rate at capacity, 0 < error_rate < 1
+        num_bits : int
+            number of bits (default: computed from capacity and error_rate)
+        num_hashes : int
+            number of hash functions (default: computed from capacity and error_rate)
+        bits : bytes
+            bit array (loaded filter)
+        '''
+        # check
+        if not 0 < error_rate < 1:
+            raise Exception("error rate must be between 0 and 1!")
+        capacity = max(int(capacity), 1)
+
+        # optimal size
+        if num_bits is None:
+            num_bits = int(math.ceil(-capacity*math.log(error_rate)/(math.log(2)**2)))
+        if num_hashes is None:
+            num_hashes = max(
+                1, int(round(num_bits/capacity*math.log(2))))
+        self.num_bits = int(num_bits)
+        self.num_hashes = int(num_hashes)
+        self.bits = bytearray(bits) if bits is not None else bytearray(
+            (self.num_bits + 7)//8)
+        # number of added items
+        self.count = 0
+
+    def _positions(self, item: str):
+        '''
+        Bit positions of an item
+        '''
+        digest = hashlib.blake2b(
+            str(item).encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i*h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str) -> bool:
+        '''
+        Add an item
+
+        Returns
+        -------
+        bool
+            True if the item is new (at least one bit is set), only new
+            items are counted
+        '''
+        new = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def merge(self, bits: bytes):
+        '''
+        Merge the bit array of a filter with the same settings (bitwise OR),
+        the count is estimated from the number of set bits
+        '''
+        self.bits = bytearray(
+            (int.from_bytes(self.bits, 'little') | int.from_bytes(bits, 'little')).to_bytes(len(self.bits), 'little'))
+        self.count = self.estimate_count()
+
+    def estimate_count(self) -> int:
+        '''
+        Estimate the number of items from the number of set bits
+        '''
+        ones = int.from_bytes(self.bits, 'little').bit_count()
+        if ones >= self.num_bits:
+            return self.num_bits
+        return int(round(-self.num_bits/self.num_hashes*math.log(1 - ones/self.num_bits)))
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def clear(self):
+        '''
+        Remove all items
+        '''
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
+
+
+class NegativeCache():
+    '''
+    persistent cache of identifiers not found on pubchem (404)
+
+    Two bloom filter generations are kept, new identifiers are added to the
+    current one, which replaces the previous one every ttl/2 seconds, so an
+    identifier is forgotten after ttl/2 to ttl seconds. The filters are saved
+    to a file and loaded again in the next run, a save merges the filters
+    with the file (bitwise OR) under a file lock, so processes sharing the
+    file keep each other's identifiers.
+    '''
+    # active cache
+    _instance = None
+    # file
+    _magic = b'PCQNEG01'
+    _header = struct.Struct('<8sQIddQQ')
+    # seconds between saves
+    save_interval = 5.0
+
+    def __init__(self, path: Optional[str] = NEGATIVE_CACHE_PATH, ttl: float = NEGATIVE_CACHE_TTL,
+                 capacity: int = NEGATIVE_CACHE_CAPACITY, error_rate: float = NEGATIVE_CACHE_ERROR_RATE):
+        '''
+        Parameters
+        ----------
+        path : str
+            file path (default: ~/.pubchemquery/negative.bloom), None keeps it in memory
+        ttl : float
+            time to live of a not found identifier in seconds (default: 7 days)
+        capacity : int
+            expected number of not found identifiers per generation (default: 100000)
+        error_rate : float
+            false positive rate (default: 0.001)
+        '''
+        self.path = path
+        self.ttl = float(ttl)
+        self.capacity = int(capacity)
+        self.error_rate = float(error_rate)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved = time.monotonic()
+
+        # generations
+        now = time.time()
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._previous = BloomFilter(self.capacity, self.error_rate)
+        self._created = now
+        self._previous_created = now - self.ttl/2
+
+        # load
+        if path is not None and os.path.isfile(path):
+            self._load()
+
+    # active cache
+    @classmethod
+    def enable(cls, path: Optional[str] = NEGATIVE_CACHE_PATH, ttl: float = NEGATIVE_CACHE_TTL,
+               capacity: int = NEGATIVE_CACHE_CAPACITY,
+               error_rate: float = NEGATIVE_CACHE_ERROR_RATE) -> 'NegativeCache':
+        '''
+        Enable the negative cache for identifier lookups
+        '''
+        cache = cls(path, ttl=ttl, capacity=capacity, error_rate=error_rate)
+        # replace
+        if cls._instance is not None:
+            cls._instance.save()
+        cls._instance = cache
+        return cache
+
+    @classmethod
+    def disable(cls):
+        '''
+        Disable the negative cache (the filters are saved)
+        '''
+        if cls._instance is not None:
+            cls._instance.save()
+        cls._instance = None
+
+    @classmethod
+    def current(cls) -> Optional['NegativeCache']:
+        '''
+        Get the active negative cache, None if it is disabled
+        '''
+        return cls._instance
+
+    @staticmethod
+    def make_key(kind: str, *values) -> str:
+        '''
+        Make a key, e.g. make_key('name', 'complete', 'benzene')
+        '''
+        return '\x1f'.join([str(kind)] + [str(item) for item in values])
+
+    def _rotate(self):
+        '''
+        Start a new generation every ttl/2 seconds (lock held)
+        '''
+        now = time.time()
+        age = now - self._created
+        # check
+        if age < self.ttl/2:
+            return
+        if age >= self.ttl:
+            # both generations expired
+            self._previous = BloomFilter(self.capacity, self.error_rate)
+            self._previous_created = now - self.ttl/2
+        else:
+            self._previous = self._current
+            self._previous_created = self._created
+        self._current = BloomFilter(self.capacity, self.error_rate)
+        self._created = now
+        self._dirty = True
+
+    def contains(self, key: str) -> bool:
+        '''
+        Check an identifier is known to be not found
+        '''
+        with self._lock:
+            self._rotate()
+            return key in self._current or key in self._previous
+
+    def add(self, key: str):
+        '''
+        Add a not found identifier
+        '''
+        with self._lock:
+            self._rotate()
+            if self._current.add(key):
+                self._dirty = True
+            # check
+            if time.monotonic() - self._saved > self.save_interval:
+                self._save()
+
+    def save(self):
+        '''
+        Save the filters to the file
+        '''
+        with self._lock:
+            self._save()
+
+    def _save(self, merge: bool = True):
+        '''
+        Save the filters (lock held), merged with the file unless merge is False
+        '''
+        # check
+        if self.path is None or not self._dirty:
+            return
+        _dir = os.path.dirname(os.path.abspath(self.path))
+        if not os.path.isdir(_dir):
+            os.makedirs(_dir, exist_ok=True)
+
+        with self._file_lock():
+            # identifiers saved by other processes
+            generations = self._read() if merge else None
+            if generations is not None:
+                self._merge(generations)
+            # write and replace
+            _tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(_tmp, 'wb') as f:
+                f.write(self._header.pack(self._magic, self._current.num_bits, self._current.num_hashes,
+                                          self._created, self._previous_created,
+                                          self._current.count, self._previous.count))
+                f.write(self._current.bits)
+                f.write(self._previous.bits)
+            os.replace(_tmp, self.path)
+        self._dirty = False
+        self._saved = time.monotonic()
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        '''
+        Lock the file for other processes (no-op without fcntl)
+        '''
+        # check
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", 'a+b') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _read(self):
+        '''
+        Read the generations of the file, None if it is missing or has other settings
+
+        Returns
+        -------
+        list
+            [(created, bits), (previous_created, previous_bits)]
+        '''
+        # check
+        if not os.path.isfile(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if len(data) < self._header.size:
+            return None
+        magic, num_bits, num_hashes, created, previous_created, _, _ = \
+            self._header.unpack_from(data)
+        # check
+        if magic != self._magic or num_bits != self._current.num_bits or \
+                num_hashes != self._current.num_hashes:
+            return None
+        size = len(self._current.bits)
+        offset = self._header.size
+        if len(data) != offset + 2*size:
+            return None
+        return [(created, data[offset:offset + size]), (previous_created, data[offset + size:])]
+
+    def _merge(self, generations):
+        '''
+        Merge generations read from the file (lock held), generations of
+        the newest half ttl form the current filter and older ones that
+        have not expired form the previous filter
+        '''
+        items = [(self._created, bytes(self._current.bits)),
+                 (self._previous_created, bytes(self._previous.bits))] + list(generations)
+        newest = max(created for created, _ in items)
+        current = [item for item in items if item[0] > newest - self.ttl/2]
+        previous = [item for item in items
+                    if newest - self.ttl < item[0] <= newest - self.ttl/2]
+
+        # current
+        self._current = BloomFilter(
+            num_bits=self._current.num_bits, num_hashes=self._current.num_hashes)
+        for _, bits in current:
+            self._current.merge(bits)
+        self._created = min(created for created, _ in current)
+        # previous
+        self._previous = BloomFilter(
+            num_bits=self._current.num_bits, num_hashes=self._current.num_hashes)
+        for _, bits in previous:
+            self._previous.merge(bits)
+        self._previous_created = min([created for created, _ in previous],
+                                     default=self._created - self.ttl/2)
+
+    def _load(self):
+        '''
+        Load the filters, a file with other settings is ignored
+        '''
+        try:
+            generations = self._read()
+            # check
+            if generations is None:
+                return
+            (created, bits), (previous_created, previous_bits) = generations
+            # set
+            self._current = BloomFilter(
+                num_bits=self._current.num_bits, num_hashes=self._current.num_hashes, bits=bits)
+            self._current.count = self._current.estimate_count()
+            self._previous = BloomFilter(
+                num_bits=self._current.num_bits, num_hashes=self._current.num_hashes, bits=previous_bits)
+            self._previous.count = self._previous.estimate_count()
+            self._created = created
+            self._previous_created = previous_created
+            with self._lock:
+                self._rotate()
+        except Exception as e:
+            print(f"negative cache {self.path} is not loaded: {e}")
+
+    def clear(self):
+        '''
+        Remove all identifiers
+        '''
+        with self._lock:
+            self._current.clear()
+            self._previous.clear()
+            self._created = time.time()
+            self._dirty = True
+            self._save(merge=False)
+
+    def stats(self) -> Dict:
+        '''
+        Get negative cache statistics
+
+        Returns
+        -------
+        dict
+            path, ttl, number of identifiers and size of the filters
+        '''
+        with self._lock:
+            return {
+                'path': self.path,
+                'ttl': self.ttl,
+                'capacity': self.capacity,
+                'error_rate': self.error_rate,
+                'count': self._current.count + self._previous.count,
+                'size': len(self._current.bits) + len(self._previous.bits),
+                'num_hashes': self._current.num_hashes
+            }
+
+
+@atexit.register
+def _save_negative_cache():
+    '''
+    Save the active negative cache on exit
+    '''
+    cache = NegativeCache.current()
+    if cache is not None:
+        try:
+            cache.save()
+        except Exception:
+            pass
@@ -0,0 +1,204 @@
+# RATE LIMIT
+# -----------
+
+# import packages/modules
+import time
+import threading
+
+# local
+from .config import RATE_LIMITS
+
+
+class TokenBucket():
+    '''
+    thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    A reservation takes a token immediately and returns how long the
+    caller has to wait before sending, so waiting can be done by
+    `time.sleep` or `asyncio.sleep`.
+    '''
+
+    def __init__(self, rate, capacity=None):
+        # check
+        if rate is None or float(rate) <= 0:
+            raise Exception('rate must be a positive number.')
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+        # state
+        self._tokens = self.capacity
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def delay(self, tokens=1) -> float:
+        '''
+        Get the delay in seconds before tokens are available (nothing is taken)
+        '''
+        with self._lock:
+            now = time.monotonic()
+            available = min(self.capacity, self._tokens +
+                            (now - self._timestamp)*self.rate)
+            # check
+            if available >= tokens:
+                return 0.0
+            return (tokens - available)/self.rate
+
+    def reserve(self, tokens=1) -> float:
+        '''
+        Reserve tokens
+
+        Parameters
+        ----------
+        tokens : int
+            number of tokens (default: 1)
+
+        Returns
+        -------
+        float
+            delay in seconds before the reserved tokens are available
+        '''
+        with self._lock:
+            # refill
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens +
+                               (now - self._timestamp)*self.rate)
+            self._timestamp = now
+            # take
+            self._tokens -= tokens
+            # check
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens/self.rate
+
+    def acquire(self, tokens=1) -> float:
+        '''
+        Block until tokens are available
+
+        Returns
+        -------
+        float
+            waited time in seconds
+        '''
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class RateLimiter():
+    '''
+    process-wide rate limiter
+
+    Every request takes a token from the `global` bucket and, if one is
+    configured, from the bucket of its endpoint family. Tokens are taken
+    only when all buckets have one available, so waiting for a family
+    does not use global tokens.
+    '''
+    # buckets
+    _buckets = {}
+    # default buckets created
+    _loaded = False
+    # lock
+    _lock = threading.Lock()
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def _load(cls):
+        '''
+        Create buckets from default settings
+        '''
+        if not cls._loaded:
+            with cls._lock:
+                if not cls._loaded:
+                    for family, item in RATE_LIMITS.items():
+                        cls._buckets.setdefault(family, TokenBucket(
+                            item['rate'], item.get('capacity')))
+                    cls._loaded = True
+
+    @classmethod
+    def configure(cls, rate=None, capacity=None, family='global'):
+        '''
+        Set the rate limit of an endpoint family
+
+        Parameters
+        ----------
+        rate : float
+            requests per second, None removes the limit
+        capacity : int
+            burst size (default: rate)
+        family : str
+            global, property, image, search, structure, identifier, listkey, default
+
+        Returns
+        -------
+        dict
+            current limits
+        '''
+        cls._load()
+        with cls._lock:
+            if rate is None:
+                cls._buckets.pop(family, None)
+            else:
+                cls._buckets[family] = TokenBucket(rate, capacity)
+        return cls.limits()
+
+    @classmethod
+    def limits(cls) -> dict:
+        '''
+        Get current limits
+        '''
+        cls._load()
+        return {family: {'rate': bucket.rate, 'capacity': bucket.capacity}
+                for family, bucket in cls._buckets.items()}
+
+    @classmethod
+    def reserve(cls, family='default') -> float:
+        '''
+        Reserve a request slot, tokens are taken only if every bucket of
+        the request has one available
+
+        Parameters
+        ----------
+        family : str
+            endpoint family
+
+        Returns
+        -------
+        float
+            0 if the slot is reserved, otherwise the delay in seconds before
+            trying again (nothing is reserved)
+        '''
+        cls._load()
+        with cls._lock:
+            # buckets
+            buckets = [cls._buckets.get(name) for name in (
+                ('global',) if family == 'global' else ('global', family))]
+            buckets = [bucket for bucket in buckets if bucket is not None]
+            # waits
+            delay = max([bucket.delay() for bucket in buckets], default=0.0)
+            if delay > 0:
+                return delay
+            # take
+            for bucket in buckets:
+                bucket.reserve()
+        return 0.0
+
+    @classmethod
+    def acquire(cls, family='default') -> float:
+        '''
+        Block until a request slot is available
+
+        Returns
+        -------
+        float
+            waited time in seconds
+        '''
+        waited = 0.0
+        delay = cls.reserve(family)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = cls.reserve(family)
+        return waited
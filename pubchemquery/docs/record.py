@@ -0,0 +1,131 @@
+# RECORD
+# -------
+
+# import packages/modules
+from collections.abc import MutableMapping
+from typing import Dict, Optional
+
+# local
+from .config import PROPERTY_NAMES
+
+
+class CompoundRecord():
+    '''
+    compact per-instance compound record
+
+    Each property is a slot (no per-object __dict__), unset properties are None.
+    '''
+    # fields
+    __slots__ = ('cid', 'name', 'image', 'similar_structure_cids', 'sdf') + PROPERTY_NAMES
+
+    # property names
+    property_names = PROPERTY_NAMES
+
+    def __init__(self, cid=0, name: str = '', **properties):
+        '''
+        Parameters
+        ----------
+        cid : int or str
+            compound id
+        name : str
+            compound name
+        properties : dict
+            property values e.g. MolecularWeight='78.11'
+        '''
+        self.cid = cid
+        self.name = name
+        self.image = None
+        self.similar_structure_cids = []
+        self.sdf = None
+        for key in PROPERTY_NAMES:
+            setattr(self, key, None)
+        # set
+        if properties:
+            self.update(properties)
+
+    def get(self, key: str, default=None):
+        '''
+        Get a property value
+        '''
+        if key in PROPERTY_NAMES:
+            value = getattr(self, key)
+            return default if value is None else value
+        return default
+
+    def update(self, data: Dict):
+        '''
+        Set properties from a PropertyTable record (unknown keys are skipped)
+
+        Parameters
+        ----------
+        data : dict
+            property record e.g. {'CID': 2244, 'MolecularWeight': '180.16', ...}
+        '''
+        for key, value in data.items():
+            if key in PROPERTY_NAMES:
+                setattr(self, key, value)
+
+    def to_dict(self) -> Dict:
+        '''
+        Get properties as a dict (property name -> value)
+        '''
+        return {key: getattr(self, key) for key in PROPERTY_NAMES}
+
+    @classmethod
+    def from_dict(cls, data: Dict, name: Optional[str] = '') -> 'CompoundRecord':
+        '''
+        Make a record from a PropertyTable record
+        '''
+        return cls(data.get('CID', 0), name, **data)
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for key in self.__slots__}
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def __repr__(self):
+        return f"CompoundRecord(cid={self.cid!r}, name={self.name!r})"
+
+
+class PropertyView(MutableMapping):
+    '''
+    live dict-like view of the record properties (property name -> value)
+
+    Writes go to the record, so `compound.prop['Title'] = 'x'` is seen by
+    `compound.Title`. Only property names are valid keys and properties
+    cannot be deleted.
+    '''
+    __slots__ = ('_record',)
+
+    def __init__(self, record: CompoundRecord):
+        self._record = record
+
+    def __getitem__(self, key):
+        if key not in PROPERTY_NAMES:
+            raise KeyError(key)
+        return getattr(self._record, key)
+
+    def __setitem__(self, key, value):
+        if key not in PROPERTY_NAMES:
+            raise KeyError(f"{key} is not a compound property!")
+        setattr(self._record, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("compound properties cannot be deleted!")
+
+    def __iter__(self):
+        return iter(PROPERTY_NAMES)
+
+    def __len__(self):
+        return len(PROPERTY_NAMES)
+
+    def copy(self) -> Dict:
+        '''
+        Get a plain dict copy
+        '''
+        return self._record.to_dict()
+
+    def __repr__(self):
+        return repr(self._record.to_dict())
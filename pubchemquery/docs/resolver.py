@@ -0,0 +1,221 @@
+# RESOLVER
+# ---------
+
+# import packages/modules
+import re
+from typing import Dict, Iterable, Union, Tuple
+
+# local
+from .api import PubChemAPI
+from .config import ELEMENTS
+from .util import CoreUtility
+from .cache import OfflineCacheMissError
+
+
+class IdentifierResolver():
+    '''
+    bulk identifier resolution (name, InChI, InChIKey, SMILES, formula -> cids)
+
+    Identifiers are normalized and deduplicated, each unique identifier is
+    requested once and the requests run concurrently under the rate limit.
+    '''
+    # identifier types
+    identifier_types = ['name', 'inchi', 'inchikey', 'smiles', 'formula']
+
+    # statuses
+    FOUND = 'found'
+    NOT_FOUND = 'not_found'
+    AMBIGUOUS = 'ambiguous'
+    ERROR = 'error'
+
+    # patterns
+    _inchikey_pattern = re.compile(r'^[A-Z]{14}-[A-Z]{10}-[A-Z]$')
+    _formula_pattern = re.compile(r'([A-Z][a-z]?)(\d*)')
+    _smiles_pattern = re.compile(r'^[A-Za-z0-9@+\-\[\]\(\)=#$:/\\.%*]+$')
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def detect_type(identifier: str) -> str:
+        '''
+        Detect the type of an identifier
+
+        Parameters
+        ----------
+        identifier : str
+            e.g. benzene, InChI=1S/C6H6/c1-2-4-6-5-3-1/h1-6H, UHOVQNZJYSORNB-UHFFFAOYSA-N, c1ccccc1, C6H6
+
+        Returns
+        -------
+        str
+            inchi, inchikey, formula, smiles, name
+
+        Notes
+        -----
+        A flat formula (element symbols with counts, each element once) is
+        detected before SMILES, e.g. CO is a formula and CCO is a SMILES,
+        set the type explicitly for identifiers that are ambiguous.
+        '''
+        # set
+        _val = str(identifier).strip()
+
+        # inchi
+        if _val.startswith('InChI='):
+            return 'inchi'
+        # inchikey
+        if IdentifierResolver._inchikey_pattern.match(_val):
+            return 'inchikey'
+        # whitespace is only found in names
+        if len(_val.split()) > 1:
+            return 'name'
+        # formula
+        tokens = IdentifierResolver._formula_pattern.findall(_val)
+        if len(tokens) > 0 and ''.join(a + b for a, b in tokens) == _val:
+            symbols = [a for a, _ in tokens]
+            if all(item in ELEMENTS for item in symbols) and len(set(symbols)) == len(symbols):
+                return 'formula'
+        # smiles
+        if IdentifierResolver._smiles_pattern.match(_val):
+            # lowercase letters outside brackets are aromatic atoms (or Cl, Br)
+            _atoms = re.sub(r'\[[^\]]*\]', '', _val).replace(
+                'Cl', '').replace('Br', '')
+            if all(ch in 'bcnops' for ch in _atoms if ch.islower()):
+                return 'smiles'
+
+        return 'name'
+
+    @staticmethod
+    def normalize(identifier: str, identifier_type: str) -> Tuple[str, str]:
+        '''
+        Normalize an identifier
+
+        Parameters
+        ----------
+        identifier : str
+            identifier
+        identifier_type : str
+            name, inchi, inchikey, smiles, formula
+
+        Returns
+        -------
+        tuple
+            (query, key), query is sent to pubchem and key is used for deduplication
+        '''
+        # set
+        _val = str(identifier).strip()
+
+        # check
+        if identifier_type == 'name':
+            query = ' '.join(_val.split())
+            return query, query.casefold()
+        elif identifier_type == 'inchi':
+            query = ''.join(_val.split())
+            return query, query
+        elif identifier_type == 'inchikey':
+            query = _val.upper()
+            return query, query
+        else:
+            return _val, _val
+
+    @staticmethod
+    def _search(identifier_type: str, query: str):
+        '''
+        Search cids of a normalized identifier
+        '''
+        if identifier_type == 'name':
+            return PubChemAPI.get_cid_by_name(query, name_type='complete')
+        elif identifier_type == 'inchi':
+            return PubChemAPI.get_cids_by_inchi(query)
+        elif identifier_type == 'inchikey':
+            return PubChemAPI.get_cids_by_inchikey(query)
+        elif identifier_type == 'smiles':
+            return PubChemAPI.get_cids_by_smiles(query)
+        elif identifier_type == 'formula':
+            return PubChemAPI.get_cids_by_formula(query)
+        else:
+            raise Exception(f"identifier type {identifier_type} is not valid!")
+
+    @staticmethod
+    def resolve(identifiers: Iterable[Union[str, Tuple[str, str]]], identifier_type: str = 'auto',
+                max_workers: int = 4) -> Dict[str, Dict]:
+        '''
+        Resolve identifiers to cids
+
+        Parameters
+        ----------
+        identifiers : iterable
+            identifiers, an item can be a (identifier, identifier_type) tuple
+        identifier_type : str
+            auto, name, inchi, inchikey, smiles, formula (default: auto)
+        max_workers : int
+            max number of requests in flight (default: 4)
+
+        Returns
+        -------
+        dict
+            {identifier: {'type': str, 'query': str, 'status': str, 'cids': list}},
+            status is found (one cid), ambiguous (more than one cid), not_found or error
+        '''
+        try:
+            # set
+            inputs = {}
+            queries = {}
+
+            for item in identifiers:
+                # type
+                if isinstance(item, (tuple, list)):
+                    _val, _type = str(item[0]), str(item[1]).lower()
+                else:
+                    _val, _type = str(item), str(identifier_type).lower()
+                if _type == 'auto':
+                    _type = IdentifierResolver.detect_type(_val)
+                # check
+                if _type not in IdentifierResolver.identifier_types:
+                    raise Exception(f"identifier type {_type} is not valid!")
+                # dedup
+                if _val in inputs:
+                    continue
+                query, key = IdentifierResolver.normalize(_val, _type)
+                inputs[_val] = (_type, key)
+                queries.setdefault((_type, key), query)
+
+            def _fetch(i, item):
+                (_type, _), query = item
+                try:
+                    return IdentifierResolver._search(_type, query)
+                except Exception as e:
+                    OfflineCacheMissError.reraise(e)
+                    print(e)
+                    return None
+
+            # unique requests
+            _queries = list(queries.items())
+            results = CoreUtility.map_concurrent(
+                _fetch, _queries, max_workers=max_workers)
+            cids = {item[0]: res for item, res in zip(_queries, results)}
+
+            # result
+            res = {}
+            for _val, (_type, key) in inputs.items():
+                _cids = cids[(_type, key)]
+                if _cids is None:
+                    status = IdentifierResolver.ERROR
+                    _cids = []
+                elif len(_cids) == 0:
+                    status = IdentifierResolver.NOT_FOUND
+                elif len(_cids) == 1:
+                    status = IdentifierResolver.FOUND
+                else:
+                    status = IdentifierResolver.AMBIGUOUS
+                res[_val] = {
+                    'type': _type,
+                    'query': queries[(_type, key)],
+                    'status': status,
+                    'cids': list(_cids)
+                }
+
+            return res
+        except Exception as e:
+            OfflineCacheMissError.reraise(e)
+            raise Exception(f"identifier resolution error: {e}")
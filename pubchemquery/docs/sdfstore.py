@@ -0,0 +1,331 @@
+# SDF STORE
+# ----------
+
+# import packages/modules
+import os
+import gzip
+import mmap
+import shutil
+import struct
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+class SDFStore():
+    '''
+    memory-mapped SDF store (one concatenated SDF file with a cid index)
+
+    Records are kept in a single SDF file (e.g. a PubChem bulk SDF or
+    records appended by get_sdf_by_cids) next to an index file of
+    (cid, offset, length) entries, a store has one writer process. Records are read as memoryview slices of
+    the mapped file (zero-copy), new records are appended to both files
+    without a rebuild; a later record of a cid replaces the earlier one.
+    '''
+    # index file
+    _magic = b'PCQSDF01'
+    _header = struct.Struct('<8sQ')
+    _entry = np.dtype([('cid', '<u8'), ('offset', '<u8'), ('length', '<u8')])
+
+    # record
+    _terminator = b'$$$$'
+    _cid_tag = b'<PUBCHEM_COMPOUND_CID>'
+
+    def __init__(self, path: str):
+        '''
+        Open (or create) a store, the index is rebuilt if it is missing and
+        records appended to the SDF file by other tools are indexed
+
+        Parameters
+        ----------
+        path : str
+            sdf file path, the index is saved as path + '.idx'
+        '''
+        try:
+            self.path = path
+            self.index_path = path + '.idx'
+            self._lock = threading.Lock()
+            self._mmap = None
+            self._recent = {}
+
+            # files
+            _dir = os.path.dirname(os.path.abspath(path))
+            if not os.path.isdir(_dir):
+                os.makedirs(_dir, exist_ok=True)
+            if not os.path.exists(path):
+                open(path, 'wb').close()
+            size = os.path.getsize(path)
+
+            # index
+            entries, indexed = self._read_index()
+            if indexed > size:
+                entries, indexed = np.zeros(0, dtype=self._entry), 0
+            self._remap()
+            if indexed < size or not os.path.exists(self.index_path):
+                # records not indexed yet
+                _new = self._scan(indexed, size)
+                entries = np.concatenate([entries, _new])
+                self._write_index(entries, size)
+            self._load(entries)
+        except Exception as e:
+            raise Exception(f"opening sdf store {path} error: {e}")
+
+    # index
+    def _read_index(self) -> Tuple[np.ndarray, int]:
+        '''
+        Read index entries and the indexed size of the sdf file
+        '''
+        # check
+        if not os.path.exists(self.index_path):
+            return np.zeros(0, dtype=self._entry), 0
+        with open(self.index_path, 'rb') as f:
+            header = f.read(self._header.size)
+            if len(header) < self._header.size:
+                return np.zeros(0, dtype=self._entry), 0
+            magic, size = self._header.unpack(header)
+            # check
+            if magic != self._magic:
+                raise Exception("index file format is not valid!")
+            data = f.read()
+        n = len(data) // self._entry.itemsize
+        return np.frombuffer(data[:n*self._entry.itemsize], dtype=self._entry).copy(), int(size)
+
+    def _write_index(self, entries: np.ndarray, size: int):
+        '''
+        Write the index file
+        '''
+        _path = self.index_path + '.tmp'
+        with open(_path, 'wb') as f:
+            f.write(self._header.pack(self._magic, size))
+            f.write(entries.tobytes())
+        os.replace(_path, self.index_path)
+
+    def _load(self, entries: np.ndarray):
+        '''
+        Load index entries (sorted by cid, the last entry of a cid is kept)
+        '''
+        order = np.lexsort((np.arange(len(entries)), entries['cid']))
+        _entries = entries[order]
+        keep = np.ones(len(_entries), dtype=bool)
+        keep[:-1] = _entries['cid'][1:] != _entries['cid'][:-1]
+        _entries = _entries[keep]
+        self._cids = np.ascontiguousarray(_entries['cid'])
+        self._offsets = np.ascontiguousarray(_entries['offset'])
+        self._lengths = np.ascontiguousarray(_entries['length'])
+        self._recent = {}
+
+    def _remap(self):
+        '''
+        Map the sdf file (again after it has grown)
+        '''
+        size = os.path.getsize(self.path)
+        old = self._mmap
+        self._mmap = None
+        if size > 0:
+            with open(self.path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # check
+        if old is not None:
+            try:
+                old.close()
+            except BufferError:
+                # records of the old map are still in use, it is closed when released
+                pass
+
+    def _scan(self, start: int, end: int) -> np.ndarray:
+        '''
+        Index records of the sdf file between start and end
+        '''
+        res = []
+        data = self._mmap
+        # check
+        if data is None or start >= end:
+            return np.zeros(0, dtype=self._entry)
+        pos = start
+        while pos < end:
+            i = data.find(self._terminator, pos, end)
+            if i < 0:
+                break
+            # record end (terminator line and its newline), the next record
+            # starts right after it (its first line is the title, maybe blank)
+            j = data.find(b'\n', i, end)
+            j = end if j < 0 else j + 1
+            cid = self._read_cid(data, pos, i)
+            if cid is not None:
+                res.append((cid, pos, j - pos))
+            pos = j
+        return np.array(res, dtype=self._entry)
+
+    @classmethod
+    def _read_cid(cls, data, start: int, end: int) -> Optional[int]:
+        '''
+        Read the cid of a record (PUBCHEM_COMPOUND_CID tag or the header line)
+        '''
+        k = data.find(cls._cid_tag, start, end)
+        if k >= 0:
+            line_start = data.find(b'\n', k, end) + 1
+            line_end = data.find(b'\n', line_start, end)
+            value = data[line_start:line_end if line_end >= 0 else end].strip()
+        else:
+            line_end = data.find(b'\n', start, end)
+            value = data[start:line_end if line_end >= 0 else end].strip()
+        return int(value) if value.isdigit() else None
+
+    # read
+    def _locate(self, cid) -> Optional[Tuple[int, int]]:
+        '''
+        Get (offset, length) of a record
+        '''
+        _cid = int(cid)
+        item = self._recent.get(_cid)
+        if item is not None:
+            return item
+        # uint64 key (a python int would convert the whole array)
+        i = np.searchsorted(self._cids, np.uint64(_cid))
+        if i < len(self._cids) and self._cids[i] == _cid:
+            return int(self._offsets[i]), int(self._lengths[i])
+        return None
+
+    def get(self, cid: Union[int, str]) -> Optional[memoryview]:
+        '''
+        Get a record as a memoryview of the mapped file (zero-copy)
+
+        Returns
+        -------
+        memoryview
+            sdf record bytes, None if the cid is not in the store
+        '''
+        item = self._locate(cid)
+        # check
+        if item is None:
+            return None
+        offset, length = item
+        # the map is replaced under the lock (append, remap)
+        with self._lock:
+            if self._mmap is None or offset + length > len(self._mmap):
+                self._remap()
+            return memoryview(self._mmap)[offset:offset + length]
+
+    def get_text(self, cid: Union[int, str]) -> Optional[str]:
+        '''
+        Get a record as a string, None if the cid is not in the store
+        '''
+        res = self.get(cid)
+        return None if res is None else str(res, 'utf-8')
+
+    def __contains__(self, cid) -> bool:
+        try:
+            return self._locate(cid) is not None
+        except (TypeError, ValueError):
+            return False
+
+    def __len__(self) -> int:
+        _new = [cid for cid in self._recent if not self._in_index(cid)]
+        return len(self._cids) + len(_new)
+
+    def _in_index(self, cid: int) -> bool:
+        i = np.searchsorted(self._cids, np.uint64(cid))
+        return bool(i < len(self._cids) and self._cids[i] == cid)
+
+    def __repr__(self):
+        return f"SDFStore({len(self)} records, {self.path})"
+
+    def cids(self) -> List[int]:
+        '''
+        Get cids of the stored records
+        '''
+        res = set(int(item) for item in self._cids)
+        res.update(self._recent.keys())
+        return sorted(res)
+
+    # write
+    def append(self, cid: Union[int, str], record: Union[str, bytes]):
+        '''
+        Append a record (replaces an older record of the cid)
+
+        Parameters
+        ----------
+        cid : int or str
+            compound id
+        record : str or bytes
+            sdf record (terminated by $$$$)
+        '''
+        self.extend([(cid, record)])
+
+    def extend(self, records: Union[Dict, Iterable[Tuple[Union[int, str], Union[str, bytes]]]]):
+        '''
+        Append records, {cid: record} or (cid, record) pairs
+        '''
+        items = records.items() if isinstance(records, dict) else records
+        with self._lock:
+            entries = []
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                for cid, record in items:
+                    # the record is kept as is (the title line may be blank)
+                    _record = record.encode('utf-8') if isinstance(
+                        record, str) else bytes(record)
+                    # terminator
+                    if self._terminator not in _record[-8:]:
+                        _record = _record.rstrip(b'\r\n') + b'\n' + self._terminator
+                    if not _record.endswith(b'\n'):
+                        _record += b'\n'
+                    f.write(_record)
+                    entries.append((int(cid), offset, len(_record)))
+                    offset += len(_record)
+            # check
+            if len(entries) == 0:
+                return
+
+            # index
+            _entries = np.array(entries, dtype=self._entry)
+            with open(self.index_path, 'r+b') as f:
+                f.seek(0, os.SEEK_END)
+                f.write(_entries.tobytes())
+                f.seek(0)
+                f.write(self._header.pack(self._magic, offset))
+            for cid, _offset, length in entries:
+                self._recent[cid] = (_offset, length)
+
+    # build
+    @classmethod
+    def build(cls, source: str, path: str) -> 'SDFStore':
+        '''
+        Make a store from an sdf file (optionally .gz, e.g. a PubChem bulk
+        Compound_*.sdf.gz), the records are copied to path and indexed
+
+        Parameters
+        ----------
+        source : str
+            sdf file path
+        path : str
+            store sdf file path
+
+        Returns
+        -------
+        SDFStore
+            opened store
+        '''
+        try:
+            # check
+            if os.path.abspath(source) != os.path.abspath(path):
+                opener = gzip.open if str(source).endswith('.gz') else open
+                with opener(source, 'rb') as src, open(path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024*1024)
+                if os.path.exists(path + '.idx'):
+                    os.remove(path + '.idx')
+            return cls(path)
+        except Exception as e:
+            raise Exception(f"building sdf store error: {e}")
+
+    def close(self):
+        '''
+        Unmap the sdf file
+        '''
+        with self._lock:
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    pass
+                self._mmap = None
@@ -0,0 +1,272 @@
+# SESSION
+# --------
+
+# import packages/modules
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# local
+from .config import SESSION_SETTINGS, OFFLINE
+from .ratelimit import RateLimiter
+from .cache import ResponseCache, OfflineCacheMissError
+from .util import UtilityAPI
+from .singleflight import SingleFlight
+
+
+class SessionManager():
+    '''
+    shared http session for all PUG REST requests
+
+    A single `requests.Session` (keep-alive, connection pooling) is created
+    on first use and reused by every call and thread in the process.
+    '''
+    # session
+    _session = None
+    # settings
+    _settings = dict(SESSION_SETTINGS)
+    # lock
+    _lock = threading.Lock()
+    # in-flight requests
+    _flight = SingleFlight()
+    # offline mode
+    _offline = OFFLINE
+
+    def __init__(self):
+        pass
+
+    @classmethod
+    def configure(cls, pool_connections=None, pool_maxsize=None, max_retries=None, timeout=None, coalesce=None):
+        '''
+        Configure the shared session, the current session is closed and
+        a new one is created on the next request.
+
+        Parameters
+        ----------
+        pool_connections : int
+            number of connection pools to cache
+        pool_maxsize : int
+            max number of connections kept alive in a pool
+        max_retries : int
+            number of retries on connection errors
+        timeout : float or tuple
+            default request timeout in seconds, (connect, read)
+        coalesce : bool
+            concurrent identical requests share one in-flight request
+
+        Returns
+        -------
+        dict
+            current settings
+        '''
+        try:
+            # new settings
+            _settings = {
+                'pool_connections': pool_connections,
+                'pool_maxsize': pool_maxsize,
+                'max_retries': max_retries,
+                'timeout': timeout,
+                'coalesce': coalesce,
+            }
+
+            with cls._lock:
+                # update
+                for key, value in _settings.items():
+                    if value is not None:
+                        cls._settings[key] = value
+                # reset session
+                if cls._session is not None:
+                    cls._session.close()
+                    cls._session = None
+
+            return dict(cls._settings)
+        except Exception as e:
+            raise Exception(f"session configuration error: {e}")
+
+    @classmethod
+    def settings(cls) -> dict:
+        '''
+        Get current session settings
+        '''
+        return dict(cls._settings)
+
+    @classmethod
+    def set_offline(cls, enabled: bool = True):
+        '''
+        Enable/disable offline mode, requests are answered from the response
+        cache (expired responses included) and a cache miss raises
+        OfflineCacheMissError instead of sending the request. The default
+        cache is enabled if no cache is active.
+
+        ListKey searches (asynchronous 202 answers and their polling) are
+        never cached, so they cannot be replayed and raise
+        OfflineCacheMissError in offline mode.
+
+        Parameters
+        ----------
+        enabled : bool
+            offline mode (default: True), PUBCHEMQUERY_OFFLINE=1 enables it at import
+        '''
+        cls._offline = bool(enabled)
+        # check
+        if cls._offline and ResponseCache.current() is None:
+            ResponseCache.enable()
+
+    @classmethod
+    def is_offline(cls) -> bool:
+        '''
+        Check offline mode is enabled
+        '''
+        return cls._offline
+
+    @classmethod
+    def replay(cls, method, url, **kwargs):
+        '''
+        Answer a request from the response cache (offline mode)
+
+        Returns
+        -------
+        HttpResponse
+            cached response
+
+        Raises
+        ------
+        OfflineCacheMissError
+            the request is not cached
+        '''
+        cache = ResponseCache.current()
+        # check
+        if cache is None:
+            cache = ResponseCache.enable()
+        key = ResponseCache.make_key(
+            method, url, kwargs.get('params'), kwargs.get('data'))
+        res = cache.get(key, UtilityAPI.get_endpoint_family(url), ignore_ttl=True)
+        if res is None:
+            raise OfflineCacheMissError(method, url)
+        return res
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        '''
+        Get the shared session (created on first use)
+
+        Returns
+        -------
+        requests.Session
+            shared session
+        '''
+        # check
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    # adapter
+                    adapter = HTTPAdapter(
+                        pool_connections=cls._settings['pool_connections'],
+                        pool_maxsize=cls._settings['pool_maxsize'],
+                        max_retries=cls._settings['max_retries'],
+                        pool_block=False)
+                    # session
+                    session = requests.Session()
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    cls._session = session
+
+        return cls._session
+
+    @classmethod
+    def request(cls, method, url, **kwargs) -> requests.Response:
+        '''
+        Send a request through the shared session, the response is taken
+        from the cache (if enabled), otherwise the request waits for the
+        rate limit of its endpoint family. Concurrent identical requests
+        (same method, url, params and body) share one in-flight request.
+
+        Parameters
+        ----------
+        method : str
+            GET, POST
+        url : str
+            request url
+        kwargs : dict
+            requests keyword arguments (data, params, timeout, ...)
+
+        Returns
+        -------
+        requests.Response
+            response
+        '''
+        # offline
+        if cls._offline:
+            return cls.replay(method, url, **kwargs)
+
+        # default timeout
+        kwargs.setdefault('timeout', cls._settings['timeout'])
+        # endpoint family
+        family = UtilityAPI.get_endpoint_family(url)
+
+        # key
+        key = ResponseCache.make_key(
+            method, url, kwargs.get('params'), kwargs.get('data'))
+
+        # cache
+        cache = ResponseCache.current()
+        if cache is not None and cache.is_cacheable(url, family, kwargs.get('params')):
+            res = cache.get(key, family)
+            if res is not None:
+                return res
+        else:
+            cache = None
+
+        # coalesce
+        if cls._settings.get('coalesce', True):
+            return cls._flight.do(key, cls._send, method, url, family, key, cache, **kwargs)
+        return cls._send(method, url, family, key, cache, **kwargs)
+
+    @classmethod
+    def _send(cls, method, url, family, key, cache, **kwargs) -> requests.Response:
+        '''
+        Send a request after the rate limit and cache the response
+        '''
+        # rate limit
+        RateLimiter.acquire(family)
+        # send
+        res = cls.get_session().request(method, url, **kwargs)
+        # load the body once for all callers
+        res.content
+
+        # cache
+        if cache is not None:
+            cache.set(key, url, family, res)
+
+        return res
+
+    @classmethod
+    def coalesce_stats(cls) -> dict:
+        '''
+        Get in-flight and coalesced request counters
+        '''
+        return cls._flight.stats()
+
+    @classmethod
+    def get(cls, url, **kwargs) -> requests.Response:
+        '''
+        Send a GET request through the shared session
+        '''
+        return cls.request('GET', url, **kwargs)
+
+    @classmethod
+    def post(cls, url, data=None, **kwargs) -> requests.Response:
+        '''
+        Send a POST request through the shared session
+        '''
+        return cls.request('POST', url, data=data, **kwargs)
+
+    @classmethod
+    def close(cls):
+        '''
+        Close the shared session and release its connections
+        '''
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
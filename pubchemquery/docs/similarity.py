@@ -0,0 +1,299 @@
+# SIMILARITY INDEX
+# -----------------
+
+# import packages/modules
+import numpy as np
+from typing import List, Optional, Tuple
+
+# local
+from .fingerprint import Fingerprint
+from .cache import ResponseCache
+
+
+class SimilarityIndex():
+    '''
+    local 2d similarity search over PubChem substructure fingerprints
+
+    Fingerprints are stored as uint64 words sorted by popcount. A query
+    with a bits set can only reach a Tanimoto score t against fingerprints
+    with b bits where t*a <= b <= a/t, so only those popcount bins are
+    scored (threshold search), and bins are scored in order of decreasing
+    bound until no remaining bin can enter the top k (top-k search).
+    '''
+
+    def __init__(self, cids=None, fingerprints=None):
+        '''
+        Parameters
+        ----------
+        cids : array
+            compound ids
+        fingerprints : array
+            uint64 words (n, 14), packed uint8 bytes (n, 111) or Fingerprint2D strings
+        '''
+        self.cids = np.zeros(0, dtype=np.int64)
+        self.words = np.zeros((0, Fingerprint.NUM_WORDS), dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int32)
+        # bin offsets by popcount, bins[c]:bins[c + 1]
+        self.bins = np.zeros(Fingerprint.NUM_BITS + 2, dtype=np.int64)
+        self._positions = None
+        # set
+        if cids is not None:
+            self.add(cids, fingerprints)
+
+    @staticmethod
+    def _to_words(fingerprints) -> np.ndarray:
+        '''
+        Convert fingerprints to uint64 words
+        '''
+        # strings
+        if not isinstance(fingerprints, np.ndarray) or fingerprints.dtype == object:
+            _fps = list(fingerprints)
+            # check
+            if len(_fps) == 0:
+                return np.zeros((0, Fingerprint.NUM_WORDS), dtype=np.uint64)
+            if len(_fps) > 0 and (_fps[0] is None or isinstance(_fps[0], str)):
+                return Fingerprint.to_words(Fingerprint.decode_many(_fps))
+            fingerprints = np.asarray(_fps)
+        # check
+        if fingerprints.size == 0:
+            return np.zeros((0, Fingerprint.NUM_WORDS), dtype=np.uint64)
+        return Fingerprint._words(fingerprints).reshape(-1, Fingerprint.NUM_WORDS)
+
+    def add(self, cids, fingerprints):
+        '''
+        Add fingerprints, a cid already in the index is replaced
+
+        Parameters
+        ----------
+        cids : array
+            compound ids
+        fingerprints : array
+            uint64 words (n, 14), packed uint8 bytes (n, 111) or Fingerprint2D strings
+        '''
+        _cids = np.asarray(list(cids) if not isinstance(cids, np.ndarray) else cids,
+                           dtype=np.int64).reshape(-1)
+        _words = self._to_words(fingerprints)
+        # check
+        if len(_cids) != len(_words):
+            raise Exception("number of cids and fingerprints is not the same!")
+
+        # merge (new values replace old ones)
+        cids_all = np.concatenate([_cids, self.cids])
+        words_all = np.concatenate([_words, self.words])
+        _, index = np.unique(cids_all, return_index=True)
+        cids_all, words_all = cids_all[index], words_all[index]
+
+        # drop empty fingerprints (missing)
+        counts = Fingerprint.popcount(words_all).astype(np.int32)
+        keep = counts > 0
+
+        # sort by popcount
+        order = np.argsort(counts[keep], kind='stable')
+        self.cids = cids_all[keep][order]
+        self.words = np.ascontiguousarray(words_all[keep][order])
+        self.counts = counts[keep][order]
+        self.bins = np.searchsorted(self.counts, np.arange(
+            Fingerprint.NUM_BITS + 2), side='left').astype(np.int64)
+        self._positions = None
+        return self
+
+    def __len__(self) -> int:
+        return len(self.cids)
+
+    def __contains__(self, cid) -> bool:
+        return self._position(cid) is not None
+
+    def __repr__(self):
+        return f"SimilarityIndex({len(self)} fingerprints)"
+
+    def _position(self, cid) -> Optional[int]:
+        '''
+        Get the row of a cid
+        '''
+        if self._positions is None:
+            self._positions = {int(item): i for i,
+                               item in enumerate(self.cids)}
+        return self._positions.get(int(cid))
+
+    def _query(self, query) -> np.ndarray:
+        '''
+        Get query words from a cid, a Fingerprint2D string or a fingerprint array
+        '''
+        if isinstance(query, str) and not query.strip().isdigit():
+            return Fingerprint.to_words(Fingerprint.decode(query))
+        if isinstance(query, np.ndarray):
+            return Fingerprint._words(query).reshape(Fingerprint.NUM_WORDS)
+        # cid
+        i = self._position(query)
+        if i is None:
+            raise Exception(f"cid {query} is not found in the similarity index!")
+        return self.words[i]
+
+    def _score_range(self, query: np.ndarray, low: int, high: int) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Score fingerprints with popcount in [low, high]
+        '''
+        start = self.bins[max(low, 0)]
+        end = self.bins[min(high, Fingerprint.NUM_BITS) + 1]
+        if end <= start:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        scores = Fingerprint.tanimoto(query, self.words[start:end])
+        return np.arange(start, end), scores
+
+    def search(self, query, threshold: float = 0.9, max_records: Optional[int] = None) -> List[Tuple[int, float]]:
+        '''
+        Find fingerprints with Tanimoto score >= threshold
+
+        Parameters
+        ----------
+        query : int, str or np.ndarray
+            cid in the index, Fingerprint2D string or fingerprint
+        threshold : float
+            min score, 0 < threshold <= 1 (default: 0.9)
+        max_records : int
+            max number of results (default: None, all)
+
+        Returns
+        -------
+        list
+            (cid, score) sorted by score (descending)
+        '''
+        # check
+        if not 0 < threshold <= 1:
+            raise Exception("threshold must be between 0 and 1!")
+        _query = self._query(query)
+        count = int(Fingerprint.popcount(_query))
+        if count == 0 or len(self) == 0:
+            return []
+
+        # popcount bound
+        low = int(np.ceil(threshold*count - 1e-9))
+        high = int(np.floor(count/threshold + 1e-9))
+        rows, scores = self._score_range(_query, low, high)
+
+        # filter
+        keep = scores >= threshold - 1e-12
+        rows, scores = rows[keep], scores[keep]
+        order = np.lexsort((self.cids[rows], -scores))
+        if max_records is not None:
+            order = order[:int(max_records)]
+        return [(int(self.cids[rows[i]]), float(scores[i])) for i in order]
+
+    def top_k(self, query, k: int = 10) -> List[Tuple[int, float]]:
+        '''
+        Find the k most similar fingerprints
+
+        Parameters
+        ----------
+        query : int, str or np.ndarray
+            cid in the index, Fingerprint2D string or fingerprint
+        k : int
+            number of results (default: 10)
+
+        Returns
+        -------
+        list
+            (cid, score) sorted by score (descending)
+        '''
+        _query = self._query(query)
+        count = int(Fingerprint.popcount(_query))
+        if count == 0 or len(self) == 0 or k <= 0:
+            return []
+
+        # bins ordered by bound min(a, b)/max(a, b)
+        sizes = np.diff(self.bins)[:Fingerprint.NUM_BITS + 1]
+        values = np.flatnonzero(sizes)
+        bounds = np.minimum(values, count)/np.maximum(values, count)
+        order = np.argsort(-bounds, kind='stable')
+
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_scores = np.zeros(0, dtype=np.float64)
+        for i in order:
+            # check
+            if len(best_scores) >= k and bounds[i] < best_scores.min():
+                break
+            rows, scores = self._score_range(
+                _query, int(values[i]), int(values[i]))
+            best_rows = np.concatenate([best_rows, rows])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > k:
+                # keep the first k by (score, cid), ties at the boundary included
+                index = np.lexsort((self.cids[best_rows], -best_scores))[:k]
+                best_rows, best_scores = best_rows[index], best_scores[index]
+
+        order = np.lexsort((self.cids[best_rows], -best_scores))
+        return [(int(self.cids[best_rows[i]]), float(best_scores[i])) for i in order]
+
+    def get_cids_by_2d_similarity(self, cid, max_records="all", threshold=90) -> List[Tuple[str, float]]:
+        '''
+        Local counterpart of PubChemAPI.get_cids_by_2d_similarity (no network)
+
+        Parameters
+        ----------
+        cid : str or int
+            compound id (in the index)
+        max_records : int or str
+            max number of results (default: all)
+        threshold : int
+            min Tanimoto score in percent (default: 90)
+
+        Returns
+        -------
+        list
+            (cid, score) sorted by score (descending), cid is a str as in the remote search
+        '''
+        _max = None if str(max_records).strip().lower() == 'all' else int(max_records)
+        res = self.search(int(cid), threshold=float(threshold)/100, max_records=_max)
+        return [(str(item), score) for item, score in res]
+
+    # build
+    @classmethod
+    def from_table(cls, table) -> 'SimilarityIndex':
+        '''
+        Build an index from a CompoundTable with a Fingerprint2D column
+        '''
+        return cls(table.cids, table.fingerprints(words=True))
+
+    @classmethod
+    def from_cache(cls, cache: Optional[ResponseCache] = None) -> 'SimilarityIndex':
+        '''
+        Build an index from Fingerprint2D values in cached property responses
+        (the active response cache by default)
+        '''
+        _cache = cache if cache is not None else ResponseCache.current()
+        # check
+        if _cache is None:
+            raise Exception("response cache is not enabled!")
+
+        fps = {}
+        for res in _cache.iter_responses(family='property'):
+            try:
+                records = res.json()['PropertyTable']['Properties']
+            except Exception:
+                continue
+            for item in records:
+                if 'CID' in item and item.get('Fingerprint2D'):
+                    fps[int(item['CID'])] = item['Fingerprint2D']
+        return cls(list(fps.keys()), list(fps.values()))
+
+    # file
+    def save(self, file_path: str):
+        '''
+        Save the index (numpy .npz)
+        '''
+        try:
+            with open(file_path, 'wb') as f:
+                np.savez(f, cids=self.cids, words=self.words)
+        except Exception as e:
+            raise Exception(f"saving similarity index error: {e}")
+
+    @classmethod
+    def load(cls, file_path: str) -> 'SimilarityIndex':
+        '''
+        Load an index saved by save()
+        '''
+        try:
+            with np.load(file_path) as data:
+                return cls(data['cids'], data['words'])
+        except Exception as e:
+            raise Exception(f"loading similarity index error: {e}")
@@ -0,0 +1,140 @@
+# SINGLE FLIGHT
+# --------------
+
+# import packages/modules
+import asyncio
+import threading
+import weakref
+from typing import Dict
+
+
+class _Call():
+    '''
+    in-flight call (sync)
+    '''
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight():
+    '''
+    request coalescing, concurrent calls with the same key share one
+    in-flight call and all receive its result (or exception)
+    '''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        # number of calls served by another in-flight call
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        '''
+        Run func(*args, **kwargs) once for concurrent calls with the same key
+
+        Parameters
+        ----------
+        key : hashable
+            call key
+        func : callable
+            function
+
+        Returns
+        -------
+        object
+            func result
+        '''
+        with self._lock:
+            call = self._calls.get(key)
+            # check
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        # follower
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        # leader
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def stats(self) -> Dict:
+        '''
+        Get in-flight and coalesced call counters
+        '''
+        with self._lock:
+            return {'in_flight': len(self._calls), 'coalesced': self.coalesced}
+
+
+class AsyncSingleFlight():
+    '''
+    request coalescing for coroutines, concurrent calls with the same key
+    (in the same event loop) await one shared task
+    '''
+
+    def __init__(self):
+        # tasks (event loop -> {key: task})
+        self._tasks = weakref.WeakKeyDictionary()
+        # number of calls served by another in-flight call
+        self.coalesced = 0
+
+    async def do(self, key, coro_func, *args, **kwargs):
+        '''
+        Await coro_func(*args, **kwargs) once for concurrent calls with the same key
+
+        Parameters
+        ----------
+        key : hashable
+            call key
+        coro_func : callable
+            coroutine function
+
+        Returns
+        -------
+        object
+            coroutine result
+        '''
+        loop = asyncio.get_running_loop()
+        tasks = self._tasks.setdefault(loop, {})
+        task = tasks.get(key)
+        # check
+        if task is None:
+            task = loop.create_task(coro_func(*args, **kwargs))
+            tasks[key] = task
+
+            def _done(_task, _key=key):
+                if tasks.get(_key) is _task:
+                    del tasks[_key]
+            task.add_done_callback(_done)
+        else:
+            self.coalesced += 1
+        # a cancelled caller does not cancel the shared task
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        '''
+        Get in-flight and coalesced call counters
+        '''
+        return {'in_flight': sum(len(item) for item in self._tasks.values()),
+                'coalesced': self.coalesced}
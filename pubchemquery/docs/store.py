@@ -0,0 +1,350 @@
+# PROPERTY STORE
+# ---------------
+
+# import packages/modules
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+# local
+from .config import PROPERTY_NAMES, PROPERTY_TYPES, PROPERTY_STORE_PATH, PROPERTY_STORE_INDEXES
+
+
+class PropertyStore():
+    '''
+    local compound property store (sqlite)
+
+    Every PropertyTable row fetched from PubChem is upserted into a table
+    with one typed column per property (REAL, INTEGER, TEXT), only the
+    fetched properties of a row are replaced. Frequently filtered columns
+    are indexed so range queries are answered locally.
+    '''
+    # column types
+    _sql_types = {'float': 'REAL', 'int': 'INTEGER', 'str': 'TEXT'}
+    _converters = {'float': float, 'int': int, 'str': str}
+
+    # active store
+    _instance = None
+
+    def __init__(self, path: str = PROPERTY_STORE_PATH, indexes: Iterable[str] = PROPERTY_STORE_INDEXES):
+        '''
+        Parameters
+        ----------
+        path : str
+            sqlite file path (default: ~/.pubchemquery/properties.sqlite)
+        indexes : iterable
+            indexed columns (default: PROPERTY_STORE_INDEXES)
+        '''
+        self.path = path
+
+        # database
+        _dir = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(_dir):
+            os.makedirs(_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        _columns = ', '.join(
+            f'{name} {self._sql_types[PROPERTY_TYPES[name]]}' for name in PROPERTY_NAMES)
+        self._conn.execute(
+            f'CREATE TABLE IF NOT EXISTS properties (CID INTEGER PRIMARY KEY, {_columns}, updated REAL NOT NULL)')
+        # indexes
+        for name in indexes:
+            self.create_index(name)
+
+    # active store
+    @classmethod
+    def enable(cls, path: str = PROPERTY_STORE_PATH, indexes: Iterable[str] = PROPERTY_STORE_INDEXES) -> 'PropertyStore':
+        '''
+        Enable the store, fetched properties are upserted into it
+        '''
+        store = cls(path, indexes=indexes)
+        # replace
+        if cls._instance is not None:
+            cls._instance.close()
+        cls._instance = store
+        return store
+
+    @classmethod
+    def disable(cls):
+        '''
+        Disable the store (stored properties are kept on disk)
+        '''
+        if cls._instance is not None:
+            cls._instance.close()
+        cls._instance = None
+
+    @classmethod
+    def current(cls) -> Optional['PropertyStore']:
+        '''
+        Get the active store, None if it is disabled
+        '''
+        return cls._instance
+
+    @classmethod
+    def save_fetched(cls, data: Union[Dict, Iterable[Dict]]) -> int:
+        '''
+        Upsert fetched properties (a PropertyTable json response or records)
+        into the active store. A store error is printed and does not fail
+        the request that fetched the properties.
+
+        Returns
+        -------
+        int
+            number of upserted rows (0 if the store is disabled or fails)
+        '''
+        store = cls.current()
+        # check
+        if store is None:
+            return 0
+        try:
+            if isinstance(data, dict):
+                return store.upsert_response(data)
+            return store.upsert(data)
+        except Exception as e:
+            print(f"property store error: {e}")
+            return 0
+
+    # columns
+    @staticmethod
+    def _column(name: str) -> str:
+        '''
+        Check a column name (CID or a property name)
+        '''
+        if name != 'CID' and name not in PROPERTY_TYPES:
+            raise Exception(f"property {name} is not valid!")
+        return name
+
+    def create_index(self, name: str):
+        '''
+        Index a column
+        '''
+        _name = self._column(name)
+        with self._lock:
+            self._conn.execute(
+                f'CREATE INDEX IF NOT EXISTS properties_{_name} ON properties ({_name})')
+
+    @staticmethod
+    def _convert(name: str, value):
+        '''
+        Convert a property value to its column type, None if it is not valid
+        '''
+        if value is None:
+            return None
+        try:
+            return PropertyStore._converters[PROPERTY_TYPES[name]](value)
+        except (TypeError, ValueError):
+            return None
+
+    # write
+    def upsert(self, records: Iterable[Dict]) -> int:
+        '''
+        Insert or update PropertyTable rows, properties missing in a row are kept
+
+        Parameters
+        ----------
+        records : iterable
+            property records e.g. [{'CID': 2244, 'MolecularWeight': '180.16'}, ...]
+
+        Returns
+        -------
+        int
+            number of upserted rows
+        '''
+        # rows grouped by columns
+        groups = {}
+        count = 0
+        now = time.time()
+        for item in records:
+            # check
+            if not isinstance(item, dict) or 'CID' not in item:
+                continue
+            names = tuple(name for name in PROPERTY_NAMES if name in item)
+            groups.setdefault(names, []).append(
+                (int(item['CID']),) + tuple(self._convert(name, item[name]) for name in names) + (now,))
+            count += 1
+
+        # check
+        if count == 0:
+            return 0
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for names, rows in groups.items():
+                    _columns = ', '.join(('CID',) + names + ('updated',))
+                    _values = ', '.join('?'*(len(names) + 2))
+                    _update = ', '.join(f'{name} = excluded.{name}'
+                                        for name in names + ('updated',))
+                    self._conn.executemany(
+                        f'INSERT INTO properties ({_columns}) VALUES ({_values}) '
+                        f'ON CONFLICT(CID) DO UPDATE SET {_update}', rows)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+        return count
+
+    def upsert_response(self, res: Dict) -> int:
+        '''
+        Upsert the rows of a PropertyTable json response
+        '''
+        try:
+            records = res['PropertyTable']['Properties']
+        except (KeyError, TypeError):
+            return 0
+        return self.upsert(records)
+
+    # read
+    def _where(self, filters: Optional[Dict] = None):
+        '''
+        Make a where clause
+
+        A filter value can be a (min, max) tuple (inclusive, None is open),
+        a list/set (any of the values) or a value (equal), e.g.
+        {'MolecularWeight': (100, 200), 'HBondDonorCount': (None, 2)}
+        '''
+        clauses = []
+        params = []
+        for name, value in (filters or {}).items():
+            _name = self._column(name)
+            if isinstance(value, tuple):
+                # check
+                if len(value) != 2:
+                    raise Exception(
+                        f"range of {name} must be a (min, max) tuple!")
+                low, high = value
+                if low is not None:
+                    clauses.append(f'{_name} >= ?')
+                    params.append(low)
+                if high is not None:
+                    clauses.append(f'{_name} <= ?')
+                    params.append(high)
+                if low is None and high is None:
+                    clauses.append(f'{_name} IS NOT NULL')
+            elif isinstance(value, (list, set, frozenset)):
+                _values = list(value)
+                if len(_values) == 0:
+                    clauses.append('0')
+                else:
+                    clauses.append(
+                        f"{_name} IN ({', '.join('?'*len(_values))})")
+                    params.extend(_values)
+            elif value is None:
+                clauses.append(f'{_name} IS NULL')
+            else:
+                clauses.append(f'{_name} = ?')
+                params.append(value)
+
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        return where, params
+
+    def query(self, filters: Optional[Dict] = None, columns: Optional[Iterable[str]] = None,
+              order_by: Optional[Union[str, Iterable[str]]] = None, limit: Optional[int] = None,
+              **kwargs) -> List[Dict]:
+        '''
+        Query stored properties
+
+        Parameters
+        ----------
+        filters : dict
+            {property: (min, max) | [values] | value}, e.g.
+            {'MolecularWeight': (100, 200), 'HBondDonorCount': (None, 2)}
+        columns : iterable
+            properties to return (default: None, all)
+        order_by : str or list
+            sort columns, a leading - sorts descending e.g. -XLogP (default: CID)
+        limit : int
+            max number of rows (default: None, all)
+        kwargs : dict
+            filters as keyword arguments e.g. MolecularWeight=(100, 200)
+
+        Returns
+        -------
+        list
+            property records e.g. [{'CID': 2244, 'MolecularWeight': 180.16, ...}, ...],
+            missing properties are not included
+        '''
+        try:
+            # filters
+            _filters = dict(filters or {})
+            _filters.update(kwargs)
+            where, params = self._where(_filters)
+
+            # columns
+            names = [self._column(name) for name in (
+                columns or PROPERTY_NAMES) if name != 'CID']
+            _columns = ', '.join(['CID'] + names)
+
+            # order
+            if order_by is None:
+                _order = 'CID'
+            else:
+                _order = ', '.join(
+                    f'{self._column(item[1:])} DESC' if item.startswith('-') else self._column(item)
+                    for item in ([order_by] if isinstance(order_by, str) else order_by))
+
+            sql = f'SELECT {_columns} FROM properties{where} ORDER BY {_order}'
+            if limit is not None:
+                sql += ' LIMIT ?'
+                params.append(int(limit))
+
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+
+            keys = ['CID'] + names
+            return [{key: value for key, value in zip(keys, row) if value is not None} for row in rows]
+        except Exception as e:
+            raise Exception(f"property store query error: {e}")
+
+    def cids(self, filters: Optional[Dict] = None, **kwargs) -> List[int]:
+        '''
+        Get cids of stored compounds matching filters (see query)
+        '''
+        _filters = dict(filters or {})
+        _filters.update(kwargs)
+        where, params = self._where(_filters)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT CID FROM properties{where} ORDER BY CID', params).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, filters: Optional[Dict] = None, **kwargs) -> int:
+        '''
+        Count stored compounds matching filters (see query)
+        '''
+        _filters = dict(filters or {})
+        _filters.update(kwargs)
+        where, params = self._where(_filters)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM properties{where}', params).fetchone()[0]
+
+    def get(self, cid: Union[int, str]) -> Optional[Dict]:
+        '''
+        Get the stored properties of a compound, None if it is not stored
+        '''
+        res = self.query({'CID': int(cid)})
+        return res[0] if len(res) > 0 else None
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def clear(self):
+        '''
+        Remove stored properties
+        '''
+        with self._lock:
+            self._conn.execute('DELETE FROM properties')
+            self._conn.execute('VACUUM')
+
+    def close(self):
+        '''
+        Close the database connection
+        '''
+        with self._lock:
+            self._conn.close()
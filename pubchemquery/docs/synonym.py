@@ -0,0 +1,263 @@
+# SYNONYM INDEX
+# --------------
+
+# import packages/modules
+import os
+import re
+import json
+import gzip
+import hashlib
+from array import array
+import numpy as np
+from typing import Iterable, List, Optional, Tuple
+
+
+class SynonymIndex():
+    '''
+    local name/synonym -> cid index (exact and word matching)
+
+    Names are case-folded and whitespace-normalized, then hashed (64-bit
+    blake2b). Exact matches binary-search a sorted array of name hashes
+    aligned with a cid array, the cids of a name keep the order of the
+    source file (the first-listed cid first). Word matches use an inverted index: sorted
+    token hashes with offsets into posting lists of sorted unique cids, a
+    query with several words intersects their posting lists. The arrays
+    are saved as .npy files in a directory and opened with mmap.
+    '''
+    # files
+    _files = ('name_hashes', 'name_cids', 'token_hashes',
+              'token_offsets', 'postings')
+
+    # tokens
+    _token_pattern = re.compile(r'[^\W_]+')
+
+    # active index
+    _instance = None
+
+    def __init__(self, path: str, mmap_mode: Optional[str] = 'r'):
+        '''
+        Open an index directory
+
+        Parameters
+        ----------
+        path : str
+            index directory (made by SynonymIndex.build)
+        mmap_mode : str
+            numpy mmap mode (default: r), None loads the arrays in memory
+        '''
+        try:
+            self.path = path
+            with open(os.path.join(path, 'meta.json'), 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            for name in self._files:
+                setattr(self, name, np.load(os.path.join(
+                    path, f'{name}.npy'), mmap_mode=mmap_mode))
+        except Exception as e:
+            raise Exception(f"opening synonym index {path} error: {e}")
+
+    # keys
+    @staticmethod
+    def normalize(name: str) -> str:
+        '''
+        Normalize a name (case-folded, single spaces)
+        '''
+        return ' '.join(str(name).split()).casefold()
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    @staticmethod
+    def tokenize(name: str) -> List[str]:
+        '''
+        Split a normalized name into unique words
+        '''
+        return list(dict.fromkeys(SynonymIndex._token_pattern.findall(name)))
+
+    # lookup
+    def exact(self, name: str) -> List[str]:
+        '''
+        Get cids of a name (name_type='complete')
+
+        Returns
+        -------
+        list
+            cids (str) in source file order, empty if the name is not in the index
+        '''
+        key = np.uint64(self._hash(self.normalize(name)))
+        start = np.searchsorted(self.name_hashes, key, side='left')
+        end = np.searchsorted(self.name_hashes, key, side='right')
+        return [str(int(item)) for item in self.name_cids[start:end]]
+
+    def _postings(self, token: str) -> np.ndarray:
+        '''
+        Get the cids of a token
+        '''
+        key = np.uint64(self._hash(token))
+        i = np.searchsorted(self.token_hashes, key, side='left')
+        if i >= len(self.token_hashes) or self.token_hashes[i] != key:
+            return np.zeros(0, dtype=np.uint32)
+        return self.postings[self.token_offsets[i]:self.token_offsets[i + 1]]
+
+    def words(self, name: str) -> List[str]:
+        '''
+        Get cids of names containing all words of a query (name_type='word')
+
+        Returns
+        -------
+        list
+            cids (str), empty if no name matches
+        '''
+        tokens = self.tokenize(self.normalize(name))
+        # check
+        if len(tokens) == 0:
+            return []
+        # rarest first
+        postings = sorted((self._postings(token)
+                          for token in tokens), key=len)
+        res = postings[0]
+        for item in postings[1:]:
+            if len(res) == 0:
+                break
+            res = np.intersect1d(res, item, assume_unique=True)
+        return [str(int(item)) for item in res]
+
+    def lookup(self, name: str, name_type: str = 'complete') -> List[str]:
+        '''
+        Get cids of a name, name_type is complete (exact) or word
+        '''
+        return self.words(name) if name_type == 'word' else self.exact(name)
+
+    def __len__(self) -> int:
+        return int(self.meta.get('names', len(self.name_hashes)))
+
+    def __repr__(self):
+        return f"SynonymIndex({len(self.name_hashes)} names, {len(self.token_hashes)} words, {self.path})"
+
+    # active index
+    @classmethod
+    def enable(cls, path: str) -> 'SynonymIndex':
+        '''
+        Open an index and use it in get_cid_by_name, names not in the index
+        and ambiguous complete names (several cids) are requested from PubChem
+        '''
+        cls._instance = cls(path)
+        return cls._instance
+
+    @classmethod
+    def disable(cls):
+        '''
+        Stop using the index
+        '''
+        cls._instance = None
+
+    @classmethod
+    def current(cls) -> Optional['SynonymIndex']:
+        '''
+        Get the active index, None if it is not enabled
+        '''
+        return cls._instance
+
+    # build
+    @staticmethod
+    def read_pairs(file_path: str) -> Iterable[Tuple[int, str]]:
+        '''
+        Read (cid, synonym) pairs from a tab-separated bulk file (optionally .gz),
+        e.g. PubChem CID-Synonym-filtered
+
+        Yields
+        ------
+        tuple
+            (cid, synonym)
+        '''
+        opener = gzip.open if str(file_path).endswith('.gz') else open
+        with opener(file_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                fields = line.rstrip('\n\r').split('\t', 1)
+                # check
+                if len(fields) < 2 or not fields[0].strip().isdigit():
+                    continue
+                yield int(fields[0]), fields[1]
+
+    @classmethod
+    def build(cls, source, path: str) -> 'SynonymIndex':
+        '''
+        Build an index directory
+
+        Parameters
+        ----------
+        source : str or iterable
+            tab-separated bulk file path, or (cid, synonym) pairs
+        path : str
+            index directory
+
+        Returns
+        -------
+        SynonymIndex
+            opened index
+        '''
+        try:
+            pairs = cls.read_pairs(source) if isinstance(
+                source, str) else source
+
+            # hashes
+            name_hashes = array('Q')
+            name_cids = array('I')
+            token_hashes = array('Q')
+            token_cids = array('I')
+            token_cache = {}
+            for cid, synonym in pairs:
+                name = cls.normalize(synonym)
+                if name == '':
+                    continue
+                name_hashes.append(cls._hash(name))
+                name_cids.append(int(cid))
+                for token in cls.tokenize(name):
+                    _hash = token_cache.get(token)
+                    if _hash is None:
+                        _hash = cls._hash(token)
+                        if len(token_cache) < 1000000:
+                            token_cache[token] = _hash
+                    token_hashes.append(_hash)
+                    token_cids.append(int(cid))
+
+            # exact (unique name, cid pairs sorted by hash, then by file position)
+            _names = np.frombuffer(name_hashes, dtype=np.uint64)
+            _cids = np.frombuffer(name_cids, dtype=np.uint32)
+            positions = np.arange(len(_names))
+            order = np.lexsort((positions, _cids, _names))
+            keep = np.ones(len(order), dtype=bool)
+            keep[1:] = (_names[order[1:]] != _names[order[:-1]]) | (
+                _cids[order[1:]] != _cids[order[:-1]])
+            # first occurrence of each pair
+            order = np.sort(order[keep])
+            order = order[np.argsort(_names[order], kind='stable')]
+            _names, _cids = _names[order], _cids[order]
+
+            # words (postings of unique cids sorted by token hash)
+            _tokens = np.frombuffer(token_hashes, dtype=np.uint64)
+            _tcids = np.frombuffer(token_cids, dtype=np.uint32)
+            order = np.lexsort((_tcids, _tokens))
+            _tokens, _tcids = _tokens[order], _tcids[order]
+            keep = np.ones(len(_tokens), dtype=bool)
+            keep[1:] = (_tokens[1:] != _tokens[:-1]) | (
+                _tcids[1:] != _tcids[:-1])
+            _tokens, _tcids = _tokens[keep], _tcids[keep]
+            unique_tokens, starts = np.unique(_tokens, return_index=True)
+            offsets = np.append(starts, len(_tokens)).astype(np.int64)
+
+            # write
+            if not os.path.isdir(path):
+                os.makedirs(path, exist_ok=True)
+            arrays = {'name_hashes': _names, 'name_cids': _cids, 'token_hashes': unique_tokens,
+                      'token_offsets': offsets, 'postings': _tcids}
+            for name, values in arrays.items():
+                np.save(os.path.join(path, f'{name}.npy'),
+                        np.ascontiguousarray(values))
+            with open(os.path.join(path, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({'names': int(len(_names)), 'words': int(len(unique_tokens)),
+                           'postings': int(len(_tcids))}, f)
+
+            return cls(path)
+        except Exception as e:
+            raise Exception(f"building synonym index error: {e}")
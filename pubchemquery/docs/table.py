@@ -0,0 +1,270 @@
+# COMPOUND TABLE
+# ---------------
+
+# import packages/modules
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Union
+
+# local
+from .config import PROPERTY_NAMES, PROPERTY_TYPES, CID_CHUNK_SIZE
+from .record import CompoundRecord
+from .fingerprint import Fingerprint
+
+
+class CompoundTable():
+    '''
+    properties of many compounds stored column-wise in typed numpy arrays
+
+    Columns are float64 (NaN if missing), int32 with a boolean mask of
+    missing values, or object arrays of strings (None if missing). The cid
+    column is int64.
+    '''
+    # dtypes
+    dtypes = {'float': np.float64, 'int': np.int32, 'str': object}
+
+    def __init__(self, cids, columns: Dict[str, np.ndarray], masks: Optional[Dict[str, np.ndarray]] = None):
+        '''
+        Parameters
+        ----------
+        cids : array
+            compound ids
+        columns : dict
+            property name -> array (same length as cids)
+        masks : dict
+            property name -> bool array, True if the value is missing (int columns)
+        '''
+        self.cids = np.asarray(cids, dtype=np.int64)
+        self.columns = dict(columns)
+        self.masks = dict(masks or {})
+        # check
+        for name, values in self.columns.items():
+            if len(values) != len(self.cids):
+                raise Exception(f"column {name} length is not valid!")
+
+    @staticmethod
+    def _float(value) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+    @staticmethod
+    def _int(value) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict], properties: Optional[Iterable[str]] = None) -> 'CompoundTable':
+        '''
+        Make a table from PropertyTable records
+
+        Parameters
+        ----------
+        records : iterable
+            property records e.g. [{'CID': 2244, 'MolecularWeight': '180.16'}, ...]
+        properties : iterable
+            columns (default: properties found in the records, in PROPERTY_NAMES order)
+
+        Returns
+        -------
+        CompoundTable
+            table
+        '''
+        # set
+        _records = list(records)
+        n = len(_records)
+        if properties is None:
+            found = set()
+            for item in _records:
+                found.update(item.keys())
+            properties = [name for name in PROPERTY_NAMES if name in found]
+
+        # cid
+        cids = np.fromiter((cls._int(item.get('CID'))
+                           for item in _records), dtype=np.int64, count=n)
+
+        columns = {}
+        masks = {}
+        for name in properties:
+            _type = PROPERTY_TYPES.get(name, 'str')
+            if _type == 'float':
+                values = [item.get(name) for item in _records]
+                try:
+                    # numbers and numeric strings (e.g. MolecularWeight)
+                    columns[name] = np.array(
+                        [np.nan if value is None else value for value in values], dtype=np.float64)
+                except (TypeError, ValueError):
+                    columns[name] = np.fromiter(
+                        (cls._float(value) for value in values), dtype=np.float64, count=n)
+            elif _type == 'int':
+                values = [item.get(name) for item in _records]
+                masks[name] = np.fromiter(
+                    (value is None for value in values), dtype=bool, count=n)
+                try:
+                    columns[name] = np.array(
+                        [0 if value is None else value for value in values], dtype=np.int32)
+                except (TypeError, ValueError, OverflowError):
+                    columns[name] = np.fromiter(
+                        (cls._int(value) for value in values), dtype=np.int32, count=n)
+            else:
+                values = np.empty(n, dtype=object)
+                values[:] = [item.get(name) for item in _records]
+                columns[name] = values
+
+        return cls(cids, columns, masks)
+
+    @classmethod
+    def from_property_table(cls, data: Union[Dict, Iterable[Dict]],
+                            properties: Optional[Iterable[str]] = None) -> 'CompoundTable':
+        '''
+        Make a table from PropertyTable responses
+
+        Parameters
+        ----------
+        data : dict or iterable
+            {'PropertyTable': {'Properties': [...]}} or a list of them
+
+        Returns
+        -------
+        CompoundTable
+            table
+        '''
+        _data = [data] if isinstance(data, dict) else list(data)
+        records = []
+        for item in _data:
+            if item is None:
+                continue
+            records.extend(item['PropertyTable']['Properties'])
+        return cls.from_records(records, properties=properties)
+
+    @classmethod
+    def from_cids(cls, cids: Iterable, properties: List[str] = [], chunk_size: int = CID_CHUNK_SIZE,
+                  max_workers: int = 1) -> 'CompoundTable':
+        '''
+        Request properties of cids in chunks and make a table (see PubChemAPI.get_properties_by_cids)
+        '''
+        from .api import PubChemAPI
+
+        res = PubChemAPI.get_properties_by_cids(
+            cids, properties=properties, chunk_size=chunk_size, max_workers=max_workers)
+        # check
+        if res is None:
+            raise Exception("properties are not found!")
+        return cls.from_property_table(res, properties=properties if len(properties) > 0 else None)
+
+    @classmethod
+    def concat(cls, tables: Iterable['CompoundTable']) -> 'CompoundTable':
+        '''
+        Concatenate tables with the same columns
+        '''
+        _tables = list(tables)
+        # check
+        if len(_tables) == 0:
+            return cls([], {})
+        names = list(_tables[0].columns.keys())
+        for table in _tables[1:]:
+            if list(table.columns.keys()) != names:
+                raise Exception("table columns are not the same!")
+        columns = {name: np.concatenate([table.columns[name] for table in _tables])
+                   for name in names}
+        masks = {name: np.concatenate([table.masks[name] for table in _tables])
+                 for name in _tables[0].masks}
+        return cls(np.concatenate([table.cids for table in _tables]), columns, masks)
+
+    def __len__(self) -> int:
+        return len(self.cids)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name == 'CID':
+            return self.cids
+        return self.columns[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name == 'CID' or name in self.columns
+
+    def __repr__(self):
+        return f"CompoundTable({len(self)} compounds, {len(self.columns)} properties)"
+
+    @property
+    def properties(self) -> List[str]:
+        return list(self.columns.keys())
+
+    def isna(self, name: str) -> np.ndarray:
+        '''
+        Get a bool array, True if the value is missing
+        '''
+        values = self[name]
+        if name in self.masks:
+            return self.masks[name]
+        if values.dtype == np.float64:
+            return np.isnan(values)
+        if values.dtype == object:
+            return np.array([item is None for item in values], dtype=bool)
+        return np.zeros(len(values), dtype=bool)
+
+    def take(self, index) -> 'CompoundTable':
+        '''
+        Select rows by a bool mask or integer indices
+        '''
+        return CompoundTable(self.cids[index],
+                             {name: values[index]
+                                 for name, values in self.columns.items()},
+                             {name: values[index] for name, values in self.masks.items()})
+
+    def record(self, i: int) -> CompoundRecord:
+        '''
+        Get a row as a CompoundRecord
+        '''
+        data = {}
+        for name, values in self.columns.items():
+            if name in self.masks and self.masks[name][i]:
+                data[name] = None
+                continue
+            value = values[i]
+            if isinstance(value, np.floating):
+                value = None if np.isnan(value) else float(value)
+            elif isinstance(value, np.integer):
+                value = int(value)
+            data[name] = value
+        return CompoundRecord(int(self.cids[i]), **data)
+
+    def fingerprints(self, words: bool = True) -> np.ndarray:
+        '''
+        Decode the Fingerprint2D column (missing fingerprints are all-zero rows)
+
+        Parameters
+        ----------
+        words : bool
+            uint64 words (n, 14) if True, else packed uint8 bytes (n, 111)
+
+        Returns
+        -------
+        np.ndarray
+            fingerprints
+        '''
+        # check
+        if 'Fingerprint2D' not in self.columns:
+            raise Exception("Fingerprint2D column is not found!")
+        packed = Fingerprint.decode_many(self.columns['Fingerprint2D'])
+        return Fingerprint.to_words(packed) if words else packed
+
+    def to_pandas(self) -> pd.DataFrame:
+        '''
+        Convert to a pandas DataFrame without copying the numeric columns,
+        int columns become nullable Int32 columns backed by the same arrays
+
+        Returns
+        -------
+        pd.DataFrame
+            dataframe (CID column and one column per property)
+        '''
+        data = {'CID': self.cids}
+        for name, values in self.columns.items():
+            if name in self.masks:
+                data[name] = pd.arrays.IntegerArray(values, self.masks[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data, copy=False)
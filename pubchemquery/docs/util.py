@@ -4,9 +4,31 @@
 # import packages/modules
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Union, Dict, Optional, List, Tuple, Any
 # local
-from .config import CID_FILE_PREFIX
+from .config import CID_FILE_PREFIX, ENDPOINT_FAMILIES
+
+
+class HttpResponse():
+    '''
+    response read in full, exposes the `requests.Response` attributes used
+    by the api (status_code, content, text, json)
+    '''
+
+    def __init__(self, status_code, content=b'', headers=None, url='', encoding='utf-8'):
+        self.status_code = int(status_code)
+        self.content = content if content is not None else b''
+        self.headers = dict(headers or {})
+        self.url = url
+        self.encoding = encoding or 'utf-8'
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
+    def json(self):
+        return json.loads(self.text)
 
 
 class CoreUtility():
@@ -110,6 +132,51 @@ class CoreUtility():
             raise Exception(f"result generation error: {e}")
 
 
+    @staticmethod
+    def map_concurrent(func, items, max_workers=1) -> List:
+        '''
+        Apply a function to items with a bounded thread pool
+
+        Parameters
+        ----------
+        func : callable
+            func(index, item), called as items are dispatched
+        items : list
+            input items
+        max_workers : int
+            max number of calls in flight (default: 1, sequential)
+
+        Returns
+        -------
+        list
+            results in the order of items
+        '''
+        # set
+        _items = list(items)
+        results = [None]*len(_items)
+
+        # sequential
+        if max_workers is None or int(max_workers) <= 1:
+            for i, item in enumerate(_items):
+                results[i] = func(i, item)
+            return results
+
+        # concurrent
+        with ThreadPoolExecutor(max_workers=int(max_workers)) as executor:
+            futures = {executor.submit(func, i, item): i
+                       for i, item in enumerate(_items)}
+            try:
+                for future in as_completed(futures):
+                    results[futures[future]] = future.result()
+            except Exception:
+                # drop pending calls
+                for future in futures:
+                    future.cancel()
+                raise
+
+        return results
+
+
 class UtilityAPI():
     '''
     utility api class
@@ -142,3 +209,69 @@ class UtilityAPI():
             return fileName
         except Exception as e:
             print(e)
+
+    @staticmethod
+    def get_endpoint_family(url: str) -> str:
+        '''
+        Get the endpoint family of a PUG REST url
+
+        Parameters
+        ----------
+        url : str
+            request url
+
+        Returns
+        -------
+        str
+            endpoint family (listkey, property, image, search, structure, identifier, default)
+        '''
+        # set
+        _url = str(url).lower()
+        # check
+        for pattern, family in ENDPOINT_FAMILIES:
+            if pattern in _url:
+                return family
+        return 'default'
+
+    @staticmethod
+    def split_sdf_records(content: str) -> Dict[str, str]:
+        '''
+        Split a multi-record SDF into records
+
+        Parameters
+        ----------
+        content : str
+            sdf content, records are terminated by `$$$$`
+
+        Returns
+        -------
+        dict
+            {cid: record}, the cid is taken from the PUBCHEM_COMPOUND_CID tag
+            or, if it is missing, from the record header line
+        '''
+        # set
+        records = {}
+
+        for i, block in enumerate(str(content).split('$$$$')):
+            # newline of the previous terminator line (a record can start
+            # with a blank header line)
+            if i > 0:
+                if block.startswith('\r\n'):
+                    block = block[2:]
+                elif block.startswith('\n'):
+                    block = block[1:]
+            # check
+            if len(block.strip()) == 0:
+                continue
+            # record
+            record = block + '$$$$\n'
+            lines = record.splitlines()
+            # cid
+            cid = lines[0].strip()
+            for k, line in enumerate(lines[:-1]):
+                if line.startswith('> ') and '<PUBCHEM_COMPOUND_CID>' in line:
+                    cid = lines[k+1].strip()
+                    break
+            records[cid] = record
+
+        return records
@@ -0,0 +1,224 @@
+# WARM UP
+# --------
+
+# import packages/modules
+import re
+import time
+import threading
+from typing import Dict, Iterable, List, Union
+
+# local
+from .api import PubChemAPI
+from .cache import ResponseCache, OfflineCacheMissError
+from .config import PROPERTY_NAMES
+from .util import CoreUtility
+
+
+class CacheWarmer():
+    '''
+    fill the response cache ahead of time from a list of cids or names
+
+    The requests are the ones made by `compound()` and the structure
+    functions (properties, sdf, png and similar cids per cid), so the
+    same calls are answered from the cache afterwards.
+    '''
+    # groups
+    groups = ('properties', 'sdf', 'image', 'similar')
+
+    # cid pattern
+    _cid_pattern = re.compile(r'^\d+$')
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def read_identifiers(file_path: str) -> List[str]:
+        '''
+        Read cids/names from a file, one per line (blank lines and lines
+        starting with # are skipped)
+
+        Parameters
+        ----------
+        file_path : str
+            file path
+
+        Returns
+        -------
+        list
+            identifiers
+        '''
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return [line.strip() for line in f
+                        if line.strip() != '' and not line.strip().startswith('#')]
+        except Exception as e:
+            raise Exception(f"reading identifiers error: {e}")
+
+    @staticmethod
+    def _tasks(cid: str, groups, record_types, image_format, image_size, similarity_type):
+        '''
+        Requests of a cid, (group, callable)
+        '''
+        tasks = []
+        for group in groups:
+            if group == 'properties':
+                tasks.append((group, lambda: PubChemAPI.get_properties_by_cid(
+                    cid, properties=list(PROPERTY_NAMES))))
+            elif group == 'sdf':
+                for record_type in record_types:
+                    tasks.append((group, lambda record_type=record_type: PubChemAPI.get_sdf_by_cid(
+                        cid, file_format='SDF', record_type=record_type)))
+            elif group == 'image':
+                tasks.append((group, lambda: PubChemAPI.get_structure_image(
+                    cid=int(cid), image_format=image_format, image_size=image_size)))
+            elif group == 'similar':
+                tasks.append((group, lambda: PubChemAPI.get_similar_cids_by_compound_id(
+                    cid, similarity_type=similarity_type)))
+        return tasks
+
+    @staticmethod
+    def warmup(identifiers: Union[str, Iterable[str]], groups: Iterable[str] = groups,
+               record_types: Iterable[str] = ('2d', '3d'), image_format: str = '2d',
+               image_size: str = 'large', similarity_type: str = 'fastsimilarity_2d',
+               max_workers: int = 4, progress=None) -> Dict:
+        '''
+        Fill the response cache (the default cache is enabled if no cache is active)
+
+        Parameters
+        ----------
+        identifiers : str or iterable
+            cids/names or a file path (one identifier per line)
+        groups : iterable
+            properties, sdf, image, similar (default: all)
+        record_types : iterable
+            sdf record types 2d, 3d (default: both)
+        image_format : str
+            2d, 3d (default: 2d)
+        image_size : str
+            small, large, 250x250 (default: large)
+        similarity_type : str
+            fastsimilarity_2d, fastsimilarity_3d (default: fastsimilarity_2d)
+        max_workers : int
+            max number of requests in flight (default: 4), requests share the rate limit
+        progress : callable
+            progress(done, total) called after each request
+
+        Returns
+        -------
+        dict
+            number of identifiers, cids, requests, failed requests and not found names
+        '''
+        try:
+            # set
+            start = time.monotonic()
+            if isinstance(identifiers, str):
+                identifiers = CacheWarmer.read_identifiers(identifiers)
+            _groups = [str(item).strip().lower() for item in groups]
+            for group in _groups:
+                if group not in CacheWarmer.groups:
+                    raise Exception(f"group {group} is not valid!")
+            _record_types = [str(item).strip().lower() for item in record_types]
+
+            # cache
+            if ResponseCache.current() is None:
+                ResponseCache.enable()
+
+            # dedup
+            _identifiers = list(dict.fromkeys(
+                str(item).strip() for item in identifiers if str(item).strip() != ''))
+            names = [item for item in _identifiers
+                     if not CacheWarmer._cid_pattern.match(item)]
+            cids = [item for item in _identifiers
+                    if CacheWarmer._cid_pattern.match(item)]
+
+            # names -> cids (same request as compound(name))
+            def _resolve(i, name):
+                return PubChemAPI.get_cid_by_name(name, name_type='complete')
+
+            not_found = []
+            for name, res in zip(names, CoreUtility.map_concurrent(_resolve, names, max_workers=max_workers)):
+                if res is not None and len(res) == 1:
+                    cids.append(str(res[0]).strip())
+                else:
+                    not_found.append(name)
+            cids = list(dict.fromkeys(cids))
+
+            # requests
+            tasks = []
+            for cid in cids:
+                tasks.extend(CacheWarmer._tasks(
+                    cid, _groups, _record_types, image_format, image_size, similarity_type))
+
+            lock = threading.Lock()
+            counter = {'done': 0, 'failed': 0}
+
+            def _fetch(i, task):
+                group, func = task
+                try:
+                    res = func()
+                except Exception as e:
+                    OfflineCacheMissError.reraise(e)
+                    res = None
+                # check (not found records are failed requests)
+                ok = res is not None and res is not False and res != "Not Found!"
+                with lock:
+                    counter['done'] += 1
+                    if not ok:
+                        counter['failed'] += 1
+                    done = counter['done']
+                if progress is not None:
+                    progress(done, len(tasks))
+                return ok
+
+            CoreUtility.map_concurrent(_fetch, tasks, max_workers=max_workers)
+
+            return {
+                'identifiers': len(_identifiers),
+                'cids': len(cids),
+                'requests': len(tasks) + len(names),
+                'failed': counter['failed'],
+                'not_found': not_found,
+                'elapsed': time.monotonic() - start
+            }
+        except Exception as e:
+            OfflineCacheMissError.reraise(e)
+            raise Exception(f"cache warm up error: {e}")
+
+    @staticmethod
+    def start(identifiers: Union[str, Iterable[str]], callback=None, **kwargs) -> threading.Thread:
+        '''
+        Fill the response cache in a background thread (see warmup)
+
+        Parameters
+        ----------
+        identifiers : str or iterable
+            cids/names or a file path (one identifier per line)
+        callback : callable
+            callback(stats) called when the warm up is done
+        kwargs : dict
+            warmup keyword arguments
+
+        Returns
+        -------
+        threading.Thread
+            running thread, join() waits for the warm up
+        '''
+        # file/iterable is read before the thread starts (errors raise here)
+        if isinstance(identifiers, str):
+            identifiers = CacheWarmer.read_identifiers(identifiers)
+        else:
+            identifiers = list(identifiers)
+
+        def _run():
+            try:
+                stats = CacheWarmer.warmup(identifiers, **kwargs)
+            except Exception as e:
+                print(e)
+                stats = None
+            if callback is not None:
+                callback(stats)
+
+        thread = threading.Thread(
+            target=_run, name='pubchemquery-warmup', daemon=False)
+        thread.start()
+        return thread
@@ -25,6 +25,8 @@ setup(
     packages=find_packages(exclude=['tests', '*.tests', '*.tests.*']),
     license='MIT',
     install_requires=['pandas', 'pillow', 'requests', 'urllib3', 'numpy'],
+    extras_require={'async': ['aiohttp']},
+    entry_points={'console_scripts': ['pubchemquery=pubchemquery.__main__:main']},
     keywords=['python', 'PubChem', 'PubChemAPI',
               'PubChemQuery', 'pubchemquery', 'Chemistry', 'Molecular Properties'],
     classifiers=[
@@ -0,0 +1,166 @@
+# TEST FIXTURES
+# --------------
+
+# import packages/modules
+import os
+import sys
+import io
+import json
+import asyncio
+import threading
+import pytest
+import requests
+from PIL import Image
+
+# local package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pubchemquery.docs import (SessionManager, AsyncSessionManager, RateLimiter, ResponseCache,  # noqa: E402
+                               Memo, NegativeCache, InChIKeyIndex, SynonymIndex, FormulaIndex, PropertyStore)
+
+
+class FakeSession():
+    '''
+    offline stand-in for requests.Session
+
+    Responses come from the first route whose url fragment is in the url,
+    otherwise from `handler` (method, url, kwargs) -> (status, body, headers),
+    otherwise 404. Dict and list bodies are sent as JSON.
+    '''
+
+    def __init__(self):
+        self.calls = []
+        self.routes = []
+        self.handler = None
+        self._lock = threading.Lock()
+
+    def route(self, fragment, body=b'', status=200, headers=None):
+        '''
+        answer urls containing fragment
+        '''
+        self.routes.append((fragment, status, body, headers))
+
+    def respond(self, method, url, kwargs) -> tuple:
+        '''
+        record a request and make its (status, body bytes, headers)
+        '''
+        with self._lock:
+            self.calls.append((method, url, kwargs))
+        for fragment, status, body, headers in self.routes:
+            if fragment in url:
+                break
+        else:
+            status, body, headers = self.handler(
+                method, url, kwargs) if self.handler else (404, b'', None)
+
+        headers = dict(headers or {})
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers.setdefault('Content-Type', 'application/json')
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return status, body, headers
+
+    def request(self, method, url, **kwargs):
+        status, body, headers = self.respond(method, url, kwargs)
+        res = requests.Response()
+        res.status_code = status
+        res._content = body
+        res.headers.update(headers)
+        res.url = url
+        res.encoding = 'utf-8'
+        return res
+
+    def close(self):
+        pass
+
+
+class FakeAsyncResponse():
+    '''
+    offline stand-in for aiohttp.ClientResponse
+    '''
+
+    def __init__(self, status, body, headers, url):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self._body = body
+
+    async def read(self):
+        await asyncio.sleep(0)
+        return self._body
+
+    def get_encoding(self):
+        return 'utf-8'
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeAsyncSession(FakeSession):
+    '''
+    offline stand-in for aiohttp.ClientSession, same routes as FakeSession
+    '''
+    closed = False
+
+    def request(self, method, url, **kwargs):
+        status, body, headers = self.respond(method, url, kwargs)
+        return FakeAsyncResponse(status, body, headers, url)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture(scope='session')
+def png() -> bytes:
+    '''
+    small PNG image
+    '''
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def reset_state(monkeypatch):
+    '''
+    isolate process-wide state (no rate limit, caches and indexes disabled)
+    '''
+    monkeypatch.setattr(RateLimiter, '_buckets', {})
+    monkeypatch.setattr(RateLimiter, '_loaded', True)
+    SessionManager.set_offline(False)
+    Memo.clear()
+    yield
+    SessionManager._session = None
+    SessionManager.set_offline(False)
+    ResponseCache.disable()
+    NegativeCache.disable()
+    InChIKeyIndex.disable()
+    SynonymIndex.disable()
+    FormulaIndex.disable()
+    PropertyStore.disable()
+    Memo.clear()
+
+
+@pytest.fixture
+def pubchem(monkeypatch):
+    '''
+    fake PubChem session, add `pubchem.route(...)` or set `pubchem.handler`,
+    requests are kept in `pubchem.calls`
+    '''
+    session = FakeSession()
+    monkeypatch.setattr(SessionManager, '_session', session)
+    return session
+
+
+@pytest.fixture
+def async_pubchem(monkeypatch):
+    '''
+    fake PubChem session for the asyncio api
+    '''
+    session = FakeAsyncSession()
+    monkeypatch.setattr(AsyncSessionManager, 'get_session', classmethod(lambda cls: session))
+    return session
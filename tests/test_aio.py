@@ -0,0 +1,75 @@
+# ASYNC API TESTS
+# ----------------
+
+# import packages/modules
+import asyncio
+import pytest
+from pubchemquery import aio
+from pubchemquery.docs import (AsyncPubChemAPI, SessionManager, ResponseCache, OfflineCacheMissError,
+                               PROPERTY_NAMES)
+
+
+PROPS = {'PropertyTable': {'Properties': [{'CID': 241, 'IUPACName': 'benzene', 'MolecularFormula': 'C6H6'}]}}
+
+
+@pytest.fixture
+def benzene(async_pubchem, png):
+    async_pubchem.route('/property/', PROPS)
+    async_pubchem.route('/PNG', png)
+    async_pubchem.route('fastsimilarity_2d', '241\n7501\n')
+    async_pubchem.route('/name/benzene/', '241\n')
+    async_pubchem.route('/fastformula/C6H6/', '241\n')
+    return async_pubchem
+
+
+def test_lookups(benzene):
+    async def main():
+        return (await aio.get_cid_by_name('benzene'), await aio.get_cids_by_formula('C6H6'),
+                await aio.get_cid_by_name('unknown'))
+    assert asyncio.run(main()) == ('241', ['241'], 'Not Found!')
+    assert len(benzene.calls) == 3
+
+
+def test_identical_requests_are_coalesced(benzene):
+    async def main():
+        return await asyncio.gather(*(aio.get_cid_by_name('benzene') for _ in range(5)))
+    assert asyncio.run(main()) == ['241']*5
+    assert len(benzene.calls) == 1
+
+
+def test_compound_requests_groups_concurrently(benzene):
+    res = asyncio.run(aio.compound('benzene'))
+    assert res.compound_cid == '241'
+    assert res.MolecularFormula == 'C6H6'
+    assert res.similar_structure_cids == ['241', '7501']
+    assert res.image.size == (2, 2)
+    assert len(benzene.calls) == 4
+
+
+def test_offline_miss_is_not_wrapped(async_pubchem, tmp_path):
+    ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    SessionManager.set_offline(True)
+    with pytest.raises(OfflineCacheMissError):
+        asyncio.run(aio.get_cid_by_name('benzene'))
+    assert async_pubchem.calls == []
+
+
+def test_compound_sdf_and_failed_groups_are_requested_on_access(async_pubchem, pubchem, png):
+    async_pubchem.route('/PNG', png)
+    async_pubchem.route('/property/', status=503)
+    pubchem.route('/property/', PROPS)
+    pubchem.route('/SDF', '241\n  -OEChem-\n\nM  END\n$$$$\n')
+    res = asyncio.run(aio.compound(241))
+    assert res.loaded == ('image', 'similar')
+    assert res.similar_structure_cids == []
+    assert res.MolecularFormula == 'C6H6'
+    assert res.sdf.startswith('241')
+    assert res.loaded == ('properties', 'image', 'similar', 'sdf')
+
+
+def test_properties_default_to_all_and_not_found(async_pubchem):
+    async_pubchem.route('/cid/241/', PROPS)
+    res = asyncio.run(AsyncPubChemAPI.get_properties_by_cid(241))
+    assert res == PROPS
+    assert ','.join(PROPERTY_NAMES) in async_pubchem.calls[0][1]
+    assert asyncio.run(AsyncPubChemAPI.get_properties_by_cid(999)) is None
@@ -0,0 +1,68 @@
+# RESPONSE CACHE TESTS
+# ---------------------
+
+# import packages/modules
+import json
+from pubchemquery.docs import ResponseCache, HttpResponse, PubChemAPI, SessionManager
+
+URL = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/2244/property/MolecularWeight/JSON'
+
+
+def test_make_key_normalizes_query_order():
+    a = ResponseCache.make_key('get', 'https://PUBCHEM.ncbi.nlm.nih.gov/x?b=2&a=1')
+    b = ResponseCache.make_key('GET', 'https://pubchem.ncbi.nlm.nih.gov/x', params={'a': 1, 'b': 2})
+    assert a == b
+    assert a != ResponseCache.make_key('POST', 'https://pubchem.ncbi.nlm.nih.gov/x?a=1&b=2')
+
+
+def test_set_get_and_ttl(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite'), ttl={'property': 100})
+    key = ResponseCache.make_key('GET', URL)
+    assert cache.set(key, URL, 'property', HttpResponse(200, b'{"a": 1}', {'Content-Type': 'application/json'}))
+    assert cache.get(key, 'property').json() == {'a': 1}
+    # expired
+    cache.ttl['property'] = -1
+    assert cache.get(key, 'property') is None
+    assert cache.get(key, 'property', ignore_ttl=True) is not None
+    # not cached status
+    assert not cache.set(key, URL, 'property', HttpResponse(503, b''))
+    cache.close()
+
+
+def test_lru_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite'), max_size=100)
+    keys = [ResponseCache.make_key('GET', f'{URL}?i={i}') for i in range(5)]
+    for key in keys:
+        cache.set(key, URL, 'property', HttpResponse(200, b'x'*30))
+    assert cache.stats()['size'] <= 100
+    assert cache.get(keys[-1], 'property') is not None
+    assert cache.get(keys[0], 'property') is None
+    cache.close()
+
+
+def test_listkey_params_not_cacheable(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'c.sqlite'))
+    url = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/fastformula/C6H6/cids/JSON'
+    assert cache.is_cacheable(url, 'search')
+    assert not cache.is_cacheable(url, 'search', params={'list_return': 'listkey'})
+    assert not cache.is_cacheable(url + '?list_return=listkey', 'search')
+    # listkey bodies are not cached
+    body = json.dumps({'IdentifierList': {'ListKey': '1', 'Size': 3}}).encode()
+    assert not cache.set('k', url, 'search', HttpResponse(200, body))
+    cache.close()
+
+
+def test_cached_request_and_listkey_rerun(pubchem, tmp_path):
+    ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    pubchem.route('/listkey/', '1\n2\n')
+    pubchem.route('/fastformula/', {'IdentifierList': {'ListKey': '7', 'Size': 2}})
+    pubchem.route('/property/', {'PropertyTable': {'Properties': [{'CID': 2244}]}})
+
+    SessionManager.get(URL)
+    SessionManager.get(URL)
+    assert len(pubchem.calls) == 1
+
+    assert list(PubChemAPI.iter_cids_by_formula('C6H6')) == ['1', '2']
+    assert list(PubChemAPI.iter_cids_by_formula('C6H6')) == ['1', '2']
+    # the search is sent again, its listkey is not replayed
+    assert sum('/fastformula/' in url for _, url, _ in pubchem.calls) == 2
@@ -0,0 +1,69 @@
+# FINGERPRINT TESTS
+# ------------------
+
+# import packages/modules
+import numpy as np
+import pytest
+from pubchemquery.docs import Fingerprint
+
+
+def _packed(bits):
+    res = np.zeros(Fingerprint.NUM_BITS, dtype=np.uint8)
+    res[list(bits)] = 1
+    return np.packbits(res)
+
+
+def test_decode_encode_round_trip():
+    packed = _packed([0, 7, 8, 400, 880])
+    fingerprint = Fingerprint.encode(packed)
+    decoded = Fingerprint.decode(fingerprint)
+    assert decoded.dtype == np.uint8
+    assert decoded.shape == (Fingerprint.NUM_BYTES,)
+    assert np.array_equal(decoded, packed)
+    assert Fingerprint.on_bits(decoded).tolist() == [0, 7, 8, 400, 880]
+
+
+def test_decode_rejects_invalid():
+    with pytest.raises(Exception):
+        Fingerprint.decode("AAAA")
+
+
+def test_decode_many_zero_rows_for_missing():
+    packed = _packed([3, 5])
+    res = Fingerprint.decode_many(
+        [Fingerprint.encode(packed), None, "not base64!", "AAAA"])
+    assert res.shape == (4, Fingerprint.NUM_BYTES)
+    assert np.array_equal(res[0], packed)
+    assert not res[1:].any()
+
+
+def test_to_words_and_popcount():
+    packed = np.stack([_packed([1, 2, 880]), _packed([])])
+    words = Fingerprint.to_words(packed)
+    assert words.dtype == np.uint64
+    assert words.shape == (2, Fingerprint.NUM_WORDS)
+    assert Fingerprint.to_words(packed[0]).shape == (Fingerprint.NUM_WORDS,)
+    assert Fingerprint.popcount(words).tolist() == [3, 0]
+    assert Fingerprint.popcount(packed).tolist() == [3, 0]
+
+
+def test_tanimoto_matches_sets():
+    rng = np.random.default_rng(0)
+    sets = [set(rng.choice(Fingerprint.NUM_BITS, size=n, replace=False).tolist())
+            for n in (0, 5, 40, 200)]
+    packed = np.stack([_packed(s) for s in sets])
+    words = Fingerprint.to_words(packed)
+
+    def _expected(a, b):
+        union = len(a | b)
+        return len(a & b) / union if union else 0.0
+
+    for i, query in enumerate(sets):
+        scores = Fingerprint.tanimoto(words[i], words)
+        assert np.allclose(scores, [_expected(query, s) for s in sets])
+        # packed bytes give the same result
+        assert np.allclose(Fingerprint.tanimoto(packed[i], packed), scores)
+
+    matrix = Fingerprint.tanimoto_matrix(words, block_size=3)
+    assert matrix.shape == (4, 4)
+    assert np.allclose(matrix, [[_expected(a, b) for b in sets] for a in sets])
@@ -0,0 +1,61 @@
+# FORMULA INDEX TESTS
+# --------------------
+
+# import packages/modules
+import json
+import pytest
+import pubchemquery as pcq
+from pubchemquery.docs import Formula, FormulaIndex, ResponseCache, HttpResponse, PubChemAPI
+
+
+def test_parse_and_canonical():
+    assert Formula.parse('CH3COOH') == {'C': 2, 'H': 4, 'O': 2}
+    assert Formula.parse('Ca(OH)2') == {'Ca': 1, 'O': 2, 'H': 2}
+    assert Formula.canonical('HOCH2CH3') == 'C2H6O'
+    assert Formula.canonical('NaCl') == 'ClNa'
+    with pytest.raises(Exception):
+        Formula.parse('Xx2(')
+
+
+def test_exact_and_other_elements():
+    index = FormulaIndex([241, 8078, 7501, 702, 10000], ['C6H6', 'C6H12', 'C8H8', 'C2H6O', 'C6H6Cl2'])
+    assert index.search('C6H6') == ['241']
+    assert index.search('H6C6') == ['241']
+    assert index.search('C6H6', allow_other_elements=True) == ['241', '10000']
+    assert index.search('C7H8') == []
+    assert not index.complete
+
+
+def test_save_load_keeps_completeness(tmp_path):
+    source = tmp_path / 'CID-Mass'
+    source.write_text('241\tC6H6\t78.11\n702\tC2H6O\t46.07\n', encoding='utf-8')
+    index = FormulaIndex.from_file(str(source))
+    assert index.complete
+    index.save(str(tmp_path / 'f.npz'))
+    loaded = FormulaIndex.load(str(tmp_path / 'f.npz'))
+    assert loaded.complete
+    assert loaded.search('C2H6O') == ['702']
+
+
+def test_cache_index_does_not_answer_for_pubchem(tmp_path, pubchem):
+    cache = ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    url = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/241/property/MolecularFormula/JSON'
+    body = json.dumps({'PropertyTable': {'Properties': [{'CID': 241, 'MolecularFormula': 'C6H6'}]}})
+    cache.set(ResponseCache.make_key('GET', url), url, 'property', HttpResponse(200, body.encode()))
+    index = pcq.build_formula_index()
+    assert index.search('C6H6') == ['241']
+    assert FormulaIndex.current() is None
+    with pytest.raises(Exception):
+        FormulaIndex.enable(index)
+    # PubChem answers (more isomers than the cache knows)
+    pubchem.route('/fastformula/C6H6/', '241\n7501\n')
+    assert PubChemAPI.get_cids_by_formula('C6H6') == ['241', '7501']
+
+
+def test_bulk_index_answers_without_network(tmp_path, pubchem):
+    source = tmp_path / 'CID-Mass'
+    source.write_text('241\tC6H6\t78.11\n', encoding='utf-8')
+    pcq.build_formula_index(str(source))
+    assert FormulaIndex.current() is not None
+    assert PubChemAPI.get_cids_by_formula('C6H6') == ['241']
+    assert pubchem.calls == []
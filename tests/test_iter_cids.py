@@ -0,0 +1,47 @@
+# PAGED CID ITERATOR TESTS
+# -------------------------
+
+# import packages/modules
+import pytest
+
+from pubchemquery.docs import PubChemAPI
+
+
+def test_iter_cids_pages(pubchem):
+    cids = [str(i) for i in range(1, 26)]
+
+    def handler(method, url, kwargs):
+        params = kwargs.get('params') or {}
+        if '/fastformula/' in url:
+            assert params.get('list_return') == 'listkey'
+            return 200, {'IdentifierList': {'ListKey': '99', 'Size': len(cids)}}, None
+        start, count = int(params['listkey_start']), int(params['listkey_count'])
+        return 200, '\n'.join(cids[start:start + count]), None
+    pubchem.handler = handler
+
+    res = list(PubChemAPI.iter_cids_by_formula('C6H6', page_size=10))
+    assert res == cids
+    # search + 3 pages
+    assert len(pubchem.calls) == 4
+
+
+def test_iter_cids_default_params_not_shared(pubchem):
+    pubchem.route('/fastformula/', {'IdentifierList': {'CID': [1, 2]}})
+    assert list(PubChemAPI.iter_cids('fastformula/C6H6')) == ['1', '2']
+    assert list(PubChemAPI.iter_cids('fastformula/C6H6', params={'Threshold': 90})) == ['1', '2']
+    assert pubchem.calls[1][2]['params'] == {'Threshold': 90, 'list_return': 'listkey'}
+    assert pubchem.calls[0][2]['params'] == {'list_return': 'listkey'}
+
+
+def test_iter_cids_searches_pass_poll_options(pubchem):
+    pubchem.route('/listkey/', {'IdentifierList': {'CID': [1, 2]}})
+    pubchem.route('/', '{"Waiting": {"ListKey": "7"}}', status=202)
+
+    assert list(PubChemAPI.iter_cids_by_formula('C6H6', poll_interval=0)) == ['1', '2']
+    assert list(PubChemAPI.iter_cids_by_2d_similarity(297, poll_interval=0)) == ['1', '2']
+    assert list(PubChemAPI.iter_cids_by_structure_type(297, poll_interval=0)) == ['1', '2']
+
+    pubchem.routes.clear()
+    pubchem.route('/', '{"Waiting": {"ListKey": "7"}}', status=202)
+    with pytest.raises(Exception, match='did not finish within 0 seconds'):
+        list(PubChemAPI.iter_cids_by_formula('C6H6', poll_interval=0.01, timeout=0))
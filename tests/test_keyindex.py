@@ -0,0 +1,77 @@
+# KEY INDEX TESTS
+# ----------------
+
+# import packages/modules
+import gzip
+import numpy as np
+from pubchemquery.docs import InChIKeyIndex
+
+BENZENE = 'UHOVQNZJYSORNB-UHFFFAOYSA-N'
+ASPIRIN = 'BSYNRYMUTXBXSQ-UHFFFAOYSA-N'
+
+
+def _key(i):
+    letters = ''
+    for _ in range(14):
+        i, r = divmod(i, 26)
+        letters = chr(ord('A') + r) + letters
+    return f"{letters}-UHFFFAOYSA-N"
+
+
+def test_build_from_bulk_file_and_lookup(tmp_path):
+    source = tmp_path / 'CID-InChI-Key.gz'
+    with gzip.open(source, 'wt', encoding='utf-8') as f:
+        f.write(f"241\tInChI=1S/C6H6/c1-2-4-6-5-3-1/h1-6H\t{BENZENE}\n")
+        f.write(f"2244\tInChI=1S/C9H8O4\t{ASPIRIN}\n")
+        f.write(f"2244\tInChI=1S/C9H8O4\t{ASPIRIN}\n")
+        f.write("bad line\n")
+    index = InChIKeyIndex.build(str(source), str(tmp_path / 'key.idx'))
+    assert len(index) == 2
+    assert index.lookup(BENZENE.lower()) == ['241']
+    assert index.lookup(ASPIRIN) == ['2244']
+    assert 'AAAAAAAAAAAAAA-UHFFFAOYSA-N' not in index
+    inchi = InChIKeyIndex.build(str(source), str(tmp_path / 'inchi.idx'), kind='inchi')
+    assert inchi.lookup('InChI=1S/C6H6/c1-2-4-6-5-3-1/h1-6H ') == ['241']
+    index.close()
+    inchi.close()
+
+
+def test_many_keys_and_multiple_cids(tmp_path, monkeypatch):
+    monkeypatch.setattr(InChIKeyIndex, '_chunk_size', 1000)
+    pairs = [(i + 1, _key(i)) for i in range(5000)] + [(99999, _key(7)), (1, _key(0))]
+    index = InChIKeyIndex.build(pairs, str(tmp_path / 'key.idx'))
+    assert len(index) == 5001
+    assert index.num_slots >= 2*len(index)
+    assert all(index.lookup(_key(i)) == [str(i + 1)] for i in range(5000) if i != 7)
+    assert index.lookup(_key(7)) == ['8', '99999']
+    index.close()
+
+
+def test_probing_wraps_past_the_end(tmp_path, monkeypatch):
+    # every key hashes to the last slot
+    monkeypatch.setattr(InChIKeyIndex, '_hash_words', staticmethod(
+        lambda words: np.full(len(words), np.iinfo(np.uint64).max, dtype=np.uint64)))
+    monkeypatch.setattr(InChIKeyIndex, '_hash', staticmethod(lambda key: 2**64 - 1))
+    pairs = [(i + 1, _key(i)) for i in range(6)]
+    index = InChIKeyIndex.build(pairs, str(tmp_path / 'key.idx'))
+    assert all(index.lookup(_key(i)) == [str(i + 1)] for i in range(6))
+    assert index.lookup(BENZENE) == []
+    index.close()
+
+
+def test_empty_build(tmp_path):
+    index = InChIKeyIndex.build([], str(tmp_path / 'key.idx'))
+    assert len(index) == 0
+    assert index.lookup(BENZENE) == []
+    index.close()
+    assert sorted(item.name for item in tmp_path.iterdir()) == ['key.idx']
+
+
+def test_scalar_hash_matches_bulk_hash():
+    keys = [InChIKeyIndex.make_key(_key(i)) for i in range(100)] + \
+        [InChIKeyIndex.make_key('InChI=1S/CH4/h1H4', kind='inchi')]
+    rows = np.zeros(len(keys), dtype=InChIKeyIndex._slot)
+    rows['key'] = keys
+    rows['used'] = 1
+    rows['cid'] = 2**32 - 1
+    assert InChIKeyIndex._hash_rows(rows).tolist() == [InChIKeyIndex._hash(key) for key in keys]
@@ -0,0 +1,91 @@
+# LAZY COMPOUND TESTS
+# --------------------
+
+# import packages/modules
+import threading
+import pytest
+import pubchemquery as pcq
+from pubchemquery.docs import PubChemAPI
+
+PROPS = {'PropertyTable': {'Properties': [{'CID': 241, 'IUPACName': 'benzene', 'MolecularWeight': '78.11'}]}}
+
+
+@pytest.fixture
+def benzene(pubchem):
+    pubchem.route('/property/', PROPS)
+    pubchem.route('/name/', '241\n')
+    return pubchem
+
+
+def test_compound_name_does_not_fetch(benzene):
+    compound = pcq.compound('benzol')
+    calls = len(benzene.calls)
+    assert compound.compound_name == 'benzol'
+    assert len(benzene.calls) == calls
+    assert compound.MolecularWeight == '78.11'
+    assert compound.compound_name == 'benzene'
+
+
+def test_group_requested_once_across_threads(benzene):
+    compound = PubChemAPI(241, '', lazy=True)
+    threads = [threading.Thread(target=lambda: compound.MolecularWeight) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len([call for call in benzene.calls if '/property/' in call[1]]) == 1
+    assert compound.loaded == ('properties',)
+
+
+def test_failed_group_is_recorded_and_retried(benzene):
+    compound = PubChemAPI('abc', '', lazy=True)
+    with pytest.raises(Exception):
+        compound.image
+    assert 'image' not in compound.loaded
+    assert 'image' in compound.errors
+    # a set value clears the error
+    compound.image = 'img'
+    assert compound.image == 'img'
+    assert compound.errors == {}
+
+
+def test_http_error_is_recorded_and_retried(pubchem):
+    responses = [(500, b'', None), (200, PROPS, None)]
+    pubchem.handler = lambda method, url, kwargs: responses.pop(0)
+    compound = PubChemAPI(241, '', lazy=True)
+    with pytest.raises(Exception):
+        compound.MolecularWeight
+    assert compound.loaded == ()
+    assert 'properties' in compound.errors
+    # requested again on the next access
+    assert compound.MolecularWeight == '78.11'
+    assert compound.loaded == ('properties',)
+    assert compound.errors == {}
+
+
+def test_eager_compound_requests_groups(benzene, png):
+    benzene.route('/PNG', png)
+    benzene.route('/fastsimilarity_2d/', '241\n7501\n')
+    benzene.route('/SDF', '241\n  -OEChem-\n\nM  END\n$$$$\n')
+    compound = PubChemAPI(241, '')
+    assert compound.loaded == ('properties', 'image', 'similar')
+    assert compound.MolecularWeight == '78.11'
+    assert compound.similar_structure_cids == ['241', '7501']
+    # sdf is requested on first access
+    calls = len(benzene.calls)
+    assert compound.sdf.startswith('241')
+    assert len(benzene.calls) == calls + 1
+
+
+def test_eager_compound_keeps_errors_for_access(pubchem):
+    pubchem.handler = lambda method, url, kwargs: (503, b'', None)
+    compound = PubChemAPI(241, '')
+    assert compound.loaded == ()
+    assert set(compound.errors) == {'properties', 'image', 'similar'}
+    with pytest.raises(Exception):
+        compound.MolecularWeight
+
+
+def test_prefetch_raises_group_errors(benzene):
+    with pytest.raises(Exception):
+        PubChemAPI('abc', '', lazy=True).prefetch('image')
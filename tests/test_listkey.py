@@ -0,0 +1,29 @@
+# LISTKEY TESTS
+# --------------
+
+# import packages/modules
+import pytest
+from pubchemquery.docs import ListKeyPoller, PubChemAPI, HttpResponse
+
+WAITING = '{"Waiting": {"ListKey": "123456", "Message": "Your request is running"}}'
+
+
+def test_get_listkey():
+    assert ListKeyPoller.get_listkey(HttpResponse(202, WAITING.encode())) == '123456'
+    assert ListKeyPoller.get_listkey(HttpResponse(200, b'241\n')) is None
+
+
+def test_wait_polls_until_done(pubchem):
+    responses = [(202, WAITING, {}), (202, b'busy', {}), (200, b'241\n702\n', {})]
+    pubchem.handler = lambda method, url, kwargs: responses.pop(0)
+
+    res = PubChemAPI.get_cids_by_molecular_formula('C6H6', poll_interval=0, timeout=5)
+    assert res == ['241', '702']
+    assert all('/listkey/123456/' in url for _, url, _ in pubchem.calls[1:])
+
+
+def test_wait_timeout(pubchem):
+    pubchem.route('/listkey/', WAITING, status=202)
+    res = HttpResponse(202, WAITING.encode())
+    with pytest.raises(Exception, match='did not finish'):
+        ListKeyPoller.wait(res, poll_interval=0.01, timeout=0.05)
@@ -0,0 +1,65 @@
+# MEMO TESTS
+# -----------
+
+# import packages/modules
+import time
+import pubchemquery as pcq
+from pubchemquery.docs import LRUCache, Memo, PubChemAPI, IdentifierResolver
+
+
+def test_lru_eviction_and_ttl():
+    cache = LRUCache(maxsize=2, ttl=0.05)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    # b is the least recently used
+    assert cache.get('b') is LRUCache.MISSING
+    time.sleep(0.06)
+    assert cache.get('a') is LRUCache.MISSING
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lookup_is_memoized(pubchem):
+    pubchem.route('/name/', '241\n')
+    assert PubChemAPI.get_cid_by_name('Benzene', name_type='complete') == ['241']
+    assert PubChemAPI.get_cid_by_name(' benzene ', name_type='complete') == ['241']
+    assert len(pubchem.calls) == 1
+    assert PubChemAPI.get_cid_by_name.cached('BENZENE', name_type='complete') == ['241']
+
+
+def test_refused_lookup_is_not_memoized(pubchem):
+    responses = [(503, b'ServerBusy', {}), (200, '241\n', {})]
+    pubchem.handler = lambda method, url, kwargs: responses.pop(0)
+    assert PubChemAPI.get_cid_by_name('benzene', name_type='complete') is None
+    assert PubChemAPI.get_cid_by_name('benzene', name_type='complete') == ['241']
+    assert len(pubchem.calls) == 2
+
+
+def test_resolver_reports_refused_as_error(pubchem):
+    pubchem.route('/name/', 'ServerBusy', status=503)
+    res = IdentifierResolver.resolve(['benzene'], identifier_type='name')
+    assert res['benzene']['status'] == IdentifierResolver.ERROR
+
+
+def test_image_by_name_single_request(pubchem, png):
+    pubchem.route('/PNG', png, headers={'Content-Type': 'image/png'})
+    pubchem.route('/name/', '241\n')
+    assert pcq.get_image_by_name('benzene') is not None
+    assert len(pubchem.calls) == 1
+    assert '/name/benzene/' in pubchem.calls[0][1]
+    # resolved name, the image is requested by cid
+    pcq.get_cid_by_name('benzene')
+    pcq.get_image_by_name('benzene')
+    assert '/cid/241/' in pubchem.calls[-1][1]
+
+
+def test_memo_disabled(pubchem):
+    pubchem.route('/name/', '241\n')
+    Memo.configure(enabled=False)
+    try:
+        PubChemAPI.get_cid_by_name('benzene', name_type='complete')
+        PubChemAPI.get_cid_by_name('benzene', name_type='complete')
+        assert len(pubchem.calls) == 2
+    finally:
+        Memo.configure(enabled=True)
@@ -0,0 +1,49 @@
+# NEGATIVE CACHE TESTS
+# ---------------------
+
+# import packages/modules
+from pubchemquery.docs import BloomFilter, NegativeCache, PubChemAPI, Memo
+
+
+def test_bloom_filter_counts_new_items():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    assert bloom.add('a')
+    assert not bloom.add('a')
+    assert 'a' in bloom and 'b' not in bloom
+    assert bloom.count == 1
+    for i in range(500):
+        bloom.add(str(i))
+    assert abs(bloom.estimate_count() - bloom.count) < 25
+
+
+def test_processes_sharing_a_file_keep_entries(tmp_path):
+    path = str(tmp_path / 'neg.bloom')
+    a = NegativeCache(path, capacity=1000)
+    b = NegativeCache(path, capacity=1000)
+    a.add('name\x1fbenzol-x')
+    a.save()
+    b.add('name\x1fnot-a-compound')
+    b.save()
+    # b merged a's identifier
+    assert b.contains('name\x1fbenzol-x')
+    c = NegativeCache(path, capacity=1000)
+    assert c.contains('name\x1fbenzol-x') and c.contains('name\x1fnot-a-compound')
+    assert c.stats()['count'] == 2
+
+
+def test_clear_is_not_merged_back(tmp_path):
+    path = str(tmp_path / 'neg.bloom')
+    cache = NegativeCache(path, capacity=1000)
+    cache.add('x')
+    cache.save()
+    cache.clear()
+    assert not NegativeCache(path, capacity=1000).contains('x')
+
+
+def test_not_found_name_is_not_requested_again(pubchem, tmp_path):
+    NegativeCache.enable(str(tmp_path / 'neg.bloom'), capacity=1000)
+    assert PubChemAPI.get_cid_by_name('no such compound', name_type='complete') == []
+    # memoized results are dropped, the bloom filter answers
+    Memo.clear()
+    assert PubChemAPI.get_cid_by_name('No Such  Compound', name_type='complete') == []
+    assert len(pubchem.calls) == 1
@@ -0,0 +1,48 @@
+# OFFLINE MODE TESTS
+# -------------------
+
+# import packages/modules
+import pytest
+import pubchemquery as pcq
+from pubchemquery.docs import ResponseCache, SessionManager, Memo, OfflineCacheMissError
+
+URL = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/benzene/cids/TXT'
+
+
+def test_offline_replays_cached_response(tmp_path, pubchem):
+    # responses are recorded, then replayed without network access
+    # (PUBCHEMQUERY_OFFLINE=1 enables offline mode at import)
+    pcq.enable_cache(str(tmp_path / 'c.sqlite'))
+    pubchem.route('/name/benzene/', '241\n', headers={'Content-Type': 'text/plain'})
+    assert pcq.get_cid_by_name('benzene') == '241'
+    Memo.clear()
+    pcq.set_offline(True)
+    pubchem.calls.clear()
+    assert pcq.get_cid_by_name('benzene') == '241'
+    assert pubchem.calls == []
+
+
+def test_offline_miss_is_not_wrapped(tmp_path, pubchem):
+    ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    SessionManager.set_offline(True)
+    with pytest.raises(OfflineCacheMissError):
+        pcq.get_cid_by_name('toluene')
+    with pytest.raises(OfflineCacheMissError):
+        pcq.get_cids_by_formula('C7H8')
+    assert pubchem.calls == []
+
+
+def test_offline_cannot_replay_listkey(tmp_path):
+    cache = ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    SessionManager.set_offline(True)
+    key = ResponseCache.make_key('GET', URL)
+    assert not cache.set(key, URL, 'search', pcq.docs.HttpResponse(
+        202, b'{"Waiting": {"ListKey": "123"}}'))
+    with pytest.raises(OfflineCacheMissError):
+        SessionManager.replay('GET', URL)
+
+
+def test_reraise_ignores_other_errors():
+    OfflineCacheMissError.reraise(ValueError('x'))
+    with pytest.raises(OfflineCacheMissError):
+        OfflineCacheMissError.reraise(OfflineCacheMissError('GET', URL))
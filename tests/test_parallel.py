@@ -0,0 +1,79 @@
+# BOUNDED-PARALLEL DOWNLOAD TESTS
+# --------------------------------
+
+# import packages/modules
+import re
+import time
+import threading
+from pubchemquery.docs import PubChemAPI
+from pubchemquery.docs.util import CoreUtility
+
+
+def _record(cid):
+    return f"{cid}\n  -OEChem-\n\nM  END\n> <PUBCHEM_COMPOUND_CID>\n{cid}\n\n$$$$\n"
+
+
+class Tracker():
+    '''
+    handler counting requests in flight
+    '''
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, method, url, kwargs):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        cid = re.search(r'/cid/(\d+)/', url).group(1)
+        return 200, _record(cid), {}
+
+
+def test_map_concurrent_keeps_order_and_bound():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def _func(i, item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.01)
+        with lock:
+            active[0] -= 1
+        return item*2
+
+    assert CoreUtility.map_concurrent(_func, range(12), max_workers=3) == [i*2 for i in range(12)]
+    assert peak[0] <= 3
+
+
+def test_sdf_by_cids_parallel_keeps_order(pubchem, tmp_path):
+    tracker = Tracker()
+    pubchem.handler = tracker
+    cids = [str(i) for i in range(1, 9)]
+    res = PubChemAPI.get_sdf_by_cids(cids, max_workers=4, save=True, location=str(tmp_path))
+    assert res == [_record(cid) for cid in cids]
+    assert 1 < tracker.peak <= 4
+    assert sorted(item.name for item in tmp_path.iterdir()) == sorted(f'cid_{cid}.sdf' for cid in cids)
+
+
+def test_sdf_by_cids_sequential_by_default(pubchem):
+    tracker = Tracker(delay=0)
+    pubchem.handler = tracker
+    res = PubChemAPI.get_sdf_by_cids(['1', '2', '3'])
+    assert len(res) == 3
+    assert tracker.peak == 1
+
+
+def test_mat_by_cids_parallel(pubchem, tmp_path):
+    tracker = Tracker()
+    pubchem.handler = tracker
+    cids = [str(i) for i in range(1, 7)]
+    res = PubChemAPI.get_mat_by_cids(cids, file_format='SDF', max_workers=3, location=str(tmp_path))
+    assert res == [_record(cid) for cid in cids]
+    assert 1 < tracker.peak <= 3
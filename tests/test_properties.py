@@ -0,0 +1,42 @@
+# MULTI-CID PROPERTY TESTS
+# -------------------------
+
+# import packages/modules
+import re
+from pubchemquery.docs import PubChemAPI
+
+
+def _handler(method, url, kwargs):
+    # cids in the url or in the POST body
+    _cids = kwargs['data']['cid'] if method == 'POST' else re.search(r'/cid/([\d,]+)/', url).group(1)
+    records = [{'CID': int(cid), 'MolecularWeight': str(int(cid)*2)} for cid in _cids.split(',')
+               if cid != '999']
+    if len(records) == 0:
+        return 404, b'', None
+    return 200, {'PropertyTable': {'Properties': records}}, None
+
+
+def test_chunks_are_merged_in_order(pubchem):
+    pubchem.handler = _handler
+    cids = list(range(1, 11))
+    res = PubChemAPI.get_properties_by_cids(cids, properties=['MolecularWeight'], chunk_size=4, max_workers=2)
+    assert [item['CID'] for item in res['PropertyTable']['Properties']] == cids
+    assert len(pubchem.calls) == 3
+    assert all(method == 'GET' for method, _, _ in pubchem.calls)
+
+
+def test_long_urls_are_posted(pubchem):
+    pubchem.handler = _handler
+    cids = [100000000 + i for i in range(300)]
+    res = PubChemAPI.get_properties_by_cids(cids, properties=['MolecularWeight'], chunk_size=300)
+    assert len(res['PropertyTable']['Properties']) == 300
+    (method, url, kwargs), = pubchem.calls
+    assert method == 'POST'
+    assert '/cid/property/' in url
+
+
+def test_missing_chunk_and_empty_list(pubchem):
+    pubchem.handler = _handler
+    res = PubChemAPI.get_properties_by_cids([1, 999, 2], properties=['MolecularWeight'], chunk_size=1)
+    assert [item['CID'] for item in res['PropertyTable']['Properties']] == [1, 2]
+    assert PubChemAPI.get_properties_by_cids([], properties=['MolecularWeight']) is None
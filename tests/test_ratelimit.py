@@ -0,0 +1,40 @@
+# RATE LIMIT TESTS
+# -----------------
+
+# import packages/modules
+from pubchemquery.docs import RateLimiter, TokenBucket
+
+
+def test_token_bucket_burst_then_delay():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 0.1 + 1e-6
+
+
+def test_token_bucket_delay_takes_nothing():
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.delay() == 0
+    assert bucket.delay() == 0
+    assert bucket.reserve() == 0
+    assert bucket.delay() > 0
+
+
+def test_remove_last_limit(monkeypatch):
+    monkeypatch.setattr(RateLimiter, '_loaded', False)
+    RateLimiter.configure(None, family='global')
+    assert RateLimiter.limits() == {}
+    assert RateLimiter.acquire('property') == 0
+    assert RateLimiter.limits() == {}
+
+
+def test_family_wait_keeps_global_tokens():
+    RateLimiter.configure(rate=100, capacity=2, family='global')
+    RateLimiter.configure(rate=1, capacity=1, family='search')
+    assert RateLimiter.reserve('search') == 0
+    # search bucket is empty, global is not used
+    assert RateLimiter.reserve('search') > 0
+    assert RateLimiter.reserve('search') > 0
+    # one of two global tokens is left
+    assert RateLimiter.reserve('property') == 0
+    assert RateLimiter.reserve('property') > 0
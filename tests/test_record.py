@@ -0,0 +1,40 @@
+# COMPOUND RECORD TESTS
+# ----------------------
+
+# import packages/modules
+import pickle
+import pytest
+from pubchemquery.docs import CompoundRecord, PropertyView, PubChemAPI
+
+
+def test_record_update_and_pickle():
+    record = CompoundRecord.from_dict({'CID': 241, 'MolecularWeight': '78.11', 'Unknown': 1}, name='benzene')
+    assert record.cid == 241
+    assert record.get('MolecularWeight') == '78.11'
+    assert record.get('Unknown', 'x') == 'x'
+    assert not hasattr(record, '__dict__')
+    clone = pickle.loads(pickle.dumps(record))
+    assert clone.to_dict() == record.to_dict()
+    assert clone.name == 'benzene'
+
+
+def test_property_view_writes_through():
+    record = CompoundRecord(241, 'benzene', Title='Benzene')
+    view = PropertyView(record)
+    view['Title'] = 'benzol'
+    assert record.Title == 'benzol'
+    assert view == record.to_dict()
+    assert isinstance(view.copy(), dict)
+    with pytest.raises(KeyError):
+        view['Unknown'] = 1
+    with pytest.raises(TypeError):
+        del view['Title']
+
+
+def test_compound_prop_mutation_is_kept(pubchem):
+    pubchem.route('/property/', {'PropertyTable': {'Properties': [{'CID': 241, 'Title': 'benzene'}]}})
+    compound = PubChemAPI(241, 'benzene', lazy=True)
+    compound.prop['MolecularFormula'] = 'C6H6'
+    assert compound.MolecularFormula == 'C6H6'
+    assert compound.prop['MolecularFormula'] == 'C6H6'
+    assert compound.prop_df().shape[0] == len(CompoundRecord.property_names)
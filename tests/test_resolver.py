@@ -0,0 +1,46 @@
+# IDENTIFIER RESOLVER TESTS
+# --------------------------
+
+# import packages/modules
+import pytest
+import pubchemquery as pcq
+from pubchemquery.docs import IdentifierResolver
+
+
+@pytest.mark.parametrize('identifier, identifier_type', [
+    ('InChI=1S/C6H6/c1-2-4-6-5-3-1/h1-6H', 'inchi'),
+    ('UHOVQNZJYSORNB-UHFFFAOYSA-N', 'inchikey'),
+    ('C6H6', 'formula'),
+    ('c1ccccc1', 'smiles'),
+    ('CCO', 'smiles'),
+    ('benzene', 'name'),
+    ('acetic acid', 'name'),
+])
+def test_detect_type(identifier, identifier_type):
+    assert IdentifierResolver.detect_type(identifier) == identifier_type
+
+
+def test_normalize():
+    assert IdentifierResolver.normalize('  Acetic   Acid ', 'name') == ('Acetic Acid', 'acetic acid')
+    assert IdentifierResolver.normalize('uhovqnzjysornb-uhfffaoysa-n', 'inchikey')[0] == \
+        'UHOVQNZJYSORNB-UHFFFAOYSA-N'
+
+
+def test_resolve_dedups_and_reports_status(pubchem):
+    pubchem.route('/name/benzene/', '241\n')
+    pubchem.route('/name/glucose/', '5793\n107526\n')
+    pubchem.route('/name/busy/', status=503)
+    res = pcq.resolve_identifiers(['benzene', 'Benzene', ' BENZENE ', 'glucose', 'unobtainium', 'busy'],
+                                  identifier_type='name')
+    assert res['benzene'] == {'type': 'name', 'query': 'benzene', 'status': 'found', 'cids': ['241']}
+    assert res['Benzene']['cids'] == ['241']
+    assert res['glucose']['status'] == 'ambiguous'
+    assert res['unobtainium']['status'] == 'not_found'
+    assert res['busy']['status'] == 'error'
+    # one request per unique normalized identifier
+    assert len([call for call in pubchem.calls if '/name/benzene/' in call[1].lower()]) == 1
+
+
+def test_resolve_rejects_unknown_type():
+    with pytest.raises(Exception):
+        IdentifierResolver.resolve(['benzene'], identifier_type='cas')
@@ -0,0 +1,42 @@
+# SDF RECORD TESTS
+# -----------------
+
+# import packages/modules
+from pubchemquery.docs import PubChemAPI
+from pubchemquery.docs.util import UtilityAPI
+
+
+def make_record(cid, title=None):
+    _title = str(cid) if title is None else title
+    return (f"{_title}\n  -OEChem-\n\n  1  0  0     0  0  0  0  0  0999 V2000\nM  END\n"
+            f"> <PUBCHEM_COMPOUND_CID>\n{cid}\n\n$$$$\n")
+
+
+def test_split_records():
+    content = make_record(1) + make_record(2) + make_record(3)
+    res = UtilityAPI.split_sdf_records(content)
+    assert list(res.keys()) == ['1', '2', '3']
+    assert res['2'] == make_record(2)
+
+
+def test_split_keeps_blank_header_line():
+    content = make_record(1, title='') + make_record(2, title='')
+    res = UtilityAPI.split_sdf_records(content)
+    assert res['1'] == make_record(1, title='')
+    assert res['2'] == make_record(2, title='')
+    assert ''.join(res.values()) == content
+
+
+def test_split_crlf():
+    content = make_record(1).replace('\n', '\r\n') + make_record(2).replace('\n', '\r\n')
+    res = UtilityAPI.split_sdf_records(content)
+    assert res['2'].startswith('2\r\n')
+
+
+def test_chunked_sdf_requests_missing_one_by_one(pubchem):
+    pubchem.route('/cid/1,2,3/', make_record(1) + make_record(3))
+    pubchem.route('/cid/2/', status=404)
+    pubchem.handler = lambda method, url, kwargs: (500, b'', None)
+    res = PubChemAPI.get_sdf_by_cids([1, 2, 3], chunk_size=3)
+    assert res == [make_record(1), make_record(3)]
+    assert len(pubchem.calls) == 2
@@ -0,0 +1,99 @@
+# SDF STORE TESTS
+# ----------------
+
+# import packages/modules
+import os
+import threading
+from pubchemquery.docs import SDFStore, PubChemAPI
+
+
+def _record(cid, title=''):
+    return (f"{title}\n  -OEChem-01012500002D\n\n  1  0  0     0  0  0  0  0  0999 V2000\n"
+            f"M  END\n> <PUBCHEM_COMPOUND_CID>\n{cid}\n\n$$$$\n")
+
+
+def test_blank_title_line_is_kept(tmp_path):
+    path = str(tmp_path / 'store.sdf')
+    store = SDFStore(path)
+    store.extend({241: _record(241), 2244: _record(2244, 'aspirin')})
+    assert store.get_text(241) == _record(241)
+    assert store.get_text(2244) == _record(2244, 'aspirin')
+    store.close()
+    # index rebuilt by scanning the sdf file
+    os.remove(path + '.idx')
+    store = SDFStore(path)
+    assert store.cids() == [241, 2244]
+    assert store.get_text(241) == _record(241)
+    assert store.get_text(2244) == _record(2244, 'aspirin')
+    store.close()
+
+
+def test_build_from_bulk_file_and_replace(tmp_path):
+    source = tmp_path / 'Compound.sdf'
+    source.write_text(_record(1) + _record(2, 'two'), encoding='utf-8')
+    store = SDFStore.build(str(source), str(tmp_path / 'store.sdf'))
+    assert len(store) == 2
+    store.append(1, _record(1, 'new'))
+    assert store.get_text(1) == _record(1, 'new')
+    assert len(store) == 2
+    store.close()
+    store = SDFStore(str(tmp_path / 'store.sdf'))
+    assert store.get_text(1) == _record(1, 'new')
+    assert store.get(3) is None
+    store.close()
+
+
+def test_records_appended_by_other_tools_are_indexed(tmp_path):
+    path = str(tmp_path / 'store.sdf')
+    SDFStore(path).close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(_record(5) + _record(6))
+    store = SDFStore(path)
+    assert store.cids() == [5, 6]
+    assert store.get_text(5) == _record(5)
+    store.close()
+
+
+def test_get_while_appending(tmp_path):
+    store = SDFStore(str(tmp_path / 'store.sdf'))
+    store.append(1, _record(1))
+    errors = []
+
+    def _read():
+        try:
+            for _ in range(300):
+                assert bytes(store.get(1)) == _record(1).encode()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=_read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for cid in range(2, 200):
+        store.append(cid, _record(cid))
+        store.get(cid)
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store) == 199
+    store.close()
+
+
+def test_store_opened_from_path_is_closed(tmp_path, pubchem, monkeypatch):
+    closed = []
+    close = SDFStore.close
+
+    def _close(self):
+        closed.append(self.path)
+        close(self)
+    monkeypatch.setattr(SDFStore, 'close', _close)
+
+    path = str(tmp_path / 'store.sdf')
+    pubchem.route('/cid/241/', _record(241))
+    assert PubChemAPI.get_sdf_by_cids([241], store=path) == [_record(241)]
+    assert closed == [path]
+
+    # failed request
+    pubchem.route('/cid/', b'', status=500)
+    assert PubChemAPI.get_sdf_by_cids([2244], store=path) is None
+    assert closed == [path, path]
@@ -0,0 +1,46 @@
+# SESSION TESTS
+# --------------
+
+# import packages/modules
+import threading
+import requests
+from pubchemquery.docs import SessionManager
+
+
+def test_one_session_for_all_threads(monkeypatch):
+    monkeypatch.setattr(SessionManager, '_session', None)
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(SessionManager.get_session()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert isinstance(sessions[0], requests.Session)
+    assert all(item is sessions[0] for item in sessions)
+    adapter = sessions[0].get_adapter('https://pubchem.ncbi.nlm.nih.gov/')
+    assert adapter._pool_maxsize == SessionManager.settings()['pool_maxsize']
+
+
+def test_configure_resets_the_session(monkeypatch):
+    monkeypatch.setattr(SessionManager, '_settings', dict(SessionManager._settings))
+    monkeypatch.setattr(SessionManager, '_session', None)
+    first = SessionManager.get_session()
+    settings = SessionManager.configure(pool_maxsize=3, timeout=5)
+    assert settings['pool_maxsize'] == 3
+    assert settings['timeout'] == 5
+    second = SessionManager.get_session()
+    assert second is not first
+    assert second.get_adapter('https://pubchem.ncbi.nlm.nih.gov/')._pool_maxsize == 3
+
+
+def test_requests_share_the_session_with_default_timeout(pubchem):
+    pubchem.route('/rest/pug/', '241\n')
+    SessionManager.get('https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/benzene/cids/TXT')
+    SessionManager.post('https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/cid/property/Title/JSON',
+                        data={'cid': '241'}, timeout=3)
+    (m1, _, k1), (m2, _, k2) = pubchem.calls
+    assert (m1, m2) == ('GET', 'POST')
+    assert k1['timeout'] == SessionManager.settings()['timeout']
+    assert k2['timeout'] == 3
+    assert k2['data'] == {'cid': '241'}
@@ -0,0 +1,53 @@
+# SIMILARITY INDEX TESTS
+# -----------------------
+
+# import packages/modules
+import numpy as np
+from pubchemquery.docs import SimilarityIndex, Fingerprint
+
+
+def _fp(bits):
+    words = np.zeros(Fingerprint.NUM_WORDS, dtype=np.uint64)
+    for bit in bits:
+        words[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+    return words
+
+
+def _brute(index, query, k):
+    scores = Fingerprint.tanimoto(query, index.words)
+    order = np.lexsort((index.cids, -scores))[:k]
+    return [(int(index.cids[i]), float(scores[i])) for i in order]
+
+
+def test_empty_index():
+    index = SimilarityIndex([], [])
+    assert len(index) == 0
+    assert index.top_k(_fp([1, 2]), 3) == []
+    assert len(SimilarityIndex(np.zeros(0, dtype=np.int64),
+                               np.zeros((0, Fingerprint.NUM_WORDS), dtype=np.uint64))) == 0
+
+
+def test_top_k_ties_follow_score_then_cid():
+    # subsets (2 bits) and supersets (8 bits) of the query all score 0.5,
+    # the subset bin is scored first but the superset cids are smaller
+    query = _fp([0, 1, 2, 3])
+    subsets = [_fp([i % 4, (i + 1) % 4]) for i in range(6)]
+    supersets = [_fp([0, 1, 2, 3, 10 + i, 20 + i, 30 + i, 40 + i]) for i in range(6)]
+    cids = [100, 101, 102, 103, 104, 105, 1, 2, 3, 4, 5, 6]
+    index = SimilarityIndex(cids, np.stack(subsets + supersets))
+    res = index.top_k(query, 3)
+    assert [cid for cid, _ in res] == [1, 2, 3]
+    assert res == _brute(index, query, 3)
+
+
+def test_search_and_top_k_match_brute_force():
+    rng = np.random.default_rng(0)
+    bits = rng.random((300, Fingerprint.NUM_WORDS*64)) < 0.05
+    bits[:, Fingerprint.NUM_BITS:] = False
+    words = Fingerprint.to_words(np.packbits(bits[:, :Fingerprint.NUM_BITS], axis=1))
+    index = SimilarityIndex(np.arange(1, 301), words)
+    query = index.words[0]
+    assert index.top_k(query, 10) == _brute(index, query, 10)
+    res = index.search(query, threshold=0.3)
+    assert all(score >= 0.3 for _, score in res)
+    assert res == [item for item in _brute(index, query, 300) if item[1] >= 0.3]
@@ -0,0 +1,76 @@
+# SINGLE FLIGHT TESTS
+# --------------------
+
+# import packages/modules
+import time
+import asyncio
+import threading
+import pytest
+from pubchemquery.docs import SingleFlight, AsyncSingleFlight, SessionManager
+
+URL = 'https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/benzene/cids/TXT'
+
+
+def _parallel(n, func):
+    results = [None]*n
+    barrier = threading.Barrier(n)
+
+    def _run(i):
+        barrier.wait()
+        results[i] = func()
+    threads = [threading.Thread(target=_run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = []
+
+    def _func():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'ok'
+    assert _parallel(6, lambda: flight.do('k', _func)) == ['ok']*6
+    assert len(calls) == 1
+    assert flight.stats() == {'in_flight': 0, 'coalesced': 5}
+
+
+def test_errors_are_shared_and_not_kept():
+    flight = SingleFlight()
+
+    def _fail():
+        time.sleep(0.05)
+        raise ValueError('refused')
+    errors = _parallel(3, lambda: pytest.raises(ValueError, flight.do, 'k', _fail).value)
+    assert all(str(item) == 'refused' for item in errors)
+    # the next call runs again
+    assert flight.do('k', lambda: 1) == 1
+
+
+def test_async_calls_share_one_task():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def _func(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value
+
+    async def main():
+        return await asyncio.gather(flight.do('a', _func, 1), flight.do('a', _func, 1), flight.do('b', _func, 2))
+    assert asyncio.run(main()) == [1, 1, 2]
+    assert calls == [1, 2]
+
+
+def test_session_coalesces_identical_requests(pubchem):
+    def _slow(method, url, kwargs):
+        time.sleep(0.05)
+        return 200, '241\n', None
+    pubchem.handler = _slow
+    res = _parallel(5, lambda: SessionManager.get(URL).text)
+    assert res == ['241\n']*5
+    assert len(pubchem.calls) == 1
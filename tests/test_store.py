@@ -0,0 +1,47 @@
+# PROPERTY STORE TESTS
+# ---------------------
+
+# import packages/modules
+from pubchemquery.docs import PropertyStore, PubChemAPI
+
+RECORDS = [
+    {'CID': 241, 'MolecularFormula': 'C6H6', 'MolecularWeight': '78.11', 'HBondDonorCount': 0, 'XLogP': 2},
+    {'CID': 2244, 'MolecularFormula': 'C9H8O4', 'MolecularWeight': '180.16', 'HBondDonorCount': 1, 'XLogP': 1.2},
+    {'CID': 702, 'MolecularFormula': 'C2H6O', 'MolecularWeight': '46.07', 'HBondDonorCount': 1, 'XLogP': -0.1},
+]
+
+
+def test_upsert_and_query(tmp_path):
+    store = PropertyStore(str(tmp_path / 'p.sqlite'))
+    assert store.upsert(RECORDS) == 3
+    assert store.upsert([{'CID': 241, 'Title': 'Benzene'}]) == 1
+    assert len(store) == 3
+    assert store.get(241)['Title'] == 'Benzene'
+    assert store.get(241)['MolecularWeight'] == 78.11
+    assert store.cids(MolecularWeight=(50, 200)) == [241, 2244]
+    assert store.cids({'HBondDonorCount': [1]}) == [702, 2244]
+    assert store.count(MolecularFormula='C2H6O') == 1
+    res = store.query(columns=['XLogP'], order_by='-XLogP', limit=2)
+    assert res == [{'CID': 241, 'XLogP': 2.0}, {'CID': 2244, 'XLogP': 1.2}]
+    store.clear()
+    assert len(store) == 0
+    store.close()
+
+
+def test_store_error_does_not_fail_the_fetch(tmp_path, pubchem, monkeypatch):
+    store = PropertyStore.enable(str(tmp_path / 'p.sqlite'))
+    pubchem.route('/property/', {'PropertyTable': {'Properties': [RECORDS[0]]}})
+
+    def _fail(records):
+        raise Exception('database is locked')
+    monkeypatch.setattr(store, 'upsert', _fail)
+    res = PubChemAPI.get_properties_by_cid(241, properties=['MolecularFormula'])
+    assert res['PropertyTable']['Properties'][0]['CID'] == 241
+    assert PropertyStore.save_fetched(RECORDS) == 0
+
+
+def test_fetched_properties_are_stored(tmp_path, pubchem):
+    store = PropertyStore.enable(str(tmp_path / 'p.sqlite'))
+    pubchem.route('/property/', {'PropertyTable': {'Properties': [RECORDS[1]]}})
+    PubChemAPI.get_properties_by_cid(2244, properties=['MolecularFormula'])
+    assert store.get(2244)['MolecularFormula'] == 'C9H8O4'
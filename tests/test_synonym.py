@@ -0,0 +1,42 @@
+# SYNONYM INDEX TESTS
+# --------------------
+
+# import packages/modules
+import pubchemquery as pcq
+from pubchemquery.docs import SynonymIndex, PubChemAPI
+
+PAIRS = [(5793, 'Glucose'), (5793, 'D-Glucose'), (107526, 'glucose'), (5793, 'glucose'),
+         (241, 'Benzene'), (241, 'benzol'), (2244, 'Aspirin'), (2244, 'acetylsalicylic acid')]
+
+
+def test_exact_keeps_file_order(tmp_path):
+    index = SynonymIndex.build(PAIRS, str(tmp_path / 'syn'))
+    assert index.exact('GLUCOSE') == ['5793', '107526']
+    assert index.exact('  benzol ') == ['241']
+    assert index.exact('toluene') == []
+    assert len(index) == 7
+
+
+def test_words_intersect_postings(tmp_path):
+    index = SynonymIndex.build(PAIRS, str(tmp_path / 'syn'))
+    assert index.lookup('glucose', name_type='word') == ['5793', '107526']
+    assert index.lookup('acid acetylsalicylic', name_type='word') == ['2244']
+    assert index.lookup('benzene acid', name_type='word') == []
+
+
+def test_read_pairs(tmp_path):
+    source = tmp_path / 'CID-Synonym-filtered'
+    source.write_text('241\tbenzene\n241\tbenzol\nx\ty\n', encoding='utf-8')
+    assert list(SynonymIndex.read_pairs(str(source))) == [(241, 'benzene'), (241, 'benzol')]
+
+
+def test_lookup_without_network_and_ambiguous_fallback(tmp_path, pubchem):
+    SynonymIndex.build(PAIRS, str(tmp_path / 'syn'))
+    SynonymIndex.enable(str(tmp_path / 'syn'))
+    pubchem.route('/name/', '5793\n')
+    assert pcq.get_cid_by_name('benzol') == '241'
+    assert pubchem.calls == []
+    # several cids for a complete name, PubChem ranks them
+    assert pcq.get_cid_by_name('glucose') == '5793'
+    assert len(pubchem.calls) == 1
+    assert PubChemAPI.get_cid_by_name('glucose', name_type='word') == ['5793', '107526']
@@ -0,0 +1,56 @@
+# COMPOUND TABLE TESTS
+# ---------------------
+
+# import packages/modules
+import numpy as np
+import pandas as pd
+from pubchemquery.docs import CompoundTable
+
+RECORDS = [
+    {'CID': 241, 'MolecularFormula': 'C6H6', 'MolecularWeight': '78.11', 'HBondDonorCount': 0, 'XLogP': 2},
+    {'CID': 2244, 'MolecularFormula': 'C9H8O4', 'MolecularWeight': '180.16', 'HBondDonorCount': 1},
+    {'CID': 702, 'MolecularWeight': 'n/a'},
+]
+
+
+def test_typed_columns_and_missing_values():
+    table = CompoundTable.from_records(RECORDS)
+    assert len(table) == 3
+    assert table.properties == ['MolecularFormula', 'MolecularWeight', 'XLogP', 'HBondDonorCount']
+    assert table['CID'].dtype == np.int64
+    assert table['MolecularWeight'].dtype == np.float64
+    assert table['HBondDonorCount'].dtype == np.int32
+    assert table['MolecularFormula'].dtype == object
+    assert table.isna('MolecularWeight').tolist() == [False, False, True]
+    assert table.isna('HBondDonorCount').tolist() == [False, False, True]
+    assert table.isna('MolecularFormula').tolist() == [False, False, True]
+    assert table.isna('XLogP').tolist() == [False, True, True]
+
+
+def test_take_record_and_concat():
+    table = CompoundTable.from_records(RECORDS)
+    light = table.take(table['MolecularWeight'] < 100)
+    assert light['CID'].tolist() == [241]
+    record = table.record(1)
+    assert record.cid == 2244
+    assert record.MolecularWeight == 180.16
+    assert record.XLogP is None
+    both = CompoundTable.concat([table, table.take([0])])
+    assert both['CID'].tolist() == [241, 2244, 702, 241]
+    assert both.isna('HBondDonorCount').tolist() == [False, False, True, False]
+
+
+def test_to_pandas_nullable_ints():
+    df = CompoundTable.from_records(RECORDS).to_pandas()
+    assert list(df.columns) == ['CID', 'MolecularFormula', 'MolecularWeight', 'XLogP', 'HBondDonorCount']
+    assert str(df['HBondDonorCount'].dtype) == 'Int32'
+    assert pd.isna(df['HBondDonorCount'][2])
+    assert df['MolecularWeight'][1] == 180.16
+
+
+def test_from_cids_requests_chunks(pubchem):
+    pubchem.route('/property/', {'PropertyTable': {'Properties': RECORDS[:2]}})
+    table = CompoundTable.from_cids([241, 2244], properties=['MolecularWeight', 'HBondDonorCount'])
+    assert table.properties == ['MolecularWeight', 'HBondDonorCount']
+    assert table['HBondDonorCount'].tolist() == [0, 1]
+    assert len(pubchem.calls) == 1
@@ -0,0 +1,53 @@
+# CACHE WARM UP TESTS
+# --------------------
+
+# import packages/modules
+import pytest
+from pubchemquery.docs import CacheWarmer, ResponseCache
+
+
+@pytest.fixture
+def benzene(pubchem):
+    pubchem.route('/name/', '241\n')
+    pubchem.route('/property/', {'PropertyTable': {'Properties': [{'CID': 241}]}})
+    return pubchem
+
+
+def test_read_identifiers_skips_comments(tmp_path):
+    path = tmp_path / 'ids.txt'
+    path.write_text('# header\n2244\n\nbenzene\n', encoding='utf-8')
+    assert CacheWarmer.read_identifiers(str(path)) == ['2244', 'benzene']
+
+
+def test_warmup_resolves_names_and_dedups(tmp_path, benzene):
+    ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    done = []
+    stats = CacheWarmer.warmup(['241', 'benzene', '241'], groups=['properties'],
+                               progress=lambda d, t: done.append((d, t)))
+    assert stats['identifiers'] == 2
+    assert stats['cids'] == 1
+    assert stats['requests'] == 2
+    assert stats['not_found'] == []
+    assert done == [(1, 1)]
+
+
+def test_warmup_counts_not_found_as_failed(tmp_path, benzene):
+    ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    benzene.route('/SDF', b'', status=404)
+    stats = CacheWarmer.warmup(['241'], groups=['properties', 'sdf'])
+    assert stats['requests'] == 3
+    assert stats['failed'] == 2
+
+
+def test_start_reads_file_before_thread(tmp_path, benzene):
+    ResponseCache.enable(str(tmp_path / 'c.sqlite'))
+    path = tmp_path / 'ids.txt'
+    path.write_text('241\n', encoding='utf-8')
+    results = []
+    thread = CacheWarmer.start(str(path), callback=results.append, groups=['properties'])
+    path.unlink()
+    thread.join()
+    assert results[0]['cids'] == 1
+    # missing file raises in the caller, not in the thread
+    with pytest.raises(Exception):
+        CacheWarmer.start(str(path))